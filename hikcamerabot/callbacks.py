@@ -1,6 +1,9 @@
 """Camera callbacks module."""
 
+import html
 import logging
+import re
+from datetime import date, datetime, time, timedelta
 
 from pyrogram.types import Message
 
@@ -18,9 +21,11 @@ from hikcamerabot.enums import (
     ServiceType,
     StreamType,
 )
+from hikcamerabot.event_engine.dead_letter import get_dead_letter_queue
 from hikcamerabot.event_engine.events.inbound import (
     AlertConfEvent,
     DetectionConfEvent,
+    DvrClipEvent,
     GetPicEvent,
     GetVideoEvent,
     IrcutConfEvent,
@@ -30,6 +35,11 @@ from hikcamerabot.utils.shared import bold, send_text
 
 log = logging.getLogger(__name__)
 
+_TIME_RANGE_REGEX = re.compile(
+    r'^(?:(?P<date>\d{4}-\d{2}-\d{2})\s+)?'
+    r'(?P<start>\d{2}:\d{2}(?::\d{2})?)\s*[-\s]\s*(?P<end>\d{2}:\d{2}(?::\d{2})?)$'
+)
+
 
 @authorization_check
 @camera_selection
@@ -138,6 +148,33 @@ async def cmd_getvideor(bot: CameraBot, message: Message, cam: HikvisionCam) ->
     await bot.inbound_dispatcher.dispatch(event)
 
 
+@authorization_check
+@camera_selection
+async def cmd_dvr_clip(bot: CameraBot, message: Message, cam: HikvisionCam) -> None:
+    """Cut clip of a time range from DVR recordings."""
+    log.info('DVR clip requested')
+    try:
+        start, end = _get_time_range(message)
+    except ValueError:
+        await send_text(
+            text=(
+                f'Usage: /{message.command[0]} [YYYY-MM-DD] HH:MM[:SS] HH:MM[:SS]\n'
+                f'Example: /{message.command[0]} 13:58 14:03'
+            ),
+            message=message,
+            quote=True,
+        )
+        return
+    event = DvrClipEvent(
+        cam=cam,
+        event=EventType.DVR_CLIP,
+        message=message,
+        start_ts=start.timestamp(),
+        end_ts=end.timestamp(),
+    )
+    await bot.inbound_dispatcher.dispatch(event)
+
+
 @authorization_check
 async def cmd_stop(bot: CameraBot, message: Message) -> None:
     """Terminate the bot."""
@@ -441,6 +478,96 @@ async def cmd_help(
     text = (
         'Use /list_cams to show cameras and their commands\n'
         'Use /groups to show camera groups\n'
+        'Use /dlq to show failed deliveries\n'
         'Use /version to check the bot version'
     )
     await send_text(text=text, message=message, quote=True)
+
+
+@authorization_check
+async def cmd_dlq(bot: CameraBot, message: Message) -> None:  # noqa: ARG001
+    """List failed outbound deliveries waiting for retry."""
+    dead_letters = get_dead_letter_queue()
+    letters = dead_letters.get_letters()
+    if not letters:
+        await send_text(text=bold('No failed deliveries'), message=message, quote=True)
+        return
+
+    msg = [bold(f'Failed deliveries: {len(letters)}')]
+    for letter in letters:
+        retry_delay = dead_letters.get_retry_delay(letter)
+        if letter.retrying:
+            retry_text = 'retrying now'
+        elif retry_delay is None:
+            retry_text = 'not retried anymore'
+        else:
+            retry_text = f'next retry in {retry_delay:.0f}s'
+        msg.append(
+            f'<b>#{letter.letter_id}</b> {html.escape(letter.description)}\n'
+            f'Attempts: {letter.attempts}, {retry_text}\n'
+            f'Error: {html.escape(letter.error)}'
+        )
+    msg.append(
+        'Use /dlq_replay [id] to retry now, /dlq_discard [id] to drop, '
+        'all failed deliveries when id is omitted'
+    )
+    await send_text(text='\n\n'.join(msg), message=message, quote=True)
+
+
+@authorization_check
+async def cmd_dlq_replay(bot: CameraBot, message: Message) -> None:  # noqa: ARG001
+    """Retry failed outbound deliveries right away."""
+    try:
+        letter_id = _get_letter_id(message)
+    except ValueError:
+        await send_text(text='Usage: /dlq_replay [id]', message=message, quote=True)
+        return
+    replayed = get_dead_letter_queue().replay(letter_id)
+    await send_text(
+        text=bold(f'Retrying {replayed} failed deliveries'), message=message, quote=True
+    )
+
+
+@authorization_check
+async def cmd_dlq_discard(bot: CameraBot, message: Message) -> None:  # noqa: ARG001
+    """Drop failed outbound deliveries."""
+    try:
+        letter_id = _get_letter_id(message)
+    except ValueError:
+        await send_text(text='Usage: /dlq_discard [id]', message=message, quote=True)
+        return
+    discarded = get_dead_letter_queue().discard(letter_id)
+    await send_text(
+        text=bold(f'Discarded {discarded} failed deliveries'),
+        message=message,
+        quote=True,
+    )
+
+
+def _get_letter_id(message: Message) -> int | None:
+    """Get optional dead letter id from command arguments."""
+    args = message.command[1:]
+    if not args:
+        return None
+    return int(args[0].lstrip('#'))
+
+
+def _get_time_range(message: Message) -> tuple[datetime, datetime]:
+    """Get local time range from command arguments.
+
+    Date defaults to today, or yesterday when the time is still ahead. End
+    time before start time means the range goes over midnight.
+    """
+    match = _TIME_RANGE_REGEX.match(' '.join(message.command[1:]))
+    if not match:
+        raise ValueError('Invalid time range')
+    now = datetime.now()  # noqa: DTZ005
+    day = date.fromisoformat(match['date']) if match['date'] else now.date()
+    start = datetime.combine(day, time.fromisoformat(match['start']))
+    end = datetime.combine(day, time.fromisoformat(match['end']))
+    if not match['date'] and start > now:
+        start -= timedelta(days=1)
+        end -= timedelta(days=1)
+    if end <= start:
+        end += timedelta(days=1)
+    return start, end
@@ -10,6 +10,7 @@ from pyrogram.types import Message
 
 from hikcamerabot.clients.hikvision import HikvisionAPI, HikvisionAPIClient
 from hikcamerabot.clients.hikvision.enums import IrcutFilterType
+from hikcamerabot.common.telegram.captions import CameraCaptions
 from hikcamerabot.common.video.videogif_recorder import VideoGifRecorder
 from hikcamerabot.config.schemas.main_config import CameraConfigSchema
 from hikcamerabot.enums import VideoGifType
@@ -17,6 +18,7 @@ from hikcamerabot.exceptions import HikvisionAPIError, HikvisionCamError
 from hikcamerabot.services.abstract import AbstractService
 from hikcamerabot.services.alarm import AlarmService
 from hikcamerabot.services.manager import ServiceManager
+from hikcamerabot.services.pre_event import PreEventRecorderService
 from hikcamerabot.services.stream import (
     DvrStreamService,
     IcecastStreamService,
@@ -89,6 +91,9 @@ class ServiceContainer:
             api=api,
             bot=bot,
         )
+        self.pre_event_recorder = PreEventRecorderService(
+            conf=conf.video_gif.on_alert, cam=cam
+        )
 
     def get_all(self) -> tuple[AbstractService, ...]:
         """Return tuple with all services."""
@@ -100,6 +105,7 @@ class ServiceContainer:
             self.stream_tg,
             self.stream_yt,
             self.timelapse,
+            self.pre_event_recorder,
         )
 
 
@@ -121,6 +127,9 @@ class HikvisionCam:
         self.group = conf.group or self._DEFAULT_GROUP_NAME
         self.is_behind_nvr = conf.nvr.is_behind
         self.nvr_channel_name = conf.nvr.channel_name
+        self.captions = CameraCaptions.build(
+            cam_id=self.id, description=self.description, hashtag=self.hashtag
+        )
 
         self._api = HikvisionAPI(api_client=HikvisionAPIClient(conf=conf.api))
         self._img_processor = ImageProcessor()
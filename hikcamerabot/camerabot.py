@@ -2,9 +2,16 @@
 
 import asyncio
 import logging
+from functools import partial
+from typing import Any, BinaryIO
 
 from pyrogram import Client
 
+from hikcamerabot.common.telegram import (
+    get_file_id_cache,
+    get_telegram_sender,
+    get_upload_service,
+)
 from hikcamerabot.config.config import main_conf
 from hikcamerabot.event_engine.dispatchers.inbound import InboundEventDispatcher
 from hikcamerabot.event_engine.dispatchers.outbound import OutboundEventDispatcher
@@ -13,6 +20,8 @@ from hikcamerabot.registry import CameraRegistry
 from hikcamerabot.services.alarm.nvr.tasks.alarm_monitoring_task import (
     NvrAlarmMonitoringTask,
 )
+from hikcamerabot.services.stream.dvr.catalog import get_dvr_catalog
+from hikcamerabot.services.stream.dvr.retention import DvrRetentionManager
 from hikcamerabot.utils.task import create_task
 
 
@@ -36,7 +45,9 @@ class CameraBot(Client):
         self.cam_registry = CameraRegistry()
         self.inbound_dispatcher = InboundEventDispatcher(bot=self)
         self.outbound_dispatcher = OutboundEventDispatcher(bot=self)
-        self.result_worker_manager = ResultWorkerManager(self.outbound_dispatcher)
+        self.result_worker_manager = ResultWorkerManager(
+            self.outbound_dispatcher, self.cam_registry
+        )
 
     def start_tasks(self) -> None:
         """Start and forget async launch per camera tasks. They start all
@@ -44,6 +55,7 @@ class CameraBot(Client):
         """
         self.result_worker_manager.start_worker_tasks()
         self._start_nvr_services()
+        self._start_dvr_retention()
         for cam in self.cam_registry.get_instances():
             task_name = f'{cam.id} launch task'
             create_task(
@@ -54,6 +66,30 @@ class CameraBot(Client):
                 exception_message_args=(task_name,),
             )
 
+    async def save_file(self, path: str | BinaryIO, *args: Any, **kwargs: Any) -> Any:
+        """Take file uploaded in advance by upload service instead of uploading it.
+
+        Other arguments are passed to pyrogram as is.
+        """
+        if isinstance(path, str) and not args and kwargs.get('file_id') is None:
+            uploaded = get_upload_service().get_uploaded(path)
+            if uploaded is not None:
+                return uploaded
+        return await super().save_file(path, *args, **kwargs)
+
+    async def stop_tasks(self) -> None:
+        """Gracefully stop outbound event processing."""
+        await self.result_worker_manager.stop_worker_tasks()
+        self._log.info('Telegram sender stats: %s', get_telegram_sender().stats)
+        file_id_cache = get_file_id_cache()
+        self._log.info(
+            'File id cache stats: %s, hit ratio: %.1f%%',
+            file_id_cache.stats,
+            file_id_cache.stats.hit_ratio * 100,
+        )
+        file_id_cache.close()
+        get_dvr_catalog().close()
+
     def _start_nvr_services(self) -> None:
         """Start NVR services which replace per-camera services due the nature of the setup."""
         nvr_cameras = self.cam_registry.get_nvr_cameras()
@@ -72,6 +108,23 @@ class CameraBot(Client):
                 exception_message_args=(task_name,),
             )
 
+    def _start_dvr_retention(self) -> None:
+        """Start one retention manager for DVR storages of all cameras."""
+        dvr_cameras = [
+            cam
+            for cam in self.cam_registry.get_instances()
+            if cam.conf.livestream.dvr.enabled
+        ]
+        if not dvr_cameras:
+            return
+        create_task(
+            DvrRetentionManager(cams=dvr_cameras).run(),
+            task_name=DvrRetentionManager.__name__,
+            logger=self._log,
+            exception_message='Task "%s" raised an exception',
+            exception_message_args=(DvrRetentionManager.__name__,),
+        )
+
     async def run_forever(self) -> None:
         """That's how we roll."""
         while True:
@@ -93,12 +146,18 @@ class CameraBot(Client):
     async def send_alert_message(self, text: str, **kwargs) -> None:
         """Send message to alert users."""
         self._log.info('Sending message to alert users')
-        for user_id in self.alert_users:
-            await self._send_message(text, user_id, **kwargs)
+        await asyncio.gather(
+            *(
+                self._send_message(text, user_id, **kwargs)
+                for user_id in self.alert_users
+            )
+        )
 
     async def _send_message(self, text: str, user_id: int, **kwargs) -> None:
         try:
-            await self.send_message(user_id, text, **kwargs)
+            await get_telegram_sender().send(
+                user_id, partial(self.send_message, user_id, text, **kwargs)
+            )
         except Exception:
             self._log.exception(
                 'Failed to send message "%s" to user ID %s', text, user_id
@@ -0,0 +1,7 @@
+from hikcamerabot.clients.s3.auth import S3SigV4Auth
+from hikcamerabot.clients.s3.client import S3Client
+
+__all__ = [
+    'S3Client',
+    'S3SigV4Auth',
+]
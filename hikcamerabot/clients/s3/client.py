@@ -0,0 +1,263 @@
+"""S3-compatible object storage client module."""
+
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Final
+from urllib.parse import quote
+
+import httpx
+import xmltodict
+from tenacity import retry, stop_after_attempt, wait_fixed
+
+from hikcamerabot.clients.s3.auth import S3SigV4Auth
+from hikcamerabot.exceptions import S3RequestError
+
+_PART_RETRY_WAIT: Final[float] = 1.0
+_PART_RETRY_STOP_AFTER_ATTEMPT: Final[int] = 3
+
+
+class S3Client:
+    """Minimal S3 API client for uploading files, with path-style addressing.
+
+    Works with AWS S3 and S3-compatible storages like MinIO. Files larger than
+    part size are uploaded with multipart upload, several parts at once.
+    """
+
+    _TIMEOUT: Final[float] = 60.0
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        region: str,
+        access_key: str,
+        secret_key: str,
+        *,
+        verify_ssl: bool = True,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._endpoint_url = endpoint_url.rstrip('/')
+        self._session = httpx.AsyncClient(
+            auth=S3SigV4Auth(
+                access_key=access_key, secret_key=secret_key, region=region
+            ),
+            timeout=self._TIMEOUT,
+            transport=transport or httpx.AsyncHTTPTransport(verify=verify_ssl),
+        )
+
+    async def upload_file(
+        self,
+        bucket: str,
+        key: str,
+        path: Path,
+        *,
+        part_size: int,
+        max_concurrency: int,
+        content_type: str = 'application/octet-stream',
+    ) -> None:
+        size = (await asyncio.to_thread(path.stat)).st_size
+        if size <= part_size:
+            data, payload_hash = await asyncio.to_thread(self._read_part, path, 0, size)
+            await self.put_object(
+                bucket, key, data, payload_hash=payload_hash, content_type=content_type
+            )
+            return
+
+        upload_id = await self.create_multipart_upload(bucket, key, content_type)
+        try:
+            etags = await self._upload_parts(
+                bucket,
+                key,
+                upload_id,
+                path,
+                size=size,
+                part_size=part_size,
+                max_concurrency=max_concurrency,
+            )
+            await self.complete_multipart_upload(bucket, key, upload_id, etags)
+        except BaseException:
+            await self._abort_multipart_upload_quietly(bucket, key, upload_id)
+            raise
+
+    async def put_object(
+        self,
+        bucket: str,
+        key: str,
+        data: bytes,
+        *,
+        payload_hash: str,
+        content_type: str,
+    ) -> None:
+        await self._request(
+            'PUT',
+            bucket,
+            key,
+            content=data,
+            headers={
+                'Content-Type': content_type,
+                'x-amz-content-sha256': payload_hash,
+            },
+        )
+
+    async def create_multipart_upload(
+        self, bucket: str, key: str, content_type: str
+    ) -> str:
+        response = await self._request(
+            'POST',
+            bucket,
+            key,
+            query='uploads=',
+            headers={'Content-Type': content_type},
+        )
+        return self._parse_xml(response)['InitiateMultipartUploadResult']['UploadId']
+
+    @retry(
+        wait=wait_fixed(_PART_RETRY_WAIT),
+        stop=stop_after_attempt(_PART_RETRY_STOP_AFTER_ATTEMPT),
+        reraise=True,
+    )
+    async def upload_part(
+        self,
+        bucket: str,
+        key: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes,
+        *,
+        payload_hash: str,
+    ) -> str:
+        """Upload part and return its ETag."""
+        response = await self._request(
+            'PUT',
+            bucket,
+            key,
+            query=f'partNumber={part_number}&uploadId={quote(upload_id, safe="")}',
+            content=data,
+            headers={'x-amz-content-sha256': payload_hash},
+        )
+        return response.headers['ETag']
+
+    async def complete_multipart_upload(
+        self, bucket: str, key: str, upload_id: str, etags: list[str]
+    ) -> None:
+        body = xmltodict.unparse(
+            {
+                'CompleteMultipartUpload': {
+                    'Part': [
+                        {'PartNumber': part_number, 'ETag': etag}
+                        for part_number, etag in enumerate(etags, start=1)
+                    ]
+                }
+            }
+        )
+        response = await self._request(
+            'POST',
+            bucket,
+            key,
+            query=f'uploadId={quote(upload_id, safe="")}',
+            content=body.encode(),
+        )
+        # Completion may fail after 200 OK response was already sent.
+        if 'Error' in self._parse_xml(response):
+            raise S3RequestError(
+                f'Failed to complete multipart upload of "{key}": {response.text}'
+            )
+
+    async def abort_multipart_upload(
+        self, bucket: str, key: str, upload_id: str
+    ) -> None:
+        await self._request(
+            'DELETE', bucket, key, query=f'uploadId={quote(upload_id, safe="")}'
+        )
+
+    async def close(self) -> None:
+        await self._session.aclose()
+
+    async def _upload_parts(
+        self,
+        bucket: str,
+        key: str,
+        upload_id: str,
+        path: Path,
+        *,
+        size: int,
+        part_size: int,
+        max_concurrency: int,
+    ) -> list[str]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def upload_part(part_number: int, offset: int) -> str:
+            # Parts are read only when there's a free slot to keep memory usage
+            # within `part_size * max_concurrency`.
+            async with semaphore:
+                data, payload_hash = await asyncio.to_thread(
+                    self._read_part, path, offset, part_size
+                )
+                return await self.upload_part(
+                    bucket, key, upload_id, part_number, data, payload_hash=payload_hash
+                )
+
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                part_tasks = [
+                    task_group.create_task(upload_part(part_number, offset))
+                    for part_number, offset in enumerate(
+                        range(0, size, part_size), start=1
+                    )
+                ]
+        except ExceptionGroup as err:
+            # Other parts are cancelled, report the first failed one.
+            raise err.exceptions[0] from err
+        return [task.result() for task in part_tasks]
+
+    async def _abort_multipart_upload_quietly(
+        self, bucket: str, key: str, upload_id: str
+    ) -> None:
+        try:
+            await self.abort_multipart_upload(bucket, key, upload_id)
+        except Exception:
+            self._log.exception(
+                'Failed to abort multipart upload %s of "%s"', upload_id, key
+            )
+
+    async def _request(
+        self,
+        method: str,
+        bucket: str,
+        key: str,
+        *,
+        query: str = '',
+        content: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> httpx.Response:
+        url = f'{self._endpoint_url}/{quote(bucket)}/{quote(key)}'
+        if query:
+            url = f'{url}?{query}'
+        try:
+            response = await self._session.request(
+                method, url, content=content, headers=headers
+            )
+        except httpx.HTTPError as err:
+            raise S3RequestError(f'S3 request {method} {url} failed: {err}') from err
+        if httpx.codes.is_error(response.status_code):
+            raise S3RequestError(
+                f'S3 request {method} {url} failed with code '
+                f'{response.status_code}: {response.text}'
+            )
+        return response
+
+    @staticmethod
+    def _parse_xml(response: httpx.Response) -> dict:
+        try:
+            return xmltodict.parse(response.content)
+        except Exception as err:
+            raise S3RequestError(f'Invalid S3 response: {response.text}') from err
+
+    @staticmethod
+    def _read_part(path: Path, offset: int, size: int) -> tuple[bytes, str]:
+        with path.open('rb') as fd:
+            fd.seek(offset)
+            data = fd.read(size)
+        return data, hashlib.sha256(data).hexdigest()
@@ -66,6 +66,11 @@ def setup_commands() -> tuple[dict, dict[list[str] | str, Callable]]:
                 'icecast_off_{0}': cb.cmd_stream_icecast_off,
             },
         },
+        CmdSectionType.DVR: {
+            'commands': {
+                'dvr_clip_{0}': cb.cmd_dvr_clip,
+            },
+        },
     }
 
     global_cmds = {
@@ -74,6 +79,9 @@ def setup_commands() -> tuple[dict, dict[list[str] | str, Callable]]:
         'stop': cb.cmd_stop,
         'groups': cb.cmd_list_groups,
         'list_cams': cb.cmd_list_cams,
+        'dlq': cb.cmd_dlq,
+        'dlq_replay': cb.cmd_dlq_replay,
+        'dlq_discard': cb.cmd_dlq_discard,
         'version': cb.cmd_app_version,
         'ver': cb.cmd_app_version,
         'v': cb.cmd_app_version,
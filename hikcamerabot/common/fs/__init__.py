@@ -0,0 +1,13 @@
+from hikcamerabot.common.fs.watcher import (
+    AbstractDirectoryWatcher,
+    InotifyDirectoryWatcher,
+    PollingDirectoryWatcher,
+    create_directory_watcher,
+)
+
+__all__ = [
+    'AbstractDirectoryWatcher',
+    'InotifyDirectoryWatcher',
+    'PollingDirectoryWatcher',
+    'create_directory_watcher',
+]
@@ -0,0 +1,74 @@
+"""Minimal Linux inotify binding over libc."""
+
+import ctypes
+import ctypes.util
+import os
+import struct
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final
+
+IN_CLOSE_WRITE: Final[int] = 0x00000008
+IN_MOVED_TO: Final[int] = 0x00000080
+IN_Q_OVERFLOW: Final[int] = 0x00004000
+IN_IGNORED: Final[int] = 0x00008000
+
+_EVENT_HEADER: Final[struct.Struct] = struct.Struct('iIII')
+_READ_SIZE: Final[int] = 64 * 1024
+
+
+@dataclass(frozen=True)
+class InotifyEvent:
+    wd: int
+    mask: int
+    cookie: int
+    name: str
+
+
+class Inotify:
+    """Non-blocking inotify instance to be polled from the event loop."""
+
+    def __init__(self) -> None:
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError('libc is not found')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        try:
+            self._inotify_init1 = self._libc.inotify_init1
+            self._inotify_add_watch = self._libc.inotify_add_watch
+        except AttributeError as err:
+            raise OSError('inotify is not supported') from err
+
+        self.fd: int = self._call(self._inotify_init1, os.O_NONBLOCK | os.O_CLOEXEC)
+
+    def add_watch(self, path: Path, mask: int) -> int:
+        return self._call(self._inotify_add_watch, self.fd, os.fsencode(path), mask)
+
+    def read_events(self) -> Iterator[InotifyEvent]:
+        """Read all pending events without blocking."""
+        while True:
+            try:
+                data = os.read(self.fd, _READ_SIZE)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset : offset + name_len].rstrip(b'\0')
+                offset += name_len
+                yield InotifyEvent(
+                    wd=wd, mask=mask, cookie=cookie, name=os.fsdecode(name)
+                )
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+    @staticmethod
+    def _call(func: Callable[..., int], *args: object) -> int:
+        result = func(*args)
+        if result < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        return result
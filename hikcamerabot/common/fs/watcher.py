@@ -0,0 +1,159 @@
+"""Watchers of files completely written to a directory."""
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from pathlib import Path
+
+from hikcamerabot.common.fs.inotify import (
+    IN_CLOSE_WRITE,
+    IN_IGNORED,
+    IN_MOVED_TO,
+    IN_Q_OVERFLOW,
+    Inotify,
+)
+
+type FilterFunc = Callable[[str], bool]
+
+
+class AbstractDirectoryWatcher(ABC):
+    """Watch directory for files which are completely written.
+
+    With `sequential` files passing `filter_func` are considered a sequence of
+    segments written one after another, with names sorted in order they were
+    written. Otherwise files are expected to be replaced atomically, and every
+    new version of a file is returned.
+    """
+
+    # File not modified for this many seconds is considered complete.
+    SETTLE_TIME: int = 30
+
+    def __init__(
+        self, path: Path, filter_func: FilterFunc, *, sequential: bool = True
+    ) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._path = path
+        self._filter_func = filter_func
+        self._sequential = sequential
+        # Returned file names with their versions: modification time of
+        # atomically replaced files, 0 for sequential ones which never change.
+        self._emitted: dict[str, int] = {}
+
+    @abstractmethod
+    async def get(self) -> list[str]:
+        """Wait for completed files and return their names."""
+
+    def close(self) -> None:  # noqa: B027
+        pass
+
+    async def scan(self) -> list[str]:
+        """Find completed files which were not returned before."""
+        completed = await asyncio.to_thread(self._find_completed)
+        self._emitted = {
+            name: version
+            for name, version in self._emitted.items()
+            if name in completed
+        }
+        new_files = [
+            name
+            for name, version in completed.items()
+            if self._emitted.get(name) != version
+        ]
+        self._emitted.update(completed)
+        return new_files
+
+    def _find_completed(self) -> dict[str, int]:
+        files = sorted(
+            path.name for path in self._path.iterdir() if self._filter_func(path.name)
+        )
+        if not self._sequential:
+            return {name: mtime for name in files if (mtime := self._get_mtime(name))}
+        if not files:
+            return {}
+        # Only the last file can still be written.
+        completed = dict.fromkeys(files[:-1], 0)
+        last_file = files[-1]
+        mtime = self._get_mtime(last_file)
+        if mtime and time.time_ns() - mtime >= self.SETTLE_TIME * 1_000_000_000:
+            completed[last_file] = 0
+        return completed
+
+    def _get_mtime(self, name: str) -> int | None:
+        try:
+            return (self._path / name).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+
+class PollingDirectoryWatcher(AbstractDirectoryWatcher):
+    """Rescan directory periodically."""
+
+    POLL_INTERVAL: int = 5
+
+    async def get(self) -> list[str]:
+        while True:
+            if files := await self.scan():
+                return files
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+
+class InotifyDirectoryWatcher(AbstractDirectoryWatcher):
+    """Get closed and moved in files from inotify as soon as they are written.
+
+    Files completed before watcher start are found by directory scan.
+    """
+
+    def __init__(
+        self, path: Path, filter_func: FilterFunc, *, sequential: bool = True
+    ) -> None:
+        super().__init__(path, filter_func, sequential=sequential)
+        self._inotify = Inotify()
+        try:
+            self._inotify.add_watch(path, IN_CLOSE_WRITE | IN_MOVED_TO)
+        except OSError:
+            self._inotify.close()
+            raise
+        self._queue: asyncio.Queue[str | None] = asyncio.Queue()
+        asyncio.get_running_loop().add_reader(self._inotify.fd, self._read_events)
+        # Look for files completed before the watch was added.
+        self._queue.put_nowait(None)
+
+    async def get(self) -> list[str]:
+        names = [await self._queue.get()]
+        while not self._queue.empty():
+            names.append(self._queue.get_nowait())
+        files = {name for name in names if name is not None}
+        if len(files) < len(names):
+            files.update(await self.scan())
+        if self._sequential:
+            self._emitted.update(dict.fromkeys(files, 0))
+        return sorted(files)
+
+    def close(self) -> None:
+        asyncio.get_running_loop().remove_reader(self._inotify.fd)
+        self._inotify.close()
+
+    def _read_events(self) -> None:
+        for event in self._inotify.read_events():
+            if event.mask & IN_Q_OVERFLOW:
+                self._log.warning('Inotify queue overflow for %s, rescan', self._path)
+                self._queue.put_nowait(None)
+            elif event.mask & IN_IGNORED:
+                self._log.error('Directory %s is not watched anymore', self._path)
+            elif self._filter_func(event.name):
+                self._queue.put_nowait(event.name)
+
+
+def create_directory_watcher(
+    path: Path, filter_func: FilterFunc, *, sequential: bool = True
+) -> AbstractDirectoryWatcher:
+    """Create inotify watcher or polling one when inotify is not available."""
+    try:
+        return InotifyDirectoryWatcher(path, filter_func, sequential=sequential)
+    except OSError as err:
+        logging.getLogger(__name__).warning(
+            'Inotify is not available for %s, falling back to polling: %s', path, err
+        )
+        return PollingDirectoryWatcher(path, filter_func, sequential=sequential)
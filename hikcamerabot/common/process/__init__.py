@@ -0,0 +1,11 @@
+from hikcamerabot.common.process.supervisor import (
+    ProcessResult,
+    ProcessSupervisor,
+    get_process_supervisor,
+)
+
+__all__ = [
+    'ProcessResult',
+    'ProcessSupervisor',
+    'get_process_supervisor',
+]
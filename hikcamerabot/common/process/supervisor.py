@@ -0,0 +1,309 @@
+"""Subprocess supervisor module."""
+
+import asyncio
+import logging
+import os
+import shlex
+import signal
+import time
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from itertools import count
+from pathlib import Path
+from typing import TYPE_CHECKING, ClassVar, Final
+
+from hikcamerabot.config.config import main_conf
+from hikcamerabot.enums import IoniceClass, ProcessKind
+from hikcamerabot.exceptions import ProcessSupervisorError
+from hikcamerabot.utils.process import kill_proc
+from hikcamerabot.utils.shared import Singleton
+from hikcamerabot.utils.task import create_task
+
+if TYPE_CHECKING:
+    from hikcamerabot.config.schemas.main_config import ProcessPoolSchema
+
+_CLK_TCK: Final[int] = os.sysconf('SC_CLK_TCK')
+_PAGE_SIZE: Final[int] = os.sysconf('SC_PAGE_SIZE')
+_PROC_FS: Final[Path] = Path('/proc')
+
+
+@dataclass
+class ProcessJobStats:
+    """Resource usage of one supervised process."""
+
+    job_id: int
+    kind: ProcessKind
+    cmd: str
+    pid: int | None = None
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+    returncode: int | None = None
+    cpu_time: float = 0.0
+    max_rss: int = 0
+    killed: bool = False
+
+    @property
+    def wall_time(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+
+@dataclass
+class ProcessResult:
+    returncode: int
+    stdout: str
+    stderr: str
+    stats: ProcessJobStats
+
+
+class ProcessSupervisor(metaclass=Singleton):
+    """Run ffmpeg-like subprocesses within per-kind concurrency pools.
+
+    Every process is started in its own session with pool's nice/ionice
+    priorities, its CPU time and RSS are sampled from procfs while it runs.
+    """
+
+    _STATS_SAMPLE_INTERVAL: float = 1.0
+    _SPAWN_WAIT_TIMEOUT: float = 30.0
+    _FINISHED_JOBS_HISTORY: int = 100
+
+    _IONICE_CLASS_MAP: ClassVar[dict[IoniceClass, int]] = {
+        IoniceClass.REALTIME: 1,
+        IoniceClass.BEST_EFFORT: 2,
+        IoniceClass.IDLE: 3,
+    }
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._conf = main_conf.process_pools
+        self._pools: dict[ProcessKind, asyncio.Semaphore] = {
+            kind: asyncio.Semaphore(
+                self._conf.get_pool_conf_by_kind(kind).max_concurrent
+            )
+            for kind in ProcessKind
+        }
+        self._job_counter = count(1)
+        self._live_jobs: dict[int, ProcessJobStats] = {}
+        self._finished_jobs: deque[ProcessJobStats] = deque(
+            maxlen=self._FINISHED_JOBS_HISTORY
+        )
+
+    async def run(
+        self,
+        kind: ProcessKind,
+        cmd: Sequence[str],
+        stdout: int | None = asyncio.subprocess.PIPE,
+        stderr: int | None = asyncio.subprocess.PIPE,
+    ) -> ProcessResult | None:
+        """Run process to completion.
+
+        Return `None` when the process failed to start. Bound the run with
+        `asyncio.timeout()` at the call site: the process is killed and reaped
+        when the awaiting task is cancelled.
+        """
+        async with self._pools[kind]:
+            try:
+                proc, stats = await self._start(kind, cmd, stdout, stderr)
+            except OSError:
+                self._log.exception('Failed to start process "%s"', shlex.join(cmd))
+                return None
+            monitor_task = self._start_monitor_task(proc, stats)
+            try:
+                out, err = await proc.communicate()
+            except asyncio.CancelledError:
+                self._log.warning('Process "%s" was cancelled, killing it', stats.cmd)
+                stats.killed = True
+                await self._kill(proc)
+                raise
+            finally:
+                monitor_task.cancel()
+                self._finalize(proc, stats)
+
+        return ProcessResult(
+            # Process has already exited, `wait()` just returns its exit code.
+            returncode=await proc.wait(),
+            stdout=out.decode().strip() if out else '',
+            stderr=err.decode().strip() if err else '',
+            stats=stats,
+        )
+
+    async def spawn(
+        self,
+        kind: ProcessKind,
+        cmd: Sequence[str],
+        stdout: int | None = asyncio.subprocess.PIPE,
+        stderr: int | None = asyncio.subprocess.STDOUT,
+    ) -> asyncio.subprocess.Process:
+        """Start long-running process which keeps its pool slot until exit.
+
+        Raise `ProcessSupervisorError` when no pool slot gets free in time.
+        """
+        pool = self._pools[kind]
+        if pool.locked():
+            self._log.warning(
+                'No free "%s" process slots, waiting to start "%s"',
+                kind.value,
+                shlex.join(cmd),
+            )
+        try:
+            async with asyncio.timeout(self._SPAWN_WAIT_TIMEOUT):
+                await pool.acquire()
+        except TimeoutError:
+            raise ProcessSupervisorError(
+                f'No free "{kind.value}" process slots in {self._SPAWN_WAIT_TIMEOUT}s '
+                f'to start "{shlex.join(cmd)}", increase pool max_concurrent'
+            ) from None
+        try:
+            proc, stats = await self._start(kind, cmd, stdout, stderr)
+        except Exception:
+            pool.release()
+            raise
+
+        monitor_task = self._start_monitor_task(proc, stats)
+
+        async def _release_on_exit() -> None:
+            try:
+                await proc.wait()
+            finally:
+                monitor_task.cancel()
+                self._finalize(proc, stats)
+                pool.release()
+
+        create_task(
+            _release_on_exit(),
+            task_name=f'{self.__class__.__name__}_{stats.job_id}_waiter',
+            logger=self._log,
+        )
+        return proc
+
+    def get_live_jobs(self) -> list[ProcessJobStats]:
+        return list(self._live_jobs.values())
+
+    def get_finished_jobs(self) -> list[ProcessJobStats]:
+        return list(self._finished_jobs)
+
+    def get_pool_usage(self) -> dict[ProcessKind, tuple[int, int]]:
+        """Return running processes count and pool size per process kind."""
+        usage: dict[ProcessKind, tuple[int, int]] = {}
+        for kind in ProcessKind:
+            running = sum(1 for job in self._live_jobs.values() if job.kind is kind)
+            usage[kind] = (
+                running,
+                self._conf.get_pool_conf_by_kind(kind).max_concurrent,
+            )
+        return usage
+
+    async def _start(
+        self,
+        kind: ProcessKind,
+        cmd: Sequence[str],
+        stdout: int | None,
+        stderr: int | None,
+    ) -> tuple[asyncio.subprocess.Process, ProcessJobStats]:
+        full_cmd = self._apply_priority(cmd, self._conf.get_pool_conf_by_kind(kind))
+        stats = ProcessJobStats(
+            job_id=next(self._job_counter), kind=kind, cmd=shlex.join(full_cmd)
+        )
+        self._log.debug(
+            'Starting "%s" process #%d: "%s"', kind.value, stats.job_id, stats.cmd
+        )
+        proc = await asyncio.create_subprocess_exec(
+            *full_cmd, stdout=stdout, stderr=stderr, start_new_session=True
+        )
+        stats.pid = proc.pid
+        self._live_jobs[stats.job_id] = stats
+        return proc, stats
+
+    def _apply_priority(
+        self, cmd: Sequence[str], pool_conf: 'ProcessPoolSchema'
+    ) -> list[str]:
+        prefix: list[str] = []
+        if pool_conf.nice_value is not None:
+            prefix.extend(('nice', '-n', str(pool_conf.nice_value)))
+        if pool_conf.ionice_class is not None:
+            prefix.extend(
+                ('ionice', '-c', str(self._IONICE_CLASS_MAP[pool_conf.ionice_class]))
+            )
+            if (
+                pool_conf.ionice_level is not None
+                and pool_conf.ionice_class is not IoniceClass.IDLE
+            ):
+                prefix.extend(('-n', str(pool_conf.ionice_level)))
+        return [*prefix, *cmd]
+
+    def _start_monitor_task(
+        self, proc: asyncio.subprocess.Process, stats: ProcessJobStats
+    ) -> asyncio.Task:
+        return create_task(
+            self._monitor(proc, stats),
+            task_name=f'{self.__class__.__name__}_{stats.job_id}_monitor',
+            logger=self._log,
+        )
+
+    async def _monitor(
+        self, proc: asyncio.subprocess.Process, stats: ProcessJobStats
+    ) -> None:
+        while proc.returncode is None:
+            self._sample_usage(stats)
+            await asyncio.sleep(self._STATS_SAMPLE_INTERVAL)
+
+    def _sample_usage(self, stats: ProcessJobStats) -> None:
+        """Read CPU time and RSS of the process tree from procfs if available."""
+        if stats.pid is None:
+            return
+        cpu_ticks = rss_pages = 0
+        for pid in self._get_process_tree(stats.pid):
+            try:
+                stat = (_PROC_FS / str(pid) / 'stat').read_text()
+            except OSError:
+                continue
+            # Skip "pid (comm)" part since command name may contain spaces.
+            fields = stat[stat.rfind(')') + 2 :].split()
+            # utime, stime, cutime, cstime.
+            cpu_ticks += sum(int(value) for value in fields[11:15])
+            rss_pages += int(fields[21])
+        if cpu_ticks:
+            stats.cpu_time = max(stats.cpu_time, cpu_ticks / _CLK_TCK)
+        stats.max_rss = max(stats.max_rss, rss_pages * _PAGE_SIZE)
+
+    def _get_process_tree(self, pid: int) -> list[int]:
+        """Return pid with its descendants, e.g. ffmpeg started by `nice`."""
+        pids = [pid]
+        for pid_ in pids:
+            try:
+                children = (
+                    _PROC_FS / str(pid_) / 'task' / str(pid_) / 'children'
+                ).read_text()
+            except OSError:
+                continue
+            pids.extend(int(child) for child in children.split())
+        return pids
+
+    async def _kill(self, proc: asyncio.subprocess.Process) -> None:
+        """Kill process group and reap the process."""
+        await kill_proc(process=proc, signal_=signal.SIGKILL, reraise=False)
+        await proc.wait()
+
+    def _finalize(
+        self, proc: asyncio.subprocess.Process, stats: ProcessJobStats
+    ) -> None:
+        if stats.finished_at is not None:
+            return
+        stats.finished_at = time.monotonic()
+        stats.returncode = proc.returncode
+        self._live_jobs.pop(stats.job_id, None)
+        self._finished_jobs.append(stats)
+        self._log.debug(
+            'Process "%s" #%d finished: returncode %s, wall %.2fs, cpu %.2fs, '
+            'max rss %d bytes',
+            stats.kind.value,
+            stats.job_id,
+            stats.returncode,
+            stats.wall_time,
+            stats.cpu_time,
+            stats.max_rss,
+        )
+
+
+def get_process_supervisor() -> ProcessSupervisor:
+    return ProcessSupervisor()
@@ -0,0 +1,34 @@
+from hikcamerabot.common.telegram.captions import CameraCaptions
+from hikcamerabot.common.telegram.fanout import MediaFanOut, RecipientDelivery
+from hikcamerabot.common.telegram.file_cache import (
+    CacheableMedia,
+    FileIdCacheStats,
+    TelegramFileIdCache,
+    get_file_id_cache,
+)
+from hikcamerabot.common.telegram.sender import (
+    TelegramSender,
+    TelegramSenderStats,
+    get_telegram_sender,
+)
+from hikcamerabot.common.telegram.upload import (
+    UploadService,
+    UploadStats,
+    get_upload_service,
+)
+
+__all__ = [
+    'CacheableMedia',
+    'CameraCaptions',
+    'FileIdCacheStats',
+    'MediaFanOut',
+    'RecipientDelivery',
+    'TelegramFileIdCache',
+    'TelegramSender',
+    'TelegramSenderStats',
+    'UploadService',
+    'UploadStats',
+    'get_file_id_cache',
+    'get_telegram_sender',
+    'get_upload_service',
+]
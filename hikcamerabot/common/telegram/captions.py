@@ -0,0 +1,123 @@
+"""Precompiled per-camera message and caption templates."""
+
+import time
+from dataclasses import dataclass
+from typing import Final, Self
+
+from emoji import emojize
+
+from hikcamerabot.constants import DETECTION_SWITCH_MAP
+from hikcamerabot.enums import DetectionType
+from hikcamerabot.utils.shared import bold
+
+_ROTATING_LIGHT: Final[str] = emojize(':rotating_light:', language='alias')
+
+
+def _escape(text: str) -> str:
+    """Escape static text to be a part of `str.format` template."""
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+@dataclass(frozen=True)
+class CameraCaptions:
+    """Camera captions with static parts rendered once.
+
+    Templates are `str.format` strings, only dynamic fields like date, count
+    and size are filled at send time.
+    """
+
+    alert_text: dict[DetectionType, str]
+    alert_video: str
+    alert_snapshot_line_tpl: dict[DetectionType, str]
+    alert_snapshot_footer: str
+    video_tpl: str
+    snapshot_tpl: str
+    dvr_video: str
+    dvr_alert_video_tpl: str
+    dvr_contact_sheet_tpl: str
+
+    @classmethod
+    def build(cls, cam_id: str, description: str, hashtag: str) -> Self:
+        cam_id_, description_, hashtag_ = (
+            _escape(cam_id),
+            _escape(description),
+            _escape(hashtag),
+        )
+        commands = f'/cmds_{cam_id}, /list_cams'
+        commands_ = _escape(commands)
+        detection_names = {
+            type_: DETECTION_SWITCH_MAP[type_]['name'].value for type_ in DetectionType
+        }
+        return cls(
+            alert_text={
+                type_: (
+                    f'{_ROTATING_LIGHT} '
+                    + bold(f'Alert on "{cam_id} - {description}": {name}')
+                )
+                for type_, name in detection_names.items()
+            },
+            alert_video=(
+                f'{_ROTATING_LIGHT} Alert video from {description} {hashtag}\n'
+                f'{commands}'
+            ),
+            alert_snapshot_line_tpl={
+                type_: (
+                    f'[{description_}] {_escape(name)} on {{date}} '
+                    f'(alert #{{alert_count}}) {hashtag_}'
+                )
+                for type_, name in detection_names.items()
+            },
+            alert_snapshot_footer=commands,
+            video_tpl=(
+                f'📷 {bold("Camera:")} [{cam_id_}] {description_}\n'
+                f'🗓️ {bold("Date:")} {{date}}\n'
+                f'#️⃣ {bold("Hashtag:")} {hashtag_}\n'
+                f'📏 {bold("Size:")} {{size}}\n'
+                f'🤖 {bold("Commands:")} {commands_}'
+            ),
+            snapshot_tpl=(
+                f'📷 {bold("Camera:")} [{cam_id_}] {description_}\n'
+                f'🗓️ {bold("Date:")} {{date}}\n'
+                f'#️⃣ {bold("Hashtag:")} {hashtag_}\n'
+                f'🔢 {bold("Count:")} {{count}}\n'
+                f'📏 {bold("Size:")} {{size}}\n'
+                f'🤖 {bold("Commands:")} {commands_}'
+            ),
+            dvr_video=f'Video from {description} {hashtag}',
+            dvr_alert_video_tpl=(
+                f'{_ROTATING_LIGHT} Video with alerts from {description_} {hashtag_} '
+                '#alert\nAlerts at {offsets}'
+            ),
+            dvr_contact_sheet_tpl=(
+                f'Contact sheet of {{filename}} from {description_} {hashtag_}'
+            ),
+        )
+
+    def alert_snapshot_line(
+        self, detection_type: DetectionType, date: str, alert_count: int
+    ) -> str:
+        return self.alert_snapshot_line_tpl[detection_type].format(
+            date=date, alert_count=alert_count
+        )
+
+    def alert_snapshot(
+        self, detection_type: DetectionType, date: str, alert_count: int
+    ) -> str:
+        line = self.alert_snapshot_line(detection_type, date, alert_count)
+        return f'{line}\n{self.alert_snapshot_footer}'
+
+    def video(self, date: str, size: str) -> str:
+        return self.video_tpl.format(date=date, size=size)
+
+    def snapshot(self, date: str, count: int, size: str) -> str:
+        return self.snapshot_tpl.format(date=date, count=count, size=size)
+
+    def dvr_alert_video(self, alert_offsets: list[float]) -> str:
+        """Video caption with alert times from the video start."""
+        offsets = ', '.join(
+            time.strftime('%H:%M:%S', time.gmtime(offset)) for offset in alert_offsets
+        )
+        return self.dvr_alert_video_tpl.format(offsets=offsets)
+
+    def dvr_contact_sheet(self, filename: str) -> str:
+        return self.dvr_contact_sheet_tpl.format(filename=filename)
@@ -0,0 +1,108 @@
+"""Media fan-out to multiple Telegram chats."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+
+type SendMediaFunc[T, R] = Callable[[int, T], Awaitable[R | None]]
+# Make media from the send result which can be sent again without upload,
+# e.g. file id of the uploaded photo.
+type GetReusableMediaFunc[T, R] = Callable[[R], T | None]
+
+
+@dataclass
+class RecipientDelivery:
+    """Delivery result of one recipient, latency is counted from fan-out start."""
+
+    chat_id: int
+    latency: float
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class MediaFanOut:
+    """Upload media once and send its file id to the other chats concurrently.
+
+    Chats are tried one by one until the media is uploaded, then the rest get
+    the uploaded media by file id within a concurrency limit. Telegram limits
+    how many messages a bot can send per second, so the limit is kept below it.
+    """
+
+    MAX_CONCURRENT_SENDS: int = 10
+
+    def __init__(self, max_concurrent_sends: int = MAX_CONCURRENT_SENDS) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._max_concurrent_sends = max_concurrent_sends
+
+    async def send[T, R](
+        self,
+        chat_ids: Iterable[int],
+        media: T,
+        send_func: SendMediaFunc[T, R],
+        get_reusable_media: GetReusableMediaFunc[T, R],
+    ) -> list[RecipientDelivery]:
+        started_at = time.monotonic()
+        pending_chat_ids = list(chat_ids)
+        deliveries: list[RecipientDelivery] = []
+        reusable_media: T | None = None
+
+        while pending_chat_ids and reusable_media is None:
+            chat_id = pending_chat_ids.pop(0)
+            delivery, result = await self._send_one(
+                chat_id, media, send_func, started_at
+            )
+            deliveries.append(delivery)
+            if result:
+                reusable_media = get_reusable_media(result)
+
+        semaphore = asyncio.Semaphore(self._max_concurrent_sends)
+
+        async def send_reusable(chat_id_: int, media_: T) -> RecipientDelivery:
+            async with semaphore:
+                delivery_, _ = await self._send_one(
+                    chat_id_, media_, send_func, started_at
+                )
+                return delivery_
+
+        if reusable_media is not None:
+            deliveries.extend(
+                await asyncio.gather(
+                    *(send_reusable(uid, reusable_media) for uid in pending_chat_ids)
+                )
+            )
+        self._log_deliveries(deliveries)
+        return deliveries
+
+    async def _send_one[T, R](
+        self,
+        chat_id: int,
+        media: T,
+        send_func: SendMediaFunc[T, R],
+        started_at: float,
+    ) -> tuple[RecipientDelivery, R | None]:
+        result: R | None = None
+        error: Exception | None = None
+        try:
+            result = await send_func(chat_id, media)
+        except Exception as err:
+            self._log.exception('Failed to send media to chat %s', chat_id)
+            error = err
+        delivery = RecipientDelivery(
+            chat_id=chat_id, latency=time.monotonic() - started_at, error=error
+        )
+        return delivery, result
+
+    def _log_deliveries(self, deliveries: list[RecipientDelivery]) -> None:
+        self._log.info(
+            'Media sent to %d of %d chats. Latency per chat: %s',
+            sum(delivery.ok for delivery in deliveries),
+            len(deliveries),
+            ', '.join(
+                f'{delivery.chat_id}={delivery.latency:.2f}s' for delivery in deliveries
+            ),
+        )
@@ -0,0 +1,185 @@
+"""Persistent cache of Telegram file ids of already uploaded media."""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Final
+
+from pyrogram.errors import BadRequest
+from pyrogram.types import Message
+
+from hikcamerabot.config.config import main_conf
+from hikcamerabot.enums import TelegramMediaType
+from hikcamerabot.utils.shared import Singleton
+
+type CacheableMedia = Path | BytesIO | str
+type SendCacheableMediaFunc = Callable[[CacheableMedia], Awaitable[Message | None]]
+
+
+@dataclass
+class FileIdCacheStats:
+    hits: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TelegramFileIdCache(metaclass=Singleton):
+    """LRU cache of Telegram file ids of uploaded media.
+
+    In-memory media like snapshots is keyed by content hash. Files are keyed
+    by path, size and modification time, so recordings are not read twice
+    just to be hashed. File ids are stored in sqlite database so media
+    already uploaded before restart is not uploaded again. Same content has
+    different file ids when sent as different media types, so the type is a
+    part of the key.
+    """
+
+    _SCHEMA: Final[str] = (
+        'CREATE TABLE IF NOT EXISTS file_ids ('
+        'media_key TEXT NOT NULL, '
+        'media_type TEXT NOT NULL, '
+        'file_id TEXT NOT NULL, '
+        'size INTEGER NOT NULL, '
+        'last_used REAL NOT NULL, '
+        'PRIMARY KEY (media_key, media_type))'
+    )
+    _LAST_USED_INDEX: Final[str] = (
+        'CREATE INDEX IF NOT EXISTS file_ids_last_used ON file_ids (last_used)'
+    )
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._conf = main_conf.outbound.file_id_cache
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        self.stats = FileIdCacheStats()
+
+    async def send(
+        self,
+        media: CacheableMedia,
+        media_type: TelegramMediaType,
+        send_func: SendCacheableMediaFunc,
+    ) -> Message | None:
+        """Send media by cached file id if it was uploaded before, else upload it.
+
+        String media is a file id or URL and is sent as is.
+        """
+        if not self._conf.enabled or isinstance(media, str):
+            return await send_func(media)
+
+        media_key, size = await asyncio.to_thread(self._make_media_key, media)
+        if file_id := await asyncio.to_thread(self._get, media_key, media_type):
+            try:
+                message = await send_func(file_id)
+            except BadRequest:
+                self._log.warning(
+                    'Cached file id of %s %s is rejected, uploading again',
+                    media_type.value,
+                    media_key,
+                )
+                await asyncio.to_thread(self._delete, media_key, media_type)
+            else:
+                self.stats.hits += 1
+                self.stats.bytes_saved += size
+                return message
+
+        self.stats.misses += 1
+        message = await send_func(media)
+        if message and (uploaded := getattr(message, media_type.value, None)):
+            await asyncio.to_thread(
+                self._put, media_key, media_type, uploaded.file_id, size
+            )
+        return message
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db:
+                self._db.close()
+                self._db = None
+
+    def _get(self, media_key: str, media_type: TelegramMediaType) -> str | None:
+        with self._db_lock:
+            db = self._get_db()
+            row = db.execute(
+                'SELECT file_id FROM file_ids WHERE media_key = ? AND media_type = ?',
+                (media_key, media_type.value),
+            ).fetchone()
+            if not row:
+                return None
+            db.execute(
+                'UPDATE file_ids SET last_used = ? '
+                'WHERE media_key = ? AND media_type = ?',
+                (time.time(), media_key, media_type.value),
+            )
+            db.commit()
+            return row[0]
+
+    def _put(
+        self,
+        media_key: str,
+        media_type: TelegramMediaType,
+        file_id: str,
+        size: int,
+    ) -> None:
+        with self._db_lock:
+            db = self._get_db()
+            db.execute(
+                'INSERT OR REPLACE INTO file_ids '
+                '(media_key, media_type, file_id, size, last_used) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (media_key, media_type.value, file_id, size, time.time()),
+            )
+            # Evict least recently used entries over the limit.
+            db.execute(
+                'DELETE FROM file_ids WHERE rowid IN ('
+                'SELECT rowid FROM file_ids ORDER BY last_used DESC '
+                'LIMIT -1 OFFSET ?)',
+                (self._conf.max_entries,),
+            )
+            db.commit()
+
+    def _delete(self, media_key: str, media_type: TelegramMediaType) -> None:
+        with self._db_lock:
+            db = self._get_db()
+            db.execute(
+                'DELETE FROM file_ids WHERE media_key = ? AND media_type = ?',
+                (media_key, media_type.value),
+            )
+            db.commit()
+
+    def _get_db(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._conf.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self._conf.path, check_same_thread=False)
+            self._db.execute(self._SCHEMA)
+            self._db.execute(self._LAST_USED_INDEX)
+            self._db.commit()
+        return self._db
+
+    @staticmethod
+    def _make_media_key(media: Path | BytesIO) -> tuple[str, int]:
+        """Return cache key and size of media."""
+        if isinstance(media, BytesIO):
+            buffer = media.getbuffer()
+            try:
+                return hashlib.blake2b(buffer).hexdigest(), buffer.nbytes
+            finally:
+                buffer.release()
+        stat = media.stat()
+        return f'{media.resolve()}:{stat.st_size}:{stat.st_mtime_ns}', stat.st_size
+
+
+def get_file_id_cache() -> TelegramFileIdCache:
+    return TelegramFileIdCache()
@@ -0,0 +1,131 @@
+"""Rate limited Telegram send scheduler."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import cast
+
+from pyrogram.errors import FloodWait
+
+from hikcamerabot.config.config import main_conf
+from hikcamerabot.utils.shared import Singleton
+
+
+@dataclass
+class TokenBucket:
+    """Token bucket where tokens are reserved ahead, so waiters are served FIFO."""
+
+    rate: float
+    capacity: float
+    tokens: float = field(init=False)
+    updated_at: float = field(init=False, default_factory=time.monotonic)
+    blocked_until: float = 0.0
+
+    def __post_init__(self) -> None:
+        self.tokens = self.capacity
+
+    def reserve(self) -> float:
+        """Take one token and return how many seconds to wait until it's usable."""
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+        self.tokens -= 1
+        token_wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(token_wait, self.blocked_until - now)
+
+    def block(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+@dataclass
+class TelegramSenderStats:
+    """Send scheduler counters, time values are in seconds."""
+
+    sent: int = 0
+    throttled: int = 0
+    throttle_time: float = 0.0
+    flood_waits: int = 0
+    flood_wait_time: float = 0.0
+
+
+class TelegramSender(metaclass=Singleton):
+    """Schedule Telegram sends within Bot API rate limits.
+
+    Each send reserves a token from the global bucket and the chat bucket,
+    which is slower for groups. Tokens are reserved ahead, so sends to one
+    chat start in order without holding a lock over API calls. On FloodWait
+    the chat is paused for the returned duration and the send is retried
+    after the sends already scheduled for the chat.
+    """
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._conf = main_conf.outbound.rate_limits
+        self._global_bucket = TokenBucket(
+            rate=self._conf.global_per_second,
+            capacity=self._conf.global_per_second,
+        )
+        self._chat_buckets: dict[int, TokenBucket] = {}
+        self.stats = TelegramSenderStats()
+
+    async def send[T](self, chat_id: int, send_func: Callable[[], Awaitable[T]]) -> T:
+        """Call `send_func` sending one message to `chat_id` when rate allows.
+
+        `send_func` should only call the API, media is better uploaded before
+        so a slow upload doesn't take the rate of other sends.
+        """
+        flood_waits = 0
+        while True:
+            await self._wait_for_tokens(chat_id)
+            try:
+                result = await send_func()
+            except FloodWait as err:
+                flood_waits += 1
+                self._handle_flood_wait(chat_id, err)
+                if flood_waits > self._conf.max_flood_wait_retries:
+                    raise
+                continue
+            self.stats.sent += 1
+            return result
+
+    async def _wait_for_tokens(self, chat_id: int) -> None:
+        # Both tokens are reserved before sleeping, so a paused chat doesn't
+        # hold global tokens of other chats.
+        delay = max(
+            self._global_bucket.reserve(), self._get_chat_bucket(chat_id).reserve()
+        )
+        if delay > 0:
+            self.stats.throttled += 1
+            self.stats.throttle_time += delay
+            await asyncio.sleep(delay)
+
+    def _handle_flood_wait(self, chat_id: int, err: FloodWait) -> None:
+        # FloodWait value is always the number of seconds to wait.
+        flood_wait = cast('int', err.value)
+        self.stats.flood_waits += 1
+        self.stats.flood_wait_time += flood_wait
+        self._log.warning(
+            'Telegram FloodWait for chat %s, pausing it for %ss', chat_id, flood_wait
+        )
+        self._get_chat_bucket(chat_id).block(flood_wait)
+
+    def _get_chat_bucket(self, chat_id: int) -> TokenBucket:
+        try:
+            return self._chat_buckets[chat_id]
+        except KeyError:
+            # Negative ids belong to groups and channels.
+            rate = (
+                self._conf.group_per_minute / 60
+                if chat_id < 0
+                else self._conf.chat_per_second
+            )
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate=rate, capacity=1)
+            return bucket
+
+
+def get_telegram_sender() -> TelegramSender:
+    return TelegramSender()
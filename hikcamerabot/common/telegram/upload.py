@@ -0,0 +1,166 @@
+"""Telegram file upload service."""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
+from dataclasses import dataclass, field
+from itertools import count
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from hikcamerabot.config.config import main_conf
+from hikcamerabot.utils.file import format_bytes
+from hikcamerabot.utils.shared import Singleton
+
+if TYPE_CHECKING:
+    from pyrogram import Client
+    from pyrogram.raw.base import InputFile
+
+type ProgressFunc = Callable[[int, int], Awaitable[None]]
+
+
+@dataclass
+class UploadStats:
+    """Progress of one upload, time values are in seconds."""
+
+    upload_id: int
+    path: Path
+    size: int
+    uploaded: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+    failed: bool = False
+
+    @property
+    def duration(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def rate(self) -> float:
+        """Upload rate in bytes per second."""
+        return self.uploaded / self.duration if self.duration else 0.0
+
+
+class UploadService(metaclass=Singleton):
+    """Upload local files to Telegram with read-ahead and progress tracking.
+
+    Files are uploaded before the message is sent, so uploads don't run under
+    the send rate limiter and a send retried on FloodWait doesn't upload the
+    file again. Sending the file by its path within `upload()` context takes
+    the uploaded file, see `CameraBot.save_file()`.
+
+    pyrogram reads files in 512 KiB parts right in the event loop, so pages
+    ahead of the current part are requested from the kernel in background and
+    already uploaded pages are dropped from page cache. Large files are
+    uploaded one at a time within own limit, so they don't take all workers
+    and bandwidth from alert videos.
+    """
+
+    _FINISHED_UPLOADS_HISTORY: int = 100
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._conf = main_conf.outbound.upload
+        self._large_uploads = asyncio.Semaphore(self._conf.max_large_uploads)
+        self._upload_ids = count(1)
+        self._active: dict[int, UploadStats] = {}
+        self._finished: deque[UploadStats] = deque(
+            maxlen=self._FINISHED_UPLOADS_HISTORY
+        )
+        # Uploaded files by path, waiting to be sent.
+        self._uploaded: dict[str, InputFile] = {}
+
+    @asynccontextmanager
+    async def upload(self, client: 'Client', path: Path) -> AsyncGenerator[None]:
+        """Upload file and keep it for sends by `path.as_posix()` in the context."""
+        key = path.as_posix()
+        uploaded = self._uploaded[key] = await self._upload(client, path)
+        try:
+            yield
+        finally:
+            # Same file may be uploaded again in concurrent context.
+            if self._uploaded.get(key) is uploaded:
+                del self._uploaded[key]
+
+    def get_uploaded(self, path: str) -> 'InputFile | None':
+        return self._uploaded.get(path)
+
+    def get_stats(self) -> list[UploadStats]:
+        return [*self._finished, *self._active.values()]
+
+    async def _upload(self, client: 'Client', path: Path) -> 'InputFile':
+        size = (await asyncio.to_thread(path.stat)).st_size
+        async with self._get_limit(size):
+            stats = UploadStats(upload_id=next(self._upload_ids), path=path, size=size)
+            self._active[stats.upload_id] = stats
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                self._advise(fd, 0, self._conf.read_ahead, os.POSIX_FADV_WILLNEED)
+                return await client.save_file(
+                    path.as_posix(), progress=self._make_progress_callback(fd, stats)
+                )
+            except Exception:
+                stats.failed = True
+                raise
+            finally:
+                self._advise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                os.close(fd)
+                self._finish(stats)
+
+    def _get_limit(self, size: int) -> AbstractAsyncContextManager:
+        if size >= self._conf.large_file_size:
+            return self._large_uploads
+        return nullcontext()
+
+    def _make_progress_callback(self, fd: int, stats: UploadStats) -> ProgressFunc:
+        log_step = stats.size * self._conf.progress_log_percent // 100
+        next_log_at = log_step
+
+        # Coroutine function since pyrogram runs regular ones in thread pool.
+        async def on_progress(current: int, total: int) -> None:
+            nonlocal next_log_at
+            uploaded_before, stats.uploaded = stats.uploaded, current
+            self._advise(fd, current, self._conf.read_ahead, os.POSIX_FADV_WILLNEED)
+            self._advise(
+                fd, uploaded_before, current - uploaded_before, os.POSIX_FADV_DONTNEED
+            )
+            if log_step and current >= next_log_at and current < total:
+                next_log_at = current + log_step
+                self._log.debug(
+                    'Upload #%d "%s": %s of %s, %s/s',
+                    stats.upload_id,
+                    stats.path,
+                    format_bytes(current),
+                    format_bytes(total),
+                    format_bytes(int(stats.rate)),
+                )
+
+        return on_progress
+
+    def _finish(self, stats: UploadStats) -> None:
+        stats.finished_at = time.monotonic()
+        self._active.pop(stats.upload_id, None)
+        self._finished.append(stats)
+        self._log.info(
+            'Upload #%d "%s" %s: %s in %.1fs, %s/s',
+            stats.upload_id,
+            stats.path,
+            'failed' if stats.failed else 'finished',
+            format_bytes(stats.uploaded),
+            stats.duration,
+            format_bytes(int(stats.rate)),
+        )
+
+    def _advise(self, fd: int, offset: int, length: int, advice: int) -> None:
+        try:
+            os.posix_fadvise(fd, offset, length, advice)
+        except OSError as err:
+            self._log.debug('posix_fadvise failed: %s', err)
+
+
+def get_upload_service() -> UploadService:
+    return UploadService()
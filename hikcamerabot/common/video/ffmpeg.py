@@ -0,0 +1,452 @@
+"""Typed ffmpeg/ffprobe argument builders.
+
+Commands are built as argv lists and started with `create_subprocess_exec`,
+so no intermediate shell is spawned and arguments need no shell quoting.
+"""
+
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Self
+
+from hikcamerabot.constants import (
+    FFMPEG_BIN,
+    FFMPEG_CMD_NULL_AUDIO,
+    FFPROBE_BIN,
+)
+
+type ArgType = str | int | float | Path
+
+
+class FfmpegCommand:
+    """Fluent ffmpeg argv builder."""
+
+    def __init__(self, binary: str = FFMPEG_BIN) -> None:
+        self._args: list[str] = [binary]
+
+    def __repr__(self) -> str:
+        return f'<FfmpegCommand {self._args}>'
+
+    def add(self, *args: ArgType) -> Self:
+        """Append raw arguments."""
+        self._args.extend(str(arg) for arg in args)
+        return self
+
+    def extend(self, args: Sequence[ArgType]) -> Self:
+        return self.add(*args)
+
+    def option(self, name: str, value: ArgType | None) -> Self:
+        """Append `-name value` pair, skip it when value is `None`."""
+        if value is not None:
+            self.add(f'-{name}', value)
+        return self
+
+    def flag(self, name: str) -> Self:
+        return self.add(f'-{name}')
+
+    def loglevel(self, level: str) -> Self:
+        return self.option('loglevel', level)
+
+    def overwrite(self) -> Self:
+        return self.flag('y')
+
+    def rtsp_transport(self, transport_type: str | None) -> Self:
+        return self.option('rtsp_transport', transport_type)
+
+    def input(self, source: ArgType) -> Self:
+        return self.option('i', source)
+
+    def output(self, target: ArgType) -> Self:
+        return self.add(target)
+
+    def build(self) -> list[str]:
+        return list(self._args)
+
+
+def build_video_gif_cmd(
+    *,
+    loglevel: str,
+    rtsp_transport: str | None,
+    video_source: str,
+    rec_time: int,
+    filepath: Path,
+) -> list[str]:
+    """Video Gif command.
+
+    Hardcoded aac audio to mitigate any issues regarding supported formats for
+    mp4 container.
+    """
+    return (
+        FfmpegCommand()
+        .loglevel(loglevel)
+        .rtsp_transport(rtsp_transport)
+        .input(video_source)
+        .add('-c:v', 'copy', '-c:a', 'aac')
+        .option('t', rec_time)
+        .output(filepath)
+        .build()
+    )
+
+
+def build_hls_video_gif_cmd(
+    *, loglevel: str, video_source: str, rec_time: int, filepath: Path
+) -> list[str]:
+    return (
+        FfmpegCommand()
+        .loglevel(loglevel)
+        .option('live_start_index', 0)
+        .input(video_source)
+        .add('-c', 'copy')
+        .option('t', rec_time)
+        .output(filepath)
+        .build()
+    )
+
+
+def build_segment_recorder_cmd(
+    loglevel: str,
+    rtsp_transport: str | None,
+    video_source: str,
+    segment_time: int,
+    output: str,
+) -> list[str]:
+    """Stream copy camera video to MPEG-TS segments named by start epoch."""
+    return (
+        FfmpegCommand()
+        .loglevel(loglevel)
+        .rtsp_transport(rtsp_transport)
+        .input(video_source)
+        .add('-c', 'copy')
+        .option('strftime', 1)
+        .option('f', 'segment')
+        .option('segment_format', 'mpegts')
+        .option('segment_time', segment_time)
+        .option('reset_timestamps', 1)
+        .output(output)
+        .build()
+    )
+
+
+def build_concat_clip_cmd(
+    *,
+    loglevel: str,
+    concat_list_path: Path,
+    start_offset: float,
+    duration: float,
+    filepath: Path,
+    acodec: str = 'aac',
+) -> list[str]:
+    """Stitch segments from concat demuxer list into one mp4 clip.
+
+    Default aac audio for the same reason as in `build_video_gif_cmd`.
+    """
+    return (
+        FfmpegCommand()
+        .overwrite()
+        .loglevel(loglevel)
+        .option('f', 'concat')
+        .option('safe', 0)
+        .option('ss', f'{start_offset:.3f}')
+        .input(concat_list_path)
+        .option('t', f'{duration:.3f}')
+        .add('-c:v', 'copy', '-c:a', acodec)
+        .output(filepath)
+        .build()
+    )
+
+
+def build_null_audio_args(enabled: bool) -> dict[str, tuple[str, ...]]:
+    """Return null audio source, map and bitrate arguments or empty ones."""
+    if enabled:
+        return FFMPEG_CMD_NULL_AUDIO
+    return dict.fromkeys(FFMPEG_CMD_NULL_AUDIO, ())
+
+
+def build_audio_args(
+    *, acodec: str, null_audio: dict[str, tuple[str, ...]], asample_rate: int
+) -> list[str]:
+    args = ['-c:a', acodec, *null_audio['bitrate']]
+    if asample_rate != -1:
+        args.extend(('-ar', str(asample_rate)))
+    return args
+
+
+def build_srs_cmd(
+    *,
+    loglevel: str,
+    null_audio: dict[str, tuple[str, ...]],
+    rtsp_transport_type: str,
+    video_source: str,
+    vcodec: str,
+    inner_args: Sequence[str],
+    audio_args: Sequence[str],
+    format_: str,
+    output: str,
+) -> list[str]:
+    return (
+        FfmpegCommand()
+        .loglevel(loglevel)
+        .option('reorder_queue_size', 1000000)
+        .option('buffer_size', 1000000)
+        .extend(null_audio['filter'])
+        .rtsp_transport(rtsp_transport_type)
+        .option('timeout', 10000000)
+        .input(video_source)
+        .extend(null_audio['map'])
+        .option('c:v', vcodec)
+        .extend(inner_args)
+        .extend(audio_args)
+        .option('f', format_)
+        .option('flvflags', 'no_duration_filesize')
+        .option('rtmp_live', 'live')
+        .output(output)
+        .build()
+    )
+
+
+def build_livestream_cmd(
+    *,
+    loglevel: str,
+    null_audio: dict[str, tuple[str, ...]],
+    rtsp_transport: str | None,
+    video_source: str,
+    vcodec: str,
+    inner_args: Sequence[str],
+    audio_args: Sequence[str],
+    format_: str,
+    output: str,
+) -> list[str]:
+    return (
+        FfmpegCommand()
+        .loglevel(loglevel)
+        .extend(null_audio['filter'])
+        .rtsp_transport(rtsp_transport)
+        .input(video_source)
+        .extend(null_audio['map'])
+        .option('c:v', vcodec)
+        .extend(inner_args)
+        .extend(audio_args)
+        .option('f', format_)
+        .option('flvflags', 'no_duration_filesize')
+        .option('rtmp_live', 'live')
+        .output(output)
+        .build()
+    )
+
+
+def build_dvr_cmd(
+    *,
+    loglevel: str,
+    null_audio: dict[str, tuple[str, ...]],
+    rtsp_transport: str | None,
+    video_source: str,
+    vcodec: str,
+    inner_args: Sequence[str],
+    audio_args: Sequence[str],
+    segment_time: int,
+    segment_list: str,
+    segment_list_size: int,
+    output: str,
+) -> list[str]:
+    return (
+        FfmpegCommand()
+        .loglevel(loglevel)
+        .extend(null_audio['filter'])
+        .rtsp_transport(rtsp_transport)
+        .input(video_source)
+        .extend(null_audio['map'])
+        .option('c:v', vcodec)
+        .extend(inner_args)
+        .extend(audio_args)
+        .option('strftime', 1)
+        .option('f', 'segment')
+        .option('segment_time', segment_time)
+        .option('segment_list', segment_list)
+        .option('segment_list_type', 'csv')
+        .option('segment_list_size', segment_list_size)
+        .option('reset_timestamps', 1)
+        .output(output)
+        .build()
+    )
+
+
+def build_transcode_general_args(
+    *,
+    average_bitrate: str,
+    maxrate: str,
+    bufsize: str,
+    pass_mode: int,
+    pix_fmt: str,
+    framerate: int,
+    scale: Sequence[str],
+) -> list[str]:
+    return [
+        '-b:v',
+        average_bitrate,
+        '-maxrate',
+        maxrate,
+        '-bufsize',
+        bufsize,
+        '-pass',
+        str(pass_mode),
+        '-pix_fmt',
+        pix_fmt,
+        '-r',
+        str(framerate),
+        *scale,
+    ]
+
+
+def build_x264_args(*, preset: str, tune: str) -> list[str]:
+    return ['-preset', preset, '-tune', tune]
+
+
+def build_vp9_args(*, deadline: str, speed: int) -> list[str]:
+    return ['-deadline', deadline, '-speed', str(speed)]
+
+
+def build_icecast_args(
+    *,
+    ice_genre: str,
+    ice_name: str,
+    ice_description: str,
+    ice_public: int,
+    password: str,
+    content_type: str,
+) -> list[str]:
+    return [
+        '-ice_genre',
+        ice_genre,
+        '-ice_name',
+        ice_name,
+        '-ice_description',
+        ice_description,
+        '-ice_public',
+        str(ice_public),
+        '-password',
+        password,
+        '-content_type',
+        content_type,
+    ]
+
+
+def build_scale_filter_args(*, width: int, height: int, format_: str) -> list[str]:
+    return ['-vf', f'scale={width}:{height},format={format_}']
+
+
+def build_ffprobe_context_cmd(filepath: Path) -> list[str]:
+    return (
+        FfmpegCommand(FFPROBE_BIN)
+        .loglevel('error')
+        .flag('show_format')
+        .flag('show_streams')
+        .option('of', 'json')
+        .output(filepath)
+        .build()
+    )
+
+
+def build_thumbnail_cmd(*, filepath: Path, thumbnail_path: Path) -> list[str]:
+    return (
+        FfmpegCommand()
+        .overwrite()
+        .loglevel('error')
+        .input(filepath)
+        .option('vframes', 1)
+        .option('q:v', 31)
+        .output(thumbnail_path)
+        .build()
+    )
+
+
+def build_media_inspect_cmd(*, filepath: Path, thumbnail_path: Path) -> list[str]:
+    """Decode the first keyframe into a thumbnail, input info goes to stderr."""
+    return (
+        FfmpegCommand()
+        .overwrite()
+        .flag('hide_banner')
+        .flag('nostats')
+        .loglevel('info')
+        .option('skip_frame', 'nokey')
+        .input(filepath)
+        .option('vframes', 1)
+        .option('q:v', 31)
+        .output(thumbnail_path)
+        .build()
+    )
+
+
+def build_contact_sheet_cmd(
+    *,
+    filepath: Path,
+    sheet_path: Path,
+    interval: float,
+    columns: int,
+    rows: int,
+    tile_width: int,
+) -> list[str]:
+    """Tile keyframes taken every `interval` seconds into one JPEG.
+
+    Only keyframes are decoded, scaled and composed into the grid by ffmpeg
+    in a single pass, an incomplete grid is flushed at the end of input.
+    """
+    select = f"select='isnan(prev_selected_t)+gte(t-prev_selected_t,{interval:.3f})'"
+    return (
+        FfmpegCommand()
+        .overwrite()
+        .loglevel('error')
+        .option('skip_frame', 'nokey')
+        .input(filepath)
+        .flag('an')
+        .option('vf', f'{select},scale={tile_width}:-2,tile={columns}x{rows}')
+        .option('frames:v', 1)
+        .option('q:v', 5)
+        .output(sheet_path)
+        .build()
+    )
+
+
+def build_keyframe_luma_cmd(
+    *, filepath: Path, output_path: Path, width: int, height: int
+) -> list[str]:
+    """Decode only keyframes into downscaled raw 8-bit luma frames."""
+    return (
+        FfmpegCommand()
+        .overwrite()
+        .loglevel('error')
+        .option('skip_frame', 'nokey')
+        .input(filepath)
+        .flag('an')
+        .option('vf', f'scale={width}:{height},format=gray')
+        .option('fps_mode', 'passthrough')
+        .option('f', 'rawvideo')
+        .output(output_path)
+        .build()
+    )
+
+
+def build_timelapse_cmd(
+    *,
+    loglevel: str,
+    img_num: int,
+    video_length: int,
+    pattern_path: Path,
+    video_codec: str,
+    image_quality: int,
+    pix_fmt: str,
+    framerate: int,
+    custom_args: Sequence[str],
+    filepath: Path,
+) -> list[str]:
+    return (
+        FfmpegCommand()
+        .loglevel(loglevel)
+        .option('framerate', f'{img_num}/{video_length}')
+        .input(pattern_path)
+        .option('c:v', video_codec)
+        .option('crf', image_quality)
+        .option('pix_fmt', pix_fmt)
+        .option('r', framerate)
+        .extend(custom_args)
+        .output(filepath)
+        .build()
+    )
@@ -0,0 +1,153 @@
+"""Minimal in-process MP4 (ISO-BMFF) metadata reader.
+
+Reads only box headers and `mvhd`, `tkhd`, `hdlr` and `stsd` payloads of a
+memory-mapped file, which is enough to get video duration and dimensions
+without spawning ffprobe.
+"""
+
+import mmap
+import struct
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final
+
+from hikcamerabot.exceptions import Mp4ParseError
+
+_BOX_HEADER: Final[struct.Struct] = struct.Struct('>I4s')
+_LARGE_SIZE: Final[struct.Struct] = struct.Struct('>Q')
+_FULL_BOX_HEADER_SIZE: Final[int] = 4
+_VIDEO_HANDLER_TYPE: Final[bytes] = b'vide'
+
+# Offsets relative to the start of a full box payload, i.e. after version/flags.
+_MVHD_FIELDS: Final[dict[int, struct.Struct]] = {
+    # creation_time, modification_time, timescale, duration.
+    0: struct.Struct('>IIII'),
+    1: struct.Struct('>QQIQ'),
+}
+# Offset of fixed-point 16.16 width and height after version/flags.
+_TKHD_DIMENSIONS_OFFSET: Final[dict[int, int]] = {0: 72, 1: 84}
+_TKHD_DIMENSIONS: Final[struct.Struct] = struct.Struct('>II')
+_HDLR_HANDLER_TYPE_OFFSET: Final[int] = 4
+# Skip entry count, sample entry header and reserved fields up to width/height.
+_STSD_VISUAL_DIMENSIONS_OFFSET: Final[int] = 4 + 8 + 8 + 16
+_STSD_DIMENSIONS: Final[struct.Struct] = struct.Struct('>HH')
+
+
+@dataclass(frozen=True)
+class Mp4Info:
+    duration: float
+    width: int
+    height: int
+
+
+def read_mp4_info(filepath: Path) -> Mp4Info:
+    """Read duration and first video track dimensions of an MP4 file.
+
+    Raise `Mp4ParseError` when the file is not a complete MP4 file, e.g. it's
+    still being written or has no `moov` box.
+    """
+    try:
+        with (
+            filepath.open('rb') as fd_in,
+            mmap.mmap(fd_in.fileno(), 0, access=mmap.ACCESS_READ) as buf,
+        ):
+            return _parse(buf)
+    except (OSError, ValueError, struct.error) as err:
+        raise Mp4ParseError(f'Failed to read "{filepath}": {err}') from err
+
+
+def _parse(buf: mmap.mmap) -> Mp4Info:
+    moov = _find_box(buf, 0, len(buf), b'moov')
+    if moov is None:
+        raise Mp4ParseError('No "moov" box found')
+    moov_start, moov_end = moov
+
+    mvhd = _find_box(buf, moov_start, moov_end, b'mvhd')
+    if mvhd is None:
+        raise Mp4ParseError('No "mvhd" box found')
+    duration = _read_mvhd_duration(buf, mvhd[0])
+
+    for trak_start, trak_end in _iter_boxes(buf, moov_start, moov_end, b'trak'):
+        if not _is_video_track(buf, trak_start, trak_end):
+            continue
+        width, height = _read_video_dimensions(buf, trak_start, trak_end)
+        return Mp4Info(duration=duration, width=width, height=height)
+    raise Mp4ParseError('No video track found')
+
+
+def _iter_boxes(
+    buf: mmap.mmap, start: int, end: int, box_type: bytes | None = None
+) -> Iterator[tuple[int, int]]:
+    """Yield payload boundaries of child boxes within `start` and `end`."""
+    offset = start
+    while offset + _BOX_HEADER.size <= end:
+        size, type_ = _BOX_HEADER.unpack_from(buf, offset)
+        header_size = _BOX_HEADER.size
+        if size == 1:
+            (size,) = _LARGE_SIZE.unpack_from(buf, offset + header_size)
+            header_size += _LARGE_SIZE.size
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise Mp4ParseError(f'Malformed "{type_.decode(errors="replace")}" box')
+        if box_type is None or type_ == box_type:
+            yield offset + header_size, offset + size
+        offset += size
+
+
+def _find_box(
+    buf: mmap.mmap, start: int, end: int, box_type: bytes
+) -> tuple[int, int] | None:
+    return next(_iter_boxes(buf, start, end, box_type), None)
+
+
+def _find_box_path(
+    buf: mmap.mmap, start: int, end: int, path: tuple[bytes, ...]
+) -> tuple[int, int] | None:
+    box: tuple[int, int] | None = (start, end)
+    for box_type in path:
+        box = _find_box(buf, *box, box_type)
+        if box is None:
+            return None
+    return box
+
+
+def _read_mvhd_duration(buf: mmap.mmap, start: int) -> float:
+    version = buf[start]
+    try:
+        fields = _MVHD_FIELDS[version]
+    except KeyError as err:
+        raise Mp4ParseError(f'Unsupported "mvhd" version {version}') from err
+    _, _, timescale, duration = fields.unpack_from(buf, start + _FULL_BOX_HEADER_SIZE)
+    if not timescale:
+        raise Mp4ParseError('Zero "mvhd" timescale')
+    return duration / timescale
+
+
+def _is_video_track(buf: mmap.mmap, start: int, end: int) -> bool:
+    hdlr = _find_box_path(buf, start, end, (b'mdia', b'hdlr'))
+    if hdlr is None:
+        return False
+    offset = hdlr[0] + _FULL_BOX_HEADER_SIZE + _HDLR_HANDLER_TYPE_OFFSET
+    return buf[offset : offset + 4] == _VIDEO_HANDLER_TYPE
+
+
+def _read_video_dimensions(buf: mmap.mmap, start: int, end: int) -> tuple[int, int]:
+    """Prefer display dimensions from `tkhd`, fall back to coded ones from `stsd`."""
+    tkhd = _find_box(buf, start, end, b'tkhd')
+    if tkhd is not None and buf[tkhd[0]] in _TKHD_DIMENSIONS_OFFSET:
+        width, height = _TKHD_DIMENSIONS.unpack_from(
+            buf,
+            tkhd[0] + _FULL_BOX_HEADER_SIZE + _TKHD_DIMENSIONS_OFFSET[buf[tkhd[0]]],
+        )
+        # 16.16 fixed-point values.
+        if width >> 16 and height >> 16:
+            return width >> 16, height >> 16
+
+    stsd = _find_box_path(buf, start, end, (b'mdia', b'minf', b'stbl', b'stsd'))
+    if stsd is None:
+        raise Mp4ParseError('No "stsd" box found in video track')
+    return _STSD_DIMENSIONS.unpack_from(
+        buf, stsd[0] + _FULL_BOX_HEADER_SIZE + _STSD_VISUAL_DIMENSIONS_OFFSET
+    )
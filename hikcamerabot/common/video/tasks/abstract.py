@@ -1,36 +1,37 @@
 import asyncio
 import logging
-import signal
+import shlex
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from pathlib import Path
 
-from hikcamerabot.utils.process import kill_proc
+from hikcamerabot.common.process import ProcessResult, get_process_supervisor
+from hikcamerabot.enums import ProcessKind
 
 
-class AbstractFfBinaryTask(ABC):
-    _CMD: str | None = None
+class AbstractFfBinaryTask[T](ABC):
     _CMD_TIMEOUT: int = 60
+    _PROCESS_KIND: ProcessKind = ProcessKind.PROBE
 
     def __init__(self, file_path: Path) -> None:
         self._log = logging.getLogger(self.__class__.__name__)
         self._file_path = file_path
 
-    async def _run_proc(self, cmd: str) -> asyncio.subprocess.Process | None:
-        self._log.debug('Running command: "%s"', cmd)
-        proc = await asyncio.create_subprocess_shell(
-            cmd=cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-        )
+    async def _run_proc(self, cmd: Sequence[str]) -> ProcessResult | None:
+        self._log.debug('Running command: "%s"', shlex.join(cmd))
         try:
-            await asyncio.wait_for(proc.wait(), timeout=self._CMD_TIMEOUT)
+            async with asyncio.timeout(self._CMD_TIMEOUT):
+                return await get_process_supervisor().run(
+                    kind=self._PROCESS_KIND, cmd=cmd
+                )
         except TimeoutError:
             self._log.error(
-                'Failed to execute %s: process ran longer than expected and was killed',
-                cmd,
+                'Process "%s" ran longer than expected (%ss) and was killed',
+                shlex.join(cmd),
+                self._CMD_TIMEOUT,
             )
-            await kill_proc(process=proc, signal_=signal.SIGINT, reraise=False)
             return None
-        return proc
 
     @abstractmethod
-    async def run(self) -> None:
+    async def run(self) -> T:
         """Main entry point."""
@@ -0,0 +1,72 @@
+import asyncio
+import shlex
+from itertools import pairwise
+from pathlib import Path
+
+from PIL import Image, ImageChops
+
+from hikcamerabot.common.video.ffmpeg import build_keyframe_luma_cmd
+from hikcamerabot.common.video.tasks.abstract import AbstractFfBinaryTask
+from hikcamerabot.enums import ProcessKind
+
+
+class ActivityScoreTask(AbstractFfBinaryTask[float | None]):
+    """Score video activity from 0 to 1 without decoding every frame.
+
+    Keyframes are decoded to tiny luma frames, the score is the largest share
+    of pixels changed between two consecutive keyframes. Downscaling averages
+    out sensor noise, so static night scenes score close to zero.
+    """
+
+    _PROCESS_KIND = ProcessKind.THUMBNAIL
+    _CMD_TIMEOUT: int = 120
+
+    FRAME_WIDTH: int = 64
+    FRAME_HEIGHT: int = 36
+    # Luma difference for a pixel to count as changed.
+    PIXEL_THRESHOLD: int = 25
+
+    def __init__(self, file_path: Path) -> None:
+        super().__init__(file_path)
+        self._frames_path = file_path.with_name(f'{file_path.name}-luma.raw')
+
+    async def run(self) -> float | None:
+        cmd = build_keyframe_luma_cmd(
+            filepath=self._file_path,
+            output_path=self._frames_path,
+            width=self.FRAME_WIDTH,
+            height=self.FRAME_HEIGHT,
+        )
+        try:
+            result = await self._run_proc(cmd)
+            if not result:
+                return None
+            if result.returncode:
+                self._log.error(
+                    'Failed to decode keyframes of %s, process "%s" stderr: %s',
+                    self._file_path,
+                    shlex.join(cmd),
+                    result.stderr,
+                )
+                return None
+            return await asyncio.to_thread(self._score)
+        finally:
+            self._frames_path.unlink(missing_ok=True)
+
+    def _score(self) -> float:
+        data = self._frames_path.read_bytes()
+        size = (self.FRAME_WIDTH, self.FRAME_HEIGHT)
+        frame_len = self.FRAME_WIDTH * self.FRAME_HEIGHT
+        frames = [
+            Image.frombytes('L', size, data[offset : offset + frame_len])
+            for offset in range(0, len(data) - frame_len + 1, frame_len)
+        ]
+        changed = max(
+            (self._count_changed(prev, frame) for prev, frame in pairwise(frames)),
+            default=0,
+        )
+        return changed / frame_len
+
+    def _count_changed(self, prev: Image.Image, frame: Image.Image) -> int:
+        histogram = ImageChops.difference(prev, frame).histogram()
+        return sum(histogram[self.PIXEL_THRESHOLD + 1 :])
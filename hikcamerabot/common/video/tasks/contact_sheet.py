@@ -0,0 +1,59 @@
+import math
+import shlex
+from pathlib import Path
+
+from hikcamerabot.common.video.ffmpeg import build_contact_sheet_cmd
+from hikcamerabot.common.video.tasks.abstract import AbstractFfBinaryTask
+from hikcamerabot.enums import ProcessKind
+
+
+class MakeContactSheetTask(AbstractFfBinaryTask[bool]):
+    """Tile video keyframes into one image to preview it without downloading."""
+
+    _PROCESS_KIND = ProcessKind.THUMBNAIL
+    _CMD_TIMEOUT: int = 120
+
+    # Keeps the sheet within Telegram photo size limits on long videos.
+    MAX_TILES: int = 60
+
+    def __init__(
+        self,
+        sheet_path: Path,
+        file_path: Path,
+        *,
+        duration: int,
+        interval: int,
+        columns: int,
+        tile_width: int,
+    ) -> None:
+        super().__init__(file_path)
+        self._sheet_path = sheet_path
+        self._duration = duration
+        self._interval = max(interval, duration / self.MAX_TILES)
+        self._columns = columns
+        self._tile_width = tile_width
+
+    async def run(self) -> bool:
+        tile_num = max(math.ceil(self._duration / self._interval), 1)
+        columns = min(self._columns, tile_num)
+        cmd = build_contact_sheet_cmd(
+            filepath=self._file_path,
+            sheet_path=self._sheet_path,
+            interval=self._interval,
+            columns=columns,
+            rows=math.ceil(tile_num / columns),
+            tile_width=self._tile_width,
+        )
+        result = await self._run_proc(cmd)
+        if not result:
+            return False
+        if result.returncode:
+            self._log.error(
+                'Failed to make contact sheet for %s, process "%s" stderr: %s',
+                self._file_path,
+                shlex.join(cmd),
+                result.stderr,
+            )
+            self._sheet_path.unlink(missing_ok=True)
+            return False
+        return True
@@ -1,35 +1,41 @@
 import json
+import shlex
 
+from hikcamerabot.common.video.ffmpeg import build_ffprobe_context_cmd
 from hikcamerabot.common.video.tasks.abstract import AbstractFfBinaryTask
-from hikcamerabot.utils.process import get_stdout_stderr
+from hikcamerabot.enums import ProcessKind
 
 
-class GetFfprobeContextTask(AbstractFfBinaryTask):
-    _CMD = 'ffprobe -loglevel error -show_format -show_streams -of json {filepath}'
+class GetFfprobeContextTask(AbstractFfBinaryTask[dict | None]):
+    _PROCESS_KIND = ProcessKind.PROBE
 
     async def run(self) -> dict | None:
         return await self._get_context()
 
     async def _get_context(self) -> dict | None:
-        cmd = self._CMD.format(filepath=self._file_path)
-        proc = await self._run_proc(cmd)
-        if not proc:
+        cmd = build_ffprobe_context_cmd(self._file_path)
+        result = await self._run_proc(cmd)
+        if not result:
             return None
 
-        stdout, stderr = await get_stdout_stderr(proc)
         self._log.debug(
-            'Process "%s" returncode: %d, stderr: %s', cmd, proc.returncode, stderr
+            'Process "%s" returncode: %d, stderr: %s',
+            shlex.join(cmd),
+            result.returncode,
+            result.stderr,
         )
-        if proc.returncode:
+        if result.returncode:
             self._log.error(
                 'Failed to make video context. Is file broken? File: "%s"',
                 self._file_path,
             )
             return None
         try:
-            return json.loads(stdout)
+            return json.loads(result.stdout)
         except Exception:
             self._log.exception(
-                'Failed to load ffprobe output [type %s]: %s', type(stdout), stdout
+                'Failed to load ffprobe output [type %s]: %s',
+                type(result.stdout),
+                result.stdout,
             )
             return None
@@ -0,0 +1,121 @@
+import asyncio
+import re
+import shlex
+from dataclasses import dataclass
+from pathlib import Path
+
+from hikcamerabot.common.video.ffmpeg import build_media_inspect_cmd
+from hikcamerabot.common.video.mp4 import read_mp4_info
+from hikcamerabot.common.video.tasks.abstract import AbstractFfBinaryTask
+from hikcamerabot.common.video.tasks.ffprobe_context import GetFfprobeContextTask
+from hikcamerabot.common.video.tasks.thumbnail import MakeThumbnailTask
+from hikcamerabot.enums import ProcessKind
+from hikcamerabot.exceptions import Mp4ParseError
+
+
+@dataclass
+class MediaInfo:
+    duration: int | None = None
+    width: int | None = None
+    height: int | None = None
+    thumbnail_created: bool = False
+
+    @property
+    def has_video_info(self) -> bool:
+        return None not in (self.duration, self.width, self.height)
+
+
+class MediaInspectTask(AbstractFfBinaryTask[MediaInfo]):
+    """Get video duration, resolution and first keyframe thumbnail in one pass.
+
+    Video info is read in-process from MP4 boxes. For other files it's parsed
+    from input format info which ffmpeg prints to stderr while decoding the
+    thumbnail frame. ffprobe is used as a last resort.
+    """
+
+    _PROCESS_KIND = ProcessKind.THUMBNAIL
+
+    _OUTPUT_SECTION_MARKER: str = '\nOutput #0'
+    _DURATION_REGEX = re.compile(
+        r'Duration: (?P<hours>\d+):(?P<minutes>\d{2}):(?P<seconds>\d{2}(?:\.\d+)?)'
+    )
+    _VIDEO_STREAM_REGEX = re.compile(
+        r'Stream #\d+:\d+.*?: Video: .*?\b(?P<width>\d{2,})x(?P<height>\d{2,})\b'
+    )
+
+    def __init__(self, thumbnail_path: Path, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._thumbnail_path = thumbnail_path
+        self._thumbnail_task = MakeThumbnailTask(thumbnail_path, self._file_path)
+
+    async def run(self) -> MediaInfo:
+        return await self._inspect()
+
+    async def _inspect(self) -> MediaInfo:
+        media_info = MediaInfo()
+        await self._read_mp4_info(media_info)
+        cmd = build_media_inspect_cmd(
+            filepath=self._file_path, thumbnail_path=self._thumbnail_path
+        )
+        result = await self._run_proc(cmd)
+        if result:
+            self._log.debug(
+                'Process "%s" returncode: %d, stderr: %s',
+                shlex.join(cmd),
+                result.returncode,
+                result.stderr,
+            )
+            if result.returncode:
+                self._log.error('Failed to make thumbnail for %s', self._file_path)
+                self._thumbnail_task.cleanup_errored()
+            else:
+                media_info.thumbnail_created = True
+            if not media_info.has_video_info:
+                self._parse_input_info(result.stderr, media_info)
+
+        if not media_info.has_video_info:
+            self._log.warning(
+                'Failed to parse video info of "%s" from ffmpeg output, '
+                'falling back to ffprobe',
+                self._file_path,
+            )
+            await self._probe(media_info)
+        return media_info
+
+    async def _read_mp4_info(self, media_info: MediaInfo) -> None:
+        try:
+            mp4_info = await asyncio.to_thread(read_mp4_info, self._file_path)
+        except Mp4ParseError as err:
+            self._log.debug('Failed to read MP4 info: %s', err)
+            return
+        media_info.duration = int(mp4_info.duration)
+        media_info.width = mp4_info.width
+        media_info.height = mp4_info.height
+
+    def _parse_input_info(self, stderr: str, media_info: MediaInfo) -> None:
+        input_info = stderr.split(self._OUTPUT_SECTION_MARKER, maxsplit=1)[0]
+        if duration_match := self._DURATION_REGEX.search(input_info):
+            media_info.duration = int(
+                int(duration_match['hours']) * 3600
+                + int(duration_match['minutes']) * 60
+                + float(duration_match['seconds'])
+            )
+        if stream_match := self._VIDEO_STREAM_REGEX.search(input_info):
+            media_info.width = int(stream_match['width'])
+            media_info.height = int(stream_match['height'])
+
+    async def _probe(self, media_info: MediaInfo) -> None:
+        probe_ctx = await GetFfprobeContextTask(self._file_path).run()
+        if not probe_ctx:
+            return
+        try:
+            video_stream = next(
+                stream
+                for stream in probe_ctx['streams']
+                if stream['codec_type'] == 'video'
+            )
+            media_info.duration = int(float(probe_ctx['format']['duration']))
+            media_info.height = video_stream['height']
+            media_info.width = video_stream['width']
+        except (KeyError, StopIteration):
+            self._log.exception('Failed to gather video stream metadata: %s', probe_ctx)
@@ -1,12 +1,13 @@
+import shlex
 from pathlib import Path
 
+from hikcamerabot.common.video.ffmpeg import build_thumbnail_cmd
 from hikcamerabot.common.video.tasks.abstract import AbstractFfBinaryTask
-from hikcamerabot.constants import FFMPEG_BIN
-from hikcamerabot.utils.process import get_stdout_stderr
+from hikcamerabot.enums import ProcessKind
 
 
-class MakeThumbnailTask(AbstractFfBinaryTask):
-    _CMD = f'{FFMPEG_BIN} -y -loglevel error -i {{filepath}} -vframes 1 -q:v 31 {{thumbpath}}'
+class MakeThumbnailTask(AbstractFfBinaryTask[bool]):
+    _PROCESS_KIND = ProcessKind.THUMBNAIL
 
     def __init__(self, thumbnail_path: Path, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
@@ -16,31 +17,32 @@ class MakeThumbnailTask(AbstractFfBinaryTask):
         return await self._make_thumbnail()
 
     async def _make_thumbnail(self) -> bool:
-        cmd = self._CMD.format(filepath=self._file_path, thumbpath=self._thumbnail_path)
-        proc = await self._run_proc(cmd)
-        if not proc:
+        cmd = build_thumbnail_cmd(
+            filepath=self._file_path, thumbnail_path=self._thumbnail_path
+        )
+        result = await self._run_proc(cmd)
+        if not result:
             return False
 
-        stdout, stderr = await get_stdout_stderr(proc)
         self._log.debug(
             'Process "%s" returncode: %d, stdout: %s, stderr: %s',
-            cmd,
-            proc.returncode,
-            stdout,
-            stderr,
+            shlex.join(cmd),
+            result.returncode,
+            result.stdout,
+            result.stderr,
         )
-        if proc.returncode:
+        if result.returncode:
             self._log.error('Failed to make thumbnail for %s', self._file_path)
-            self._err_cleanup()
+            self.cleanup_errored()
             return False
         return True
 
-    def _err_cleanup(self) -> None:
+    def cleanup_errored(self) -> None:
         """Cleanup errored thumbnail if any.
 
         For example, zero-size thumbnail could be created when no space left on device.
         """
-        if self._thumbnail_path.exists():
+        if not self._thumbnail_path.exists():
             return
 
         self._log.info('Cleaning up errored thumbnail: "%s"', self._thumbnail_path)
@@ -1,6 +1,6 @@
 import asyncio
 import logging
-import signal
+import shlex
 import time
 from datetime import datetime
 from typing import TYPE_CHECKING, ClassVar
@@ -8,25 +8,25 @@ from urllib.parse import urlsplit
 
 from pyrogram.types import Message
 
-from hikcamerabot.common.video.tasks.ffprobe_context import GetFfprobeContextTask
-from hikcamerabot.common.video.tasks.thumbnail import MakeThumbnailTask
+from hikcamerabot.common.process import get_process_supervisor
+from hikcamerabot.common.video.ffmpeg import (
+    build_hls_video_gif_cmd,
+    build_video_gif_cmd,
+)
+from hikcamerabot.common.video.tasks.media_inspect import MediaInspectTask
 from hikcamerabot.constants import (
     FFMPEG_CAM_VIDEO_SRC,
-    FFMPEG_CMD_HLS_VIDEO_GIF,
-    FFMPEG_CMD_VIDEO_GIF,
     FFMPEG_SRS_HLS_VIDEO_SRC,
     FFMPEG_SRS_RTMP_VIDEO_SRC,
-    RTSP_TRANSPORT_TPL,
     SRS_LIVESTREAM_NAME_TPL,
 )
-from hikcamerabot.enums import EventType, VideoGifType
+from hikcamerabot.enums import EventType, ProcessKind, VideoGifType
 from hikcamerabot.event_engine.events.outbound import (
     SendTextOutboundEvent,
     VideoOutboundEvent,
 )
 from hikcamerabot.event_engine.queue import get_result_queue
 from hikcamerabot.utils.file import file_size
-from hikcamerabot.utils.process import kill_proc
 from hikcamerabot.utils.shared import (
     bold,
     format_ts,
@@ -82,6 +82,7 @@ class RecordVideoGifTask:
         if self._rewind:
             self._rec_time += self._gif_conf.rewind_time
 
+        self._event_ts = time.time()
         self._message = message
         self._event = self._VIDEO_TYPE_TO_EVENT[self._video_type]
         self._result_queue = get_result_queue()
@@ -90,27 +91,34 @@ class RecordVideoGifTask:
         self._duration: int | None = None
         self._width: int | None = None
         self._height: int | None = None
-        self._probe_ctx: dict | None = None
 
     async def run(self) -> None:
         await asyncio.gather(self._record(), self._send_confirmation_message())
 
     async def _record(self) -> None:
         """Start Ffmpeg subprocess and return file path and video type."""
-        self._log.debug(
-            'Recording "%s" video from "%s": "%s"',
-            self._video_type.value,
-            self._cam.conf.description,
-            self._ffmpeg_cmd,
-        )
-        await self._start_ffmpeg_subprocess()
+        if self._is_pre_event_buffer_used:
+            self._log.debug(
+                'Making "%s" video from "%s" pre-event buffer',
+                self._video_type.value,
+                self._cam.conf.description,
+            )
+            await self._make_pre_event_clip()
+        else:
+            self._log.debug(
+                'Recording "%s" video from "%s": "%s"',
+                self._video_type.value,
+                self._cam.conf.description,
+                shlex.join(self._ffmpeg_cmd),
+            )
+            await self._start_ffmpeg_subprocess()
         if await self._validate_file():
             await self._post_process_successful_record()
         else:
             await self._post_process_failed_record()
 
     async def _post_process_successful_record(self) -> None:
-        await asyncio.gather(self._get_probe_ctx(), self._make_thumbnail_frame())
+        await self._inspect_media()
         await self._send_result()
 
     async def _post_process_failed_record(self) -> None:
@@ -125,27 +133,16 @@ class RecordVideoGifTask:
             )
         )
 
-    async def _make_thumbnail_frame(self) -> None:
-        # TODO: Refactor duplicate code. Move to mixin.
-        self._thumb_created = await MakeThumbnailTask(
+    async def _inspect_media(self) -> None:
+        media_info = await MediaInspectTask(
             thumbnail_path=self._thumb_path, file_path=self._file_path
         ).run()
+        self._thumb_created = media_info.thumbnail_created
         if not self._thumb_created:
             self._log.error('Error during making thumbnail of %s', self._file_path)
-
-    async def _get_probe_ctx(self) -> None:
-        # TODO: Refactor duplicate code. Move to mixin.
-        self._probe_ctx = await GetFfprobeContextTask(self._file_path).run()
-        if not self._probe_ctx:
-            return
-        video_streams = [
-            stream
-            for stream in self._probe_ctx['streams']
-            if stream['codec_type'] == 'video'
-        ]
-        self._duration = int(float(self._probe_ctx['format']['duration']))
-        self._height = video_streams[0]['height']
-        self._width = video_streams[0]['width']
+        self._duration = media_info.duration
+        self._height = media_info.height
+        self._width = media_info.width
 
     def _post_err_cleanup(self) -> None:
         """Delete video file and thumb if they exist after exception."""
@@ -156,11 +153,36 @@ class RecordVideoGifTask:
                 except Exception as err:
                     self._log.warning('File path %s not deleted: %s', file_path, err)
 
+    @property
+    def _is_pre_event_buffer_used(self) -> bool:
+        return (
+            self._video_type is VideoGifType.ON_ALERT
+            and self._cam.services.pre_event_recorder.started
+        )
+
+    async def _make_pre_event_clip(self) -> None:
+        is_created = await self._cam.services.pre_event_recorder.make_clip(
+            event_ts=self._event_ts,
+            pre_time=self._gif_conf.rewind_time if self._rewind else 0,
+            post_time=self._gif_conf.record_time,
+            filepath=self._file_path,
+        )
+        if not is_created:
+            self._log.error(
+                'Failed to make "%s" from pre-event buffer', self._file_path
+            )
+            self._post_err_cleanup()
+
     async def _start_ffmpeg_subprocess(self) -> None:
         proc_timeout = self._rec_time + self._PROCESS_TIMEOUT
-        proc = await asyncio.create_subprocess_shell(self._ffmpeg_cmd)
         try:
-            await asyncio.wait_for(proc.wait(), timeout=proc_timeout)
+            async with asyncio.timeout(proc_timeout):
+                await get_process_supervisor().run(
+                    kind=ProcessKind.RECORD,
+                    cmd=self._ffmpeg_cmd,
+                    stdout=None,
+                    stderr=None,
+                )
         except TimeoutError:
             self._log.error(
                 'Failed to record "%s": FFMPEG process ran longer than '
@@ -168,7 +190,6 @@ class RecordVideoGifTask:
                 self._file_path,
                 proc_timeout,
             )
-            await kill_proc(process=proc, signal_=signal.SIGINT, reraise=False)
             self._post_err_cleanup()
 
     async def _validate_file(self) -> bool:
@@ -222,7 +243,7 @@ class RecordVideoGifTask:
             gen_random_str(),
         )
 
-    def _build_ffmpeg_cmd(self) -> str:
+    def _build_ffmpeg_cmd(self) -> list[str]:
         if self._is_srs_enabled:
             livestream_name = SRS_LIVESTREAM_NAME_TPL.format(
                 channel=self._gif_conf.channel, cam_id=self._cam.id
@@ -232,7 +253,7 @@ class RecordVideoGifTask:
                     ip_address=get_srs_server_ip_address(),
                     livestream_name=livestream_name,
                 )
-                return FFMPEG_CMD_HLS_VIDEO_GIF.format(
+                return build_hls_video_gif_cmd(
                     video_source=video_source,
                     rec_time=self._rec_time,
                     loglevel=self._gif_conf.loglevel,
@@ -250,12 +271,10 @@ class RecordVideoGifTask:
                 rtsp_port=self._cam.conf.rtsp_port,
                 channel=self._gif_conf.channel,
             )
-        return FFMPEG_CMD_VIDEO_GIF.format(
-            rtsp_transport=RTSP_TRANSPORT_TPL.format(
-                rtsp_transport_type=self._gif_conf.rtsp_transport_type
-            )
+        return build_video_gif_cmd(
+            rtsp_transport=self._gif_conf.rtsp_transport_type
             if not self._is_srs_enabled
-            else '',
+            else None,
             video_source=video_source,
             rec_time=self._rec_time,
             loglevel=self._gif_conf.loglevel,
@@ -15,8 +15,21 @@ from hikcamerabot.config.schemas.types_ import (
     PythonLogLevel,
     TimezoneType,
 )
-from hikcamerabot.constants import CMD_CAM_ID_REGEX, DAY_HOURS_RANGE
-from hikcamerabot.enums import FfmpegPixFmt, FfmpegVideoCodecType, RtspTransportType
+from hikcamerabot.constants import (
+    CMD_CAM_ID_REGEX,
+    DAY_HOURS_RANGE,
+    IONICE_LEVELS_RANGE,
+    NICE_VALUES_RANGE,
+)
+from hikcamerabot.enums import (
+    DvrUploadMode,
+    FfmpegPixFmt,
+    FfmpegVideoCodecType,
+    IoniceClass,
+    OutboundLaneKind,
+    ProcessKind,
+    RtspTransportType,
+)
 
 
 class LivestreamConfSchema(StrictBaseModel):
@@ -27,6 +40,9 @@ class LivestreamConfSchema(StrictBaseModel):
 
 class BaseDVRStorageUploadConfSchema(StrictBaseModel, ABC):
     enabled: bool
+
+
+class TelegramDvrUploadConfSchema(BaseDVRStorageUploadConfSchema):
     group_id: int | None
 
     @model_validator(mode='after')
@@ -36,12 +52,27 @@ class BaseDVRStorageUploadConfSchema(StrictBaseModel, ABC):
         return self
 
 
-class TelegramDvrUploadConfSchema(BaseDVRStorageUploadConfSchema):
-    pass
+class LocalDvrUploadConfSchema(BaseDVRStorageUploadConfSchema):
+    path: Path
+
+
+class S3DvrUploadConfSchema(BaseDVRStorageUploadConfSchema):
+    endpoint_url: str
+    region: str
+    bucket: str
+    prefix: str
+    access_key: str
+    secret_key: str
+    verify_ssl: bool
+    # S3 rejects multipart upload parts smaller than 5 MiB.
+    part_size: Annotated[int, Field(ge=5 * 1024 * 1024)]
+    max_concurrency: IntMin1
 
 
 class DvrUploadStorageConfSchema(StrictBaseModel):
     telegram: TelegramDvrUploadConfSchema
+    local: LocalDvrUploadConfSchema
+    s3: S3DvrUploadConfSchema
 
     def is_any_upload_storage_enabled(self) -> bool:
         return any(
@@ -65,14 +96,41 @@ class DvrUploadStorageConfSchema(StrictBaseModel):
             raise ValueError(f'Invalid storage type: {type_}') from err
 
 
+class DvrAlertWindowSchema(StrictBaseModel):
+    before: IntMin0
+    after: IntMin0
+
+
 class DvrUploadConfSchema(StrictBaseModel):
     delete_after_upload: bool
+    mode: DvrUploadMode
+    alert_window: DvrAlertWindowSchema
     storage: DvrUploadStorageConfSchema
 
 
+class DvrRetentionConfSchema(StrictBaseModel):
+    max_size: IntMin0
+    max_age: IntMin0
+
+
+class DvrContactSheetConfSchema(StrictBaseModel):
+    enabled: bool
+    interval: IntMin1
+    columns: IntMin1
+    tile_width: IntMin1
+
+
+class DvrActivityConfSchema(StrictBaseModel):
+    enabled: bool
+    min_score: Annotated[float, Field(ge=0, le=1)]
+
+
 class DvrLivestreamConfSchema(LivestreamConfSchema):
     local_storage_path: Path
     upload: DvrUploadConfSchema
+    retention: DvrRetentionConfSchema
+    contact_sheet: DvrContactSheetConfSchema
+    activity: DvrActivityConfSchema
 
 
 class LivestreamSchema(StrictBaseModel):
@@ -92,8 +150,35 @@ class VideoGifOnDemandSchema(StrictBaseModel):
     rtsp_transport_type: RtspTransportType
 
 
+class PreEventBufferSchema(StrictBaseModel):
+    enabled: bool
+    storage: Path
+    segment_time: IntMin1
+    buffer_time: IntMin1
+
+    @model_validator(mode='after')
+    def validate_buffer_time(self) -> Self:
+        if self.buffer_time < self.segment_time:
+            raise ValueError('Buffer time must not be lower than segment time')
+        return self
+
+
 class VideoGifOnAlertSchema(VideoGifOnDemandSchema):
     rewind: bool
+    pre_event_buffer: PreEventBufferSchema
+
+    @model_validator(mode='after')
+    def validate_pre_event_buffer(self) -> Self:
+        buffer_conf = self.pre_event_buffer
+        if (
+            buffer_conf.enabled
+            and buffer_conf.buffer_time < self.rewind_time + buffer_conf.segment_time
+        ):
+            raise ValueError(
+                'Pre-event buffer time must be greater or equal to rewind time '
+                'plus segment time'
+            )
+        return self
 
 
 class VideoGifSchema(StrictBaseModel):
@@ -171,6 +256,7 @@ class CmdSectionsVisibilitySchema(StrictBaseModel):
     stream_youtube: bool
     stream_telegram: bool
     stream_icecast: bool
+    dvr: bool
 
 
 class NvrSchema(StrictBaseModel):
@@ -249,9 +335,152 @@ class TelegramSchema(StrictBaseModel):
     startup_message_users: list[int]
 
 
+class ProcessPoolSchema(StrictBaseModel):
+    max_concurrent: IntMin1
+    nice_value: int | None
+    ionice_class: IoniceClass | None
+    ionice_level: IntMin0 | None
+
+    @field_validator('nice_value')
+    @classmethod
+    def validate_nice_value(cls, value: int | None) -> int | None:
+        if value is not None and value not in NICE_VALUES_RANGE:
+            raise ValueError(f'Invalid nice value: {value}')
+        return value
+
+    @field_validator('ionice_level')
+    @classmethod
+    def validate_ionice_level(cls, value: int | None) -> int | None:
+        if value is not None and value not in IONICE_LEVELS_RANGE:
+            raise ValueError(f'Invalid ionice level: {value}')
+        return value
+
+
+class ProcessPoolsSchema(StrictBaseModel):
+    record: ProcessPoolSchema
+    probe: ProcessPoolSchema
+    thumbnail: ProcessPoolSchema
+    encode: ProcessPoolSchema
+    stream: ProcessPoolSchema
+
+    def get_pool_conf_by_kind(self, kind: ProcessKind) -> ProcessPoolSchema:
+        try:
+            return getattr(self, kind.value)
+        except AttributeError as err:
+            raise ValueError(f'Invalid process kind: {kind}') from err
+
+
+class OutboundLaneKindsSchema(StrictBaseModel):
+    text: IntMin1
+    photo: IntMin1
+    video: IntMin1
+
+    def get_by_kind(self, kind: OutboundLaneKind) -> int:
+        return getattr(self, kind.value)
+
+
+class OutboundQueueSchema(StrictBaseModel):
+    max_events: IntMin1
+    max_bytes: IntMin1
+    max_age: OutboundLaneKindsSchema
+
+
+class OutboundRateLimitsSchema(StrictBaseModel):
+    global_per_second: IntMin1
+    chat_per_second: IntMin1
+    group_per_minute: IntMin1
+    max_flood_wait_retries: IntMin0
+
+
+class AlertAlbumSchema(StrictBaseModel):
+    enabled: bool
+    window: Annotated[float, Field(gt=0)]
+
+
+class FileIdCacheSchema(StrictBaseModel):
+    enabled: bool
+    path: Path
+    max_entries: IntMin1
+
+
+class UploadSchema(StrictBaseModel):
+    read_ahead: IntMin1
+    large_file_size: IntMin1
+    max_large_uploads: IntMin1
+    progress_log_percent: Annotated[int, Field(ge=0, le=100)]
+
+
+class DeadLetterSchema(StrictBaseModel):
+    path: Path
+    max_entries: IntMin1
+    max_attempts: IntMin1
+    backoff_base: IntMin1
+    backoff_max: IntMin1
+
+
+class OutboundSchema(StrictBaseModel):
+    worker_num: IntMin1
+    shutdown_timeout: IntMin0
+    lanes: OutboundLaneKindsSchema
+    queue: OutboundQueueSchema
+    rate_limits: OutboundRateLimitsSchema
+    alert_album: AlertAlbumSchema
+    file_id_cache: FileIdCacheSchema
+    upload: UploadSchema
+    dead_letter: DeadLetterSchema
+
+    @model_validator(mode='after')
+    def validate_lanes(self) -> Self:
+        if self.worker_num <= max(self.lanes.photo, self.lanes.video):
+            raise ValueError(
+                'Outbound worker number must be greater than photo and video lane '
+                'limits to always keep a worker for text messages'
+            )
+        return self
+
+
+class DvrCatalogSchema(StrictBaseModel):
+    path: Path
+
+
+class DvrRetentionSchema(DvrRetentionConfSchema):
+    check_interval: IntMin1
+    min_free_space: IntMin0
+
+
+class DvrUploadWorkersSchema(StrictBaseModel):
+    telegram: IntMin1
+    local: IntMin1
+    s3: IntMin1
+
+    def get_by_type(self, type_: DvrStorageType) -> int:
+        return getattr(self, type_)
+
+
+class DvrUploadRetrySchema(StrictBaseModel):
+    max_attempts: IntMin1
+    backoff_base: IntMin1
+    backoff_max: IntMin1
+
+
+class DvrUploadSchema(StrictBaseModel):
+    workers: DvrUploadWorkersSchema
+    retry: DvrUploadRetrySchema
+    stats_interval: IntMin0
+
+
+class DvrSchema(StrictBaseModel):
+    catalog: DvrCatalogSchema
+    retention: DvrRetentionSchema
+    upload: DvrUploadSchema
+
+
 class MainConfigSchema(StrictBaseModel):
     telegram: TelegramSchema
     log_level: PythonLogLevel
+    process_pools: ProcessPoolsSchema
+    outbound: OutboundSchema
+    dvr: DvrSchema
     camera_list: dict[
         Annotated[str, Field(pattern=CMD_CAM_ID_REGEX)], CameraConfigSchema
     ]
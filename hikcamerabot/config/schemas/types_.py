@@ -19,4 +19,4 @@ FfmpegLogLevel = Annotated[str, AfterValidator(validate_ffmpeg_loglevel)]
 PythonLogLevel = Annotated[str, AfterValidator(validate_python_log_level)]
 TimezoneType = Annotated[str, AfterValidator(validate_timezone)]
 
-type DvrStorageType = Literal['telegram']
+type DvrStorageType = Literal['telegram', 'local', 's3']
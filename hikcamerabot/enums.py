@@ -35,12 +35,14 @@ class VideoGifType(BaseUniqueChoiceStrEnum):
 
 
 class EventType(BaseUniqueChoiceStrEnum):
+    ALERT_ALBUM = 'alert_album'
     ALERT_MSG = 'alert_msg'
     ALERT_SNAPSHOT = 'alert_snapshot'
     ALERT_VIDEO = 'alert_video'
     CONFIGURE_ALARM = 'alarm_conf'
     CONFIGURE_DETECTION = 'detection_conf'
     CONFIGURE_IRCUT_FILTER = 'ircut_conf'
+    DVR_CLIP = 'dvr_clip'
     RECORD_VIDEOGIF = 'record_videogif'
     SEND_TEXT = 'send_text'
     STREAM = 'stream'
@@ -48,6 +50,26 @@ class EventType(BaseUniqueChoiceStrEnum):
     SEND_TIMELAPSE = 'send_timelapse'
 
 
+class OutboundLaneKind(BaseUniqueChoiceStrEnum):
+    TEXT = 'text'
+    PHOTO = 'photo'
+    VIDEO = 'video'
+
+
+class TelegramMediaType(BaseUniqueChoiceStrEnum):
+    """Media types as named in pyrogram `Message` attributes."""
+
+    PHOTO = 'photo'
+    VIDEO = 'video'
+    DOCUMENT = 'document'
+
+
+class OutboundShedReason(BaseUniqueChoiceStrEnum):
+    EXPIRED = 'expired'
+    COALESCED = 'coalesced'
+    OVERFLOW = 'overflow'
+
+
 class CmdSectionType(BaseUniqueChoiceStrEnum):
     GENERAL = 'General'
     INFRARED = 'Infrared Mode'
@@ -58,6 +80,7 @@ class CmdSectionType(BaseUniqueChoiceStrEnum):
     STREAM_YOUTUBE = 'YouTube Stream'
     STREAM_TELEGRAM = 'Telegram Stream'
     STREAM_ICECAST = 'Icecast Stream'
+    DVR = 'DVR'
 
 
 class AlarmType(BaseUniqueChoiceStrEnum):
@@ -69,10 +92,19 @@ class ServiceType(BaseUniqueChoiceStrEnum):
     STREAM = 'stream'
     UPLOAD = 'upload'
     TIMELAPSE = 'timelapse'
+    RECORDER = 'recorder'
 
 
 class DvrUploadType(BaseUniqueChoiceStrEnum):
     TELEGRAM = 'telegram'
+    LOCAL = 'local'
+    S3 = 's3'
+
+
+class DvrUploadMode(BaseUniqueChoiceStrEnum):
+    ALL = 'all'
+    ALERTS = 'alerts'
+    ALERT_CLIPS = 'alert_clips'
 
 
 class StreamType(BaseUniqueChoiceStrEnum):
@@ -127,6 +159,22 @@ class FfmpegVideoCodecType(BaseUniqueChoiceStrEnum):
     VP9 = 'vp9'
 
 
+class ProcessKind(BaseUniqueChoiceStrEnum):
+    """Supervised subprocess pool name."""
+
+    RECORD = 'record'
+    PROBE = 'probe'
+    THUMBNAIL = 'thumbnail'
+    ENCODE = 'encode'
+    STREAM = 'stream'
+
+
+class IoniceClass(BaseUniqueChoiceStrEnum):
+    REALTIME = 'realtime'
+    BEST_EFFORT = 'best_effort'
+    IDLE = 'idle'
+
+
 class FfmpegPixFmt(BaseUniqueChoiceStrEnum):
     YUV420P = 'yuv420p'
     YUV422P = 'yuv422p'
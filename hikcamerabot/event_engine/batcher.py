@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+from hikcamerabot.utils.task import create_task
+
+
+class EventBatcher[T]:
+    """Collect events arriving within a time window into batches.
+
+    The window starts with the first event of a batch. A batch is flushed when
+    the window ends or the batch is full. Batches are flushed one at a time in
+    order they were collected.
+
+    Closing the batcher flushes the pending batch and waits for all flushes to
+    finish, events must not be added after that.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        max_size: int,
+        flush_func: Callable[[list[T]], Awaitable[None]],
+    ) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._window = window
+        self._max_size = max_size
+        self._flush_func = flush_func
+        self._batch: list[T] = []
+        self._window_task: asyncio.Task | None = None
+        self._flush_tasks: set[asyncio.Task] = set()
+        self._flush_lock = asyncio.Lock()
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def add(self, event: T) -> None:
+        if self._closed:
+            raise RuntimeError('Cannot add event to closed batcher')
+        self._batch.append(event)
+        if len(self._batch) >= self._max_size:
+            if self._window_task:
+                self._window_task.cancel()
+            self._flush()
+        elif len(self._batch) == 1:
+            self._window_task = create_task(
+                self._flush_after_window(),
+                task_name=f'{self.__class__.__name__}_window',
+                logger=self._log,
+                exception_message='Batch window task raised an exception',
+            )
+
+    async def close(self) -> None:
+        """Flush the pending batch and wait for all flushes to finish."""
+        self._closed = True
+        if self._window_task:
+            self._window_task.cancel()
+        if self._batch:
+            self._flush()
+        await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self._window)
+        self._flush()
+
+    def _flush(self) -> None:
+        batch, self._batch = self._batch, []
+        self._window_task = None
+        task = create_task(
+            self._flush_batch(batch),
+            task_name=f'{self.__class__.__name__}_flush',
+            logger=self._log,
+            exception_message='Batch flush task raised an exception',
+        )
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_batch(self, batch: list[T]) -> None:
+        async with self._flush_lock:
+            self._log.debug('Flushing batch of %d events', len(batch))
+            await self._flush_func(batch)
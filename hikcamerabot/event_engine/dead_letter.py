@@ -0,0 +1,356 @@
+"""Dead letters of failed outbound deliveries."""
+
+import asyncio
+import json
+import logging
+import shutil
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import count
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from hikcamerabot.config.config import main_conf
+from hikcamerabot.enums import EventType
+from hikcamerabot.event_engine.events.outbound import VideoOutboundEvent
+from hikcamerabot.event_engine.queue import OutboundEvent
+from hikcamerabot.utils.shared import Singleton
+
+if TYPE_CHECKING:
+    from hikcamerabot.camera import HikvisionCam
+
+# Result of retry is ignored, only raised exception fails the attempt.
+type RetryFunc = Callable[[], Awaitable[object]]
+type DispatchFunc = Callable[[OutboundEvent], Awaitable[None]]
+
+
+@dataclass
+class DeadLetter:
+    """Failed delivery waiting for retry.
+
+    `next_retry_at` is monotonic time, `None` when retry attempts are exhausted
+    and the letter waits for manual replay.
+    """
+
+    letter_id: int
+    description: str
+    retry_func: RetryFunc
+    error: str
+    discard_func: Callable[[], None] | None = None
+    event: OutboundEvent | None = None
+    manifest_path: Path | None = None
+    attempts: int = 1
+    created_at: float = field(default_factory=time.time)
+    next_retry_at: float | None = None
+    retrying: bool = False
+
+
+class DeadLetterQueue(metaclass=Singleton):
+    """Failed outbound deliveries retried with exponential backoff.
+
+    Letters are kept in memory. Alert video files are moved to the dead letter
+    directory along with a JSON manifest, so they survive restart and are
+    retried again after it.
+    """
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._conf = main_conf.outbound.dead_letter
+        self._letter_ids = count(1)
+        self._letters: dict[int, DeadLetter] = {}
+        self._changed = asyncio.Event()
+
+    def add(
+        self,
+        description: str,
+        retry_func: RetryFunc,
+        error: str,
+        *,
+        discard_func: Callable[[], None] | None = None,
+        event: OutboundEvent | None = None,
+        manifest_path: Path | None = None,
+        attempts: int = 1,
+    ) -> DeadLetter:
+        letter = DeadLetter(
+            letter_id=next(self._letter_ids),
+            description=description,
+            retry_func=retry_func,
+            error=error,
+            discard_func=discard_func,
+            event=event,
+            manifest_path=manifest_path,
+            attempts=attempts,
+        )
+        self._letters[letter.letter_id] = letter
+        self._schedule(letter)
+        self._log.warning(
+            'Dead letter #%d "%s" added after %d attempts: %s',
+            letter.letter_id,
+            letter.description,
+            letter.attempts,
+            letter.error,
+        )
+        self._evict()
+        self._changed.set()
+        return letter
+
+    async def add_event(
+        self, event: OutboundEvent, error: Exception, dispatch_func: DispatchFunc
+    ) -> DeadLetter:
+        """Add failed outbound event to be dispatched again with `dispatch_func`."""
+        video_event = event if isinstance(event, VideoOutboundEvent) else None
+        manifest_path: Path | None = None
+        if video_event and video_event.event is EventType.ALERT_VIDEO:
+            manifest_path = await asyncio.to_thread(self._move_event_files, video_event)
+        letter = self.add(
+            description=self._describe(event),
+            retry_func=partial(dispatch_func, event),
+            error=repr(error),
+            discard_func=video_event.delete_files if video_event else None,
+            event=event,
+            manifest_path=manifest_path,
+        )
+        if video_event and manifest_path:
+            await asyncio.to_thread(
+                self._save_manifest, letter, video_event, manifest_path
+            )
+        return letter
+
+    async def restore_events(
+        self, get_cam: Callable[[str], 'HikvisionCam'], dispatch_func: DispatchFunc
+    ) -> None:
+        """Restore alert video letters persisted before restart."""
+        known_paths = {letter.manifest_path for letter in self._letters.values()}
+        for manifest_path, manifest in await asyncio.to_thread(self._load_manifests):
+            # Workers may have already added letters while the bot was starting.
+            if manifest_path in known_paths:
+                continue
+            try:
+                event = VideoOutboundEvent(
+                    cam=get_cam(manifest['cam_id']),
+                    event=EventType.ALERT_VIDEO,
+                    message=None,
+                    file_size=manifest['file_size'],
+                    thumb_path=(
+                        Path(manifest['thumb_path']) if manifest['thumb_path'] else None
+                    ),
+                    video_path=Path(manifest['video_path']),
+                    video_duration=manifest['video_duration'],
+                    video_height=manifest['video_height'],
+                    video_width=manifest['video_width'],
+                    create_ts=manifest['create_ts'],
+                    recipients=manifest['recipients'],
+                )
+            except Exception:
+                self._log.exception(
+                    'Failed to restore dead letter from %s, dropping it', manifest_path
+                )
+                self._delete_persisted(manifest_path, manifest)
+                continue
+            letter = self.add(
+                description=self._describe(event),
+                retry_func=partial(dispatch_func, event),
+                error=manifest['error'],
+                discard_func=event.delete_files,
+                event=event,
+                manifest_path=manifest_path,
+                attempts=manifest['attempts'],
+            )
+            letter.created_at = manifest['created_at']
+
+    async def wait_due(self) -> list[DeadLetter]:
+        """Wait until some letters are due for retry and return them."""
+        while True:
+            self._changed.clear()
+            now = time.monotonic()
+            due_letters = sorted(
+                (
+                    letter
+                    for letter in self._letters.values()
+                    if not letter.retrying
+                    and letter.next_retry_at is not None
+                    and letter.next_retry_at <= now
+                ),
+                # Due letters always have retry time.
+                key=lambda letter_: letter_.next_retry_at or now,
+            )
+            if due_letters:
+                return due_letters
+            with suppress(TimeoutError):
+                await asyncio.wait_for(
+                    self._changed.wait(), timeout=self._get_next_retry_delay(now)
+                )
+
+    async def retry(self, letter: DeadLetter) -> bool:
+        if letter.letter_id not in self._letters or letter.retrying:
+            return False
+        letter.retrying = True
+        try:
+            await letter.retry_func()
+        except Exception as err:
+            letter.attempts += 1
+            letter.error = repr(err)
+            self._log.warning(
+                'Dead letter #%d "%s" retry %d failed: %s',
+                letter.letter_id,
+                letter.description,
+                letter.attempts,
+                letter.error,
+            )
+            self._schedule(letter)
+            if letter.manifest_path and isinstance(letter.event, VideoOutboundEvent):
+                await asyncio.to_thread(
+                    self._save_manifest, letter, letter.event, letter.manifest_path
+                )
+            return False
+        finally:
+            letter.retrying = False
+
+        self._log.info(
+            'Dead letter #%d "%s" delivered after %d attempts',
+            letter.letter_id,
+            letter.description,
+            letter.attempts + 1,
+        )
+        self._remove(letter)
+        return True
+
+    def replay(self, letter_id: int | None = None) -> int:
+        """Retry letter or all letters right away, even exhausted ones."""
+        now = time.monotonic()
+        replayed = 0
+        for letter in self._select(letter_id):
+            letter.next_retry_at = now
+            replayed += 1
+        self._changed.set()
+        return replayed
+
+    def discard(self, letter_id: int | None = None) -> int:
+        """Drop letter or all letters with their files."""
+        letters = self._select(letter_id)
+        for letter in letters:
+            self._log.info(
+                'Discarding dead letter #%d "%s"', letter.letter_id, letter.description
+            )
+            if letter.discard_func:
+                letter.discard_func()
+            self._remove(letter)
+        return len(letters)
+
+    def get_letters(self) -> list[DeadLetter]:
+        return list(self._letters.values())
+
+    def get_retry_delay(self, letter: DeadLetter) -> float | None:
+        if letter.next_retry_at is None:
+            return None
+        return max(letter.next_retry_at - time.monotonic(), 0.0)
+
+    def _select(self, letter_id: int | None) -> list[DeadLetter]:
+        """Select letters which are not being retried right now."""
+        if letter_id is None:
+            letters = list(self._letters.values())
+        else:
+            letters = [self._letters[letter_id]] if letter_id in self._letters else []
+        return [letter for letter in letters if not letter.retrying]
+
+    def _schedule(self, letter: DeadLetter) -> None:
+        if letter.attempts >= self._conf.max_attempts:
+            letter.next_retry_at = None
+            self._log.error(
+                'Dead letter #%d "%s" is not retried anymore after %d attempts',
+                letter.letter_id,
+                letter.description,
+                letter.attempts,
+            )
+            return
+        delay = min(
+            self._conf.backoff_base * 2 ** (letter.attempts - 1),
+            self._conf.backoff_max,
+        )
+        letter.next_retry_at = time.monotonic() + delay
+
+    def _get_next_retry_delay(self, now: float) -> float | None:
+        retry_times = [
+            letter.next_retry_at
+            for letter in self._letters.values()
+            if not letter.retrying and letter.next_retry_at is not None
+        ]
+        return max(min(retry_times) - now, 0.0) if retry_times else None
+
+    def _evict(self) -> None:
+        overflow = len(self._letters) - self._conf.max_entries
+        for letter in self._select(letter_id=None)[: max(overflow, 0)]:
+            self._log.warning(
+                'Too many dead letters, dropping the oldest #%d "%s"',
+                letter.letter_id,
+                letter.description,
+            )
+            self.discard(letter.letter_id)
+
+    def _remove(self, letter: DeadLetter) -> None:
+        self._letters.pop(letter.letter_id, None)
+        if letter.manifest_path:
+            letter.manifest_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _describe(event: OutboundEvent) -> str:
+        cam = getattr(event, 'cam', None)
+        return f'[{cam.id}] {event.event.value}' if cam else event.event.value
+
+    def _move_event_files(self, event: VideoOutboundEvent) -> Path:
+        self._conf.path.mkdir(parents=True, exist_ok=True)
+        event.video_path = Path(
+            shutil.move(event.video_path, self._conf.path / event.video_path.name)
+        )
+        if event.thumb_path:
+            event.thumb_path = Path(
+                shutil.move(event.thumb_path, self._conf.path / event.thumb_path.name)
+            )
+        return self._conf.path / f'{event.video_path.stem}.json'
+
+    @staticmethod
+    def _save_manifest(
+        letter: DeadLetter, event: VideoOutboundEvent, manifest_path: Path
+    ) -> None:
+        manifest: dict[str, Any] = {
+            'cam_id': event.cam.id,
+            'file_size': event.file_size,
+            'thumb_path': event.thumb_path.as_posix() if event.thumb_path else None,
+            'video_path': event.video_path.as_posix(),
+            'video_duration': event.video_duration,
+            'video_height': event.video_height,
+            'video_width': event.video_width,
+            'create_ts': event.create_ts,
+            'recipients': event.recipients,
+            'error': letter.error,
+            'attempts': letter.attempts,
+            'created_at': letter.created_at,
+        }
+        tmp_path = manifest_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(manifest))
+        tmp_path.replace(manifest_path)
+
+    @staticmethod
+    def _delete_persisted(manifest_path: Path, manifest: dict[str, Any]) -> None:
+        for key in ('video_path', 'thumb_path'):
+            if path := manifest.get(key):
+                Path(path).unlink(missing_ok=True)
+        manifest_path.unlink(missing_ok=True)
+
+    def _load_manifests(self) -> list[tuple[Path, dict[str, Any]]]:
+        if not self._conf.path.is_dir():
+            return []
+        manifests: list[tuple[Path, dict[str, Any]]] = []
+        for manifest_path in sorted(self._conf.path.glob('*.json')):
+            try:
+                manifests.append((manifest_path, json.loads(manifest_path.read_text())))
+            except Exception:
+                self._log.exception('Failed to read dead letter %s', manifest_path)
+        return manifests
+
+
+def get_dead_letter_queue() -> DeadLetterQueue:
+    return DeadLetterQueue()
@@ -12,7 +12,12 @@ class AbstractDispatcher(ABC):
     def __init__(self, bot: 'CameraBot') -> None:
         self._log = logging.getLogger(self.__class__.__name__)
         self._bot = bot
-        self._dispatch = {k: v(self._bot) for k, v in self.DISPATCH.items()}
+        # Event types of one handler class share its instance and state.
+        handlers = {
+            handler_cls: handler_cls(self._bot)
+            for handler_cls in set(self.DISPATCH.values())
+        }
+        self._dispatch = {k: handlers[v] for k, v in self.DISPATCH.items()}
 
     @abstractmethod
     async def dispatch(self, data: dict) -> None:
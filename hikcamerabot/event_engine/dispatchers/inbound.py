@@ -9,6 +9,7 @@ from hikcamerabot.event_engine.handlers.inbound import (
     AbstractTaskEvent,
     TaskAlarmConf,
     TaskDetectionConf,
+    TaskDvrClip,
     TaskIrcutFilterConf,
     TaskRecordVideoGif,
     TaskStreamConf,
@@ -23,6 +24,7 @@ class InboundEventDispatcher(AbstractDispatcher):
         EventType.CONFIGURE_ALARM: TaskAlarmConf,
         EventType.CONFIGURE_DETECTION: TaskDetectionConf,
         EventType.CONFIGURE_IRCUT_FILTER: TaskIrcutFilterConf,
+        EventType.DVR_CLIP: TaskDvrClip,
         EventType.STREAM: TaskStreamConf,
         EventType.TAKE_SNAPSHOT: TaskTakeSnapshot,
         EventType.RECORD_VIDEOGIF: TaskRecordVideoGif,
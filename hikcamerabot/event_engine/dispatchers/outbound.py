@@ -4,7 +4,6 @@ from typing import ClassVar
 
 from hikcamerabot.enums import EventType
 from hikcamerabot.event_engine.dispatchers.abstract import AbstractDispatcher
-from hikcamerabot.event_engine.events.abstract import BaseOutboundEvent
 from hikcamerabot.event_engine.handlers.outbound import (
     AbstractResultEventHandler,
     ResultAlarmConfHandler,
@@ -16,12 +15,14 @@ from hikcamerabot.event_engine.handlers.outbound import (
     ResultStreamConfHandler,
     ResultTakeSnapshotHandler,
 )
+from hikcamerabot.event_engine.queue import OutboundEvent
 
 
 class OutboundEventDispatcher(AbstractDispatcher):
     """Outbound (Result) Dispatcher Class."""
 
     DISPATCH: ClassVar[dict[EventType, AbstractResultEventHandler]] = {
+        EventType.ALERT_ALBUM: ResultAlertSnapshotHandler,
         EventType.ALERT_SNAPSHOT: ResultAlertSnapshotHandler,
         EventType.ALERT_VIDEO: ResultAlertVideoHandler,
         EventType.CONFIGURE_ALARM: ResultAlarmConfHandler,
@@ -30,9 +31,15 @@ class OutboundEventDispatcher(AbstractDispatcher):
         EventType.STREAM: ResultStreamConfHandler,
         EventType.TAKE_SNAPSHOT: ResultTakeSnapshotHandler,
         EventType.RECORD_VIDEOGIF: ResultRecordVideoGifHandler,
+        EventType.DVR_CLIP: ResultRecordVideoGifHandler,
     }
 
-    async def dispatch(self, event: BaseOutboundEvent) -> None:
+    async def dispatch(self, event: OutboundEvent) -> None:
         """Dispatch outbound event to appropriate handler."""
         self._log.debug('Outbound event: "%s"', event)
         await self._dispatch[event.event].handle(event)
+
+    async def close(self) -> None:
+        """Close handlers so they put their pending events to the result queue."""
+        for handler in set(self._dispatch.values()):
+            await handler.close()
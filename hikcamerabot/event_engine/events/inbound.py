@@ -20,6 +20,12 @@ class GetVideoEvent(BaseInboundEvent):
     rewind: bool
 
 
+@dataclass
+class DvrClipEvent(BaseInboundEvent):
+    start_ts: float
+    end_ts: float
+
+
 @dataclass
 class DetectionConfEvent(BaseInboundEvent):
     type: DetectionType
@@ -32,6 +32,13 @@ class VideoOutboundEvent(BaseOutboundEvent, FileSizeMixin):
     video_height: int
     video_width: int
     create_ts: int
+    # Chats to send the alert to, all alert users when not set.
+    recipients: list[int] | None = None
+
+    def delete_files(self) -> None:
+        self.video_path.unlink(missing_ok=True)
+        if self.thumb_path:
+            self.thumb_path.unlink(missing_ok=True)
 
 
 @dataclass
@@ -41,6 +48,15 @@ class AlertSnapshotOutboundEvent(BaseOutboundEvent, FileSizeMixin):
     resized: bool
     detection_type: DetectionType
     alert_count: int
+    # Chats to send the alert to, all alert users when not set.
+    recipients: list[int] | None = None
+
+
+@dataclass
+class AlertAlbumOutboundEvent(BaseOutboundEvent):
+    """Batch of alert snapshots to send as one album."""
+
+    snapshots: list[AlertSnapshotOutboundEvent]
 
 
 @dataclass
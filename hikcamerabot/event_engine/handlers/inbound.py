@@ -10,6 +10,7 @@ from hikcamerabot.event_engine.events.abstract import BaseInboundEvent
 from hikcamerabot.event_engine.events.inbound import (
     AlertConfEvent,
     DetectionConfEvent,
+    DvrClipEvent,
     GetPicEvent,
     GetVideoEvent,
     IrcutConfEvent,
@@ -24,27 +25,29 @@ from hikcamerabot.event_engine.events.outbound import (
 )
 from hikcamerabot.event_engine.queue import get_result_queue
 from hikcamerabot.exceptions import ServiceRuntimeError
+from hikcamerabot.services.stream.dvr.clip import DvrClipTask
 from hikcamerabot.utils.shared import bold
+from hikcamerabot.utils.task import create_task
 
 if TYPE_CHECKING:
     from hikcamerabot.camerabot import CameraBot
 
 
-class AbstractTaskEvent(ABC):
+class AbstractTaskEvent[EventT: BaseInboundEvent](ABC):
     def __init__(self, bot: 'CameraBot') -> None:
         self._log = logging.getLogger(self.__class__.__name__)
         self._bot = bot
         self._result_queue = get_result_queue()
 
-    async def handle(self, event: BaseInboundEvent) -> None:
+    async def handle(self, event: EventT) -> None:
         return await self._handle(event)
 
     @abstractmethod
-    async def _handle(self, event: BaseInboundEvent) -> None:
+    async def _handle(self, event: EventT) -> None:
         pass
 
 
-class TaskTakeSnapshot(AbstractTaskEvent):
+class TaskTakeSnapshot(AbstractTaskEvent[GetPicEvent]):
     async def _handle(self, event: GetPicEvent) -> None:
         cam = event.cam
         channel = cam.conf.picture.on_demand.channel
@@ -79,14 +82,30 @@ class TaskTakeSnapshot(AbstractTaskEvent):
         )
 
 
-class TaskRecordVideoGif(AbstractTaskEvent):
+class TaskRecordVideoGif(AbstractTaskEvent[GetVideoEvent]):
     async def _handle(self, event: GetVideoEvent) -> None:
         await event.cam.start_videogif_record(
             message=event.message, rewind=event.rewind
         )
 
 
-class TaskDetectionConf(AbstractTaskEvent):
+class TaskDvrClip(AbstractTaskEvent[DvrClipEvent]):
+    async def _handle(self, event: DvrClipEvent) -> None:
+        create_task(
+            DvrClipTask(
+                cam=event.cam,
+                start_ts=event.start_ts,
+                end_ts=event.end_ts,
+                message=event.message,
+            ).run(),
+            task_name=DvrClipTask.__name__,
+            logger=self._log,
+            exception_message='Task "%s" raised an exception',
+            exception_message_args=(DvrClipTask.__name__,),
+        )
+
+
+class TaskDetectionConf(AbstractTaskEvent[DetectionConfEvent]):
     async def _handle(self, event: DetectionConfEvent) -> None:
         cam = event.cam
         trigger = event.type
@@ -111,7 +130,7 @@ class TaskDetectionConf(AbstractTaskEvent):
         )
 
 
-class TaskAlarmConf(AbstractTaskEvent):
+class TaskAlarmConf(AbstractTaskEvent[AlertConfEvent]):
     async def _handle(self, event: AlertConfEvent) -> None:
         cam = event.cam
         service_type = event.service_type
@@ -139,7 +158,7 @@ class TaskAlarmConf(AbstractTaskEvent):
         )
 
 
-class TaskStreamConf(AbstractTaskEvent):
+class TaskStreamConf(AbstractTaskEvent[StreamEvent]):
     async def _handle(self, event: StreamEvent) -> None:
         self._log.info('Starting stream')
         cam = event.cam
@@ -168,7 +187,7 @@ class TaskStreamConf(AbstractTaskEvent):
         )
 
 
-class TaskIrcutFilterConf(AbstractTaskEvent):
+class TaskIrcutFilterConf(AbstractTaskEvent[IrcutConfEvent]):
     async def _handle(self, event: IrcutConfEvent) -> None:
         await event.cam.set_ircut_filter(filter_type=event.filter_type)
         await self._result_queue.put(
@@ -2,19 +2,34 @@
 
 import logging
 from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from copy import copy
+from functools import partial
 from io import BytesIO
+from itertools import groupby
+from operator import attrgetter
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-from emoji import emojize
 from pyrogram.enums import ChatAction
-from pyrogram.types import Message
-from tenacity import retry, stop_after_attempt, wait_fixed
-
+from pyrogram.types import InputMediaDocument, InputMediaPhoto, Message
+
+from hikcamerabot.common.telegram import (
+    CacheableMedia,
+    MediaFanOut,
+    RecipientDelivery,
+    get_file_id_cache,
+    get_telegram_sender,
+    get_upload_service,
+)
+from hikcamerabot.config.config import main_conf
 from hikcamerabot.constants import DETECTION_SWITCH_MAP
-from hikcamerabot.event_engine.events.abstract import BaseOutboundEvent
+from hikcamerabot.enums import EventType, TelegramMediaType
+from hikcamerabot.event_engine.batcher import EventBatcher
+from hikcamerabot.event_engine.dead_letter import get_dead_letter_queue
 from hikcamerabot.event_engine.events.outbound import (
     AlarmConfOutboundEvent,
+    AlertAlbumOutboundEvent,
     AlertSnapshotOutboundEvent,
     DetectionConfOutboundEvent,
     SendTextOutboundEvent,
@@ -22,6 +37,8 @@ from hikcamerabot.event_engine.events.outbound import (
     StreamOutboundEvent,
     VideoOutboundEvent,
 )
+from hikcamerabot.event_engine.queue import OutboundEvent, get_result_queue
+from hikcamerabot.exceptions import OutboundDeliveryError
 from hikcamerabot.utils.shared import bold, format_ts, send_text
 
 if TYPE_CHECKING:
@@ -32,166 +49,324 @@ class AbstractResultEventHandler(ABC):
     def __init__(self, bot: 'CameraBot') -> None:
         self._log = logging.getLogger(self.__class__.__name__)
         self._bot = bot
+        self._sender = get_telegram_sender()
+        self._file_cache = get_file_id_cache()
+        self._uploader = get_upload_service()
 
-    async def handle(self, event: BaseOutboundEvent) -> None:
+    async def handle(self, event: OutboundEvent) -> None:
         await self._handle(event=event)
 
+    async def close(self) -> None:  # noqa: B027
+        """Release handler resources before shutdown."""
+
     @abstractmethod
-    async def _handle(self, event: BaseOutboundEvent) -> None:
+    async def _handle(self, event: OutboundEvent) -> None:
         pass
 
+    async def _reply_text(self, message: Message, text: str, **kwargs) -> None:
+        await self._sender.send(
+            message.chat.id,
+            partial(send_text, text=text, message=message, quote=True, **kwargs),
+        )
+
+    async def _send_media(
+        self,
+        chat_id: int,
+        media: CacheableMedia,
+        media_type: TelegramMediaType,
+        send_method: Callable[..., Awaitable[Message | None]],
+        /,
+        **kwargs,
+    ) -> Message | None:
+        """Send media with `send_method` by cached file id or upload it.
+
+        Media is passed to `send_method` as keyword argument named after media
+        type, e.g. `video` for `send_video`. Local files are uploaded by the
+        upload service before sending, and then sent by their path.
+        """
+
+        async def send(media_: CacheableMedia) -> Message | None:
+            if isinstance(media_, Path):
+                async with self._uploader.upload(self._bot, media_):
+                    return await self._sender.send(
+                        chat_id,
+                        partial(
+                            send_method,
+                            **{media_type.value: media_.as_posix()},
+                            **kwargs,
+                        ),
+                    )
+            return await self._sender.send(
+                chat_id, partial(send_method, **{media_type.value: media_}, **kwargs)
+            )
+
+        return await self._file_cache.send(media, media_type, send)
+
+    @staticmethod
+    def _check_deliveries(
+        deliveries: list[RecipientDelivery],
+        *events: VideoOutboundEvent | AlertSnapshotOutboundEvent,
+    ) -> None:
+        """Leave only failed recipients in alert events and raise to retry them."""
+        failed = [delivery for delivery in deliveries if not delivery.ok]
+        if not failed:
+            return
+        recipients = [delivery.chat_id for delivery in failed]
+        for event in events:
+            event.recipients = recipients
+        raise OutboundDeliveryError(
+            f'Failed to deliver to chats {recipients}'
+        ) from failed[0].error
+
 
 class ResultAlertVideoHandler(AbstractResultEventHandler):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
-        self._video_file_cache: dict[Path, str] = {}
+        self._fan_out = MediaFanOut()
 
     async def _handle(self, event: VideoOutboundEvent) -> None:
-        try:
-            await self.__handle(event)
-        finally:
-            self._cleanup()
-
-    def _cleanup(self) -> None:
-        self._video_file_cache.clear()
-
-    async def __handle(self, event: VideoOutboundEvent) -> None:
-        cam = event.cam
-        caption = (
-            f'{emojize(":rotating_light:", language="alias")} '
-            f'Alert video from {cam.description} {cam.hashtag}\n/cmds_{cam.id}, '
-            f'/list_cams'
+        caption = event.cam.captions.alert_video
+        deliveries = await self._fan_out.send(
+            chat_ids=event.recipients or self._bot.alert_users,
+            media=event.video_path,
+            send_func=partial(self._send_video, event=event, caption=caption),
+            get_reusable_media=lambda message: (
+                message.video.file_id if message.video else None
+            ),
         )
-        try:
-            # Simple for loop because video cache will be used.
-            for uid in self._bot.alert_users:
-                await self._send_video(uid, event, caption)
-        finally:
-            event.video_path.unlink()
-            if event.thumb_path:
-                event.thumb_path.unlink()
-
-    @retry(wait=wait_fixed(0.5), stop=stop_after_attempt(10))
-    async def _send_video(
-        self, uid: int, event: VideoOutboundEvent, caption: str
-    ) -> None:
-        try:
-            file_, is_cached = self._get_file(event.video_path)
-            await self._bot.send_chat_action(
-                chat_id=uid, action=ChatAction.UPLOAD_VIDEO
-            )
-            message = await self._bot.send_video(
-                chat_id=uid,
-                caption=caption,
-                video=str(file_),
-                duration=event.video_duration,
-                height=event.video_height,
-                width=event.video_width,
-                thumb=event.thumb_path,
-                supports_streaming=True,
-            )
-            self._log.debug('Debug context message: %s', message)
-            if message and message.video and not is_cached:
-                self._video_file_cache[event.video_path] = message.video.file_id
-        except Exception:
-            self._log.exception(
-                'Failed to send video in %s. Retrying', self.__class__.__name__
-            )
-            raise
+        self._check_deliveries(deliveries, event)
+        event.delete_files()
 
-    def _get_file(self, video_path: Path) -> tuple[str | Path, bool]:
-        """Get str file id from cache or `InputFile` from video path.
-        Indicate whether file is cached or not.
-        """
-        self._log.debug('Video cache: %s', self._video_file_cache)
-        try:
-            return self._video_file_cache[video_path], True
-        except KeyError:
-            return video_path, False
+    async def _send_video(
+        self, uid: int, video: Path | str, event: VideoOutboundEvent, caption: str
+    ) -> Message | None:
+        """Send video by its path or file id of already uploaded one."""
+        await self._bot.send_chat_action(chat_id=uid, action=ChatAction.UPLOAD_VIDEO)
+        message = await self._send_media(
+            uid,
+            video,
+            TelegramMediaType.VIDEO,
+            self._bot.send_video,
+            chat_id=uid,
+            caption=caption,
+            duration=event.video_duration,
+            height=event.video_height,
+            width=event.video_width,
+            thumb=event.thumb_path,
+            supports_streaming=True,
+        )
+        self._log.debug('Debug context message: %s', message)
+        return message
 
 
 class ResultRecordVideoGifHandler(AbstractResultEventHandler):
     """Requested record of video result handler."""
 
     async def _handle(self, event: VideoOutboundEvent) -> None:
-        try:
-            await self._upload_video(event)
-        finally:
-            event.video_path.unlink()
-            if event.thumb_path:
-                event.thumb_path.unlink()
-
-    @retry(wait=wait_fixed(0.5), stop=stop_after_attempt(10))
+        await self._upload_video(event)
+        event.delete_files()
+
     async def _upload_video(self, event: VideoOutboundEvent) -> None:
-        try:
-            cam = event.cam
-            message = event.message
-            caption = (
-                f'📷 {bold("Camera:")} [{cam.id}] {cam.description}\n'
-                f'🗓️ {bold("Date:")} {format_ts(event.create_ts)}\n'
-                f'#️⃣ {bold("Hashtag:")} {cam.hashtag}\n'
-                f'📏 {bold("Size:")} {event.file_size_human()}\n'
-                f'🤖 {bold("Commands:")} /cmds_{cam.id}, /list_cams'
-            )
-            await self._bot.send_chat_action(
-                message.chat.id, action=ChatAction.UPLOAD_VIDEO
-            )
-            await self._bot.send_video(
-                message.chat.id,
-                caption=caption,
-                video=str(event.video_path),
-                duration=event.video_duration,
-                height=event.video_height,
-                width=event.video_width,
-                thumb=event.thumb_path,
-                supports_streaming=True,
-                reply_to_message_id=message.id,
-            )
-        except Exception:
-            self._log.exception('Failed to upload video. Retrying')
-            raise
+        cam = event.cam
+        message = event.message
+        caption = cam.captions.video(
+            date=format_ts(event.create_ts), size=event.file_size_human()
+        )
+        chat_id = message.chat.id
+        await self._bot.send_chat_action(chat_id, action=ChatAction.UPLOAD_VIDEO)
+        await self._send_media(
+            chat_id,
+            event.video_path,
+            TelegramMediaType.VIDEO,
+            self._bot.send_video,
+            chat_id=chat_id,
+            caption=caption,
+            duration=event.video_duration,
+            height=event.video_height,
+            width=event.video_width,
+            thumb=event.thumb_path,
+            supports_streaming=True,
+            reply_to_message_id=message.id,
+        )
 
 
 class ResultAlertSnapshotHandler(AbstractResultEventHandler):
-    async def _handle(self, event: AlertSnapshotOutboundEvent) -> None:
-        cam = event.cam
+    """Alert snapshot handler.
+
+    Snapshots of near-simultaneous alerts are batched and sent as albums to
+    reduce the number of Telegram API calls. Batches are put back to the result
+    queue as album events, so they are delivered through the bounded photo
+    lane and drained on shutdown.
+    """
+
+    ALBUM_MAX_SIZE: int = 10
+    ALBUM_CAPTION_MAX_LENGTH: int = 1024
 
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._fan_out = MediaFanOut()
+        album_conf = main_conf.outbound.alert_album
+        self._batcher: EventBatcher[AlertSnapshotOutboundEvent] | None = (
+            EventBatcher(
+                window=album_conf.window,
+                max_size=self.ALBUM_MAX_SIZE,
+                flush_func=self._put_album,
+            )
+            if album_conf.enabled
+            else None
+        )
+
+    async def close(self) -> None:
+        if self._batcher:
+            await self._batcher.close()
+
+    async def _handle(
+        self, event: AlertSnapshotOutboundEvent | AlertAlbumOutboundEvent
+    ) -> None:
+        if isinstance(event, AlertAlbumOutboundEvent):
+            await self._send_snapshots(event.snapshots)
+        # Retried events are sent right away to their failed recipients only.
+        elif self._batcher and not self._batcher.closed and event.recipients is None:
+            self._batcher.add(event)
+        else:
+            await self._send_snapshot(event)
+
+    @staticmethod
+    async def _put_album(events: list[AlertSnapshotOutboundEvent]) -> None:
+        await get_result_queue().put(
+            AlertAlbumOutboundEvent(
+                cam=events[0].cam,
+                event=EventType.ALERT_ALBUM,
+                message=None,
+                snapshots=events,
+            )
+        )
+
+    async def _send_snapshots(self, events: list[AlertSnapshotOutboundEvent]) -> None:
+        # Photos and documents can't be mixed in one album.
+        for _, group in groupby(events, key=attrgetter('resized')):
+            group_events = list(group)
+            try:
+                if len(group_events) == 1:
+                    await self._send_snapshot(group_events[0])
+                else:
+                    await self._send_album(group_events)
+            except Exception as err:
+                # Retry snapshots one by one instead of the whole album event.
+                self._log.exception('Failed to send alert snapshots')
+                for event in group_events:
+                    await get_dead_letter_queue().add_event(event, err, self.handle)
+
+    async def _send_snapshot(self, event: AlertSnapshotOutboundEvent) -> None:
         datetime_str = format_ts(event.ts)
-        detection_type = event.detection_type
-        alert_count = event.alert_count
-        resized = event.resized
-        photo = event.img
-        trigger_name: str = DETECTION_SWITCH_MAP[detection_type]['name'].value
-
-        caption = (
-            f'[{cam.description}] {trigger_name} on {datetime_str} '
-            f'(alert #{alert_count}) {cam.hashtag}\n/cmds_{cam.id}, /list_cams'
+        caption = event.cam.captions.alert_snapshot(
+            detection_type=event.detection_type,
+            date=datetime_str,
+            alert_count=event.alert_count,
         )
 
-        async def send_document(photo_: BytesIO | str) -> Message:
-            return await self._bot.send_document(
+        async def send_document(uid: int, photo_: BytesIO | str) -> Message | None:
+            return await self._send_media(
+                uid,
+                photo_,
+                TelegramMediaType.DOCUMENT,
+                self._bot.send_document,
                 chat_id=uid,
-                document=photo_,
                 file_name=f'Full_alert_snapshot_{datetime_str}.jpg',
                 caption=caption,
             )
 
-        async def send_photo(photo_: BytesIO | str) -> Message:
-            return await self._bot.send_photo(
-                chat_id=uid, photo=photo_, caption=caption
+        async def send_photo(uid: int, photo_: BytesIO | str) -> Message | None:
+            return await self._send_media(
+                uid,
+                photo_,
+                TelegramMediaType.PHOTO,
+                self._bot.send_photo,
+                chat_id=uid,
+                caption=caption,
             )
 
-        cached_id: str | None = None
-        for uid in self._bot.alert_users:
-            try:
-                if resized:
-                    message = await send_photo(cached_id or photo)
-                    cached_id = message.photo.file_id
-                else:
-                    message = await send_document(cached_id or photo)
-                    cached_id = message.document.file_id
-            except Exception:
-                self._log.exception('Failed to send message to user ID %s', uid)
+        chat_ids = event.recipients or self._bot.alert_users
+        if event.resized:
+            deliveries = await self._fan_out.send(
+                chat_ids=chat_ids,
+                media=event.img,
+                send_func=send_photo,
+                get_reusable_media=lambda message: (
+                    message.photo.file_id if message.photo else None
+                ),
+            )
+        else:
+            deliveries = await self._fan_out.send(
+                chat_ids=chat_ids,
+                media=event.img,
+                send_func=send_document,
+                get_reusable_media=lambda message: (
+                    message.document.file_id if message.document else None
+                ),
+            )
+        self._check_deliveries(deliveries, event)
+
+    async def _send_album(self, events: list[AlertSnapshotOutboundEvent]) -> None:
+        """Send snapshots as one album with combined caption on the first item."""
+        caption = '\n'.join(
+            [
+                *(self._format_alert_line(event) for event in events),
+                '/list_cams',
+            ]
+        )[: self.ALBUM_CAPTION_MAX_LENGTH]
+        media: list[InputMediaPhoto | InputMediaDocument] = []
+        for idx, event in enumerate(events):
+            item_caption = caption if idx == 0 else ''
+            if event.resized:
+                media.append(InputMediaPhoto(event.img, caption=item_caption))
+            else:
+                media.append(
+                    InputMediaDocument(
+                        event.img,
+                        caption=item_caption,
+                        file_name=f'Full_alert_snapshot_{format_ts(event.ts)}.jpg',
+                    )
+                )
+
+        async def send_media_group(
+            uid: int, media_: list[InputMediaPhoto | InputMediaDocument]
+        ) -> list[Message]:
+            return await self._sender.send(
+                uid, lambda: self._bot.send_media_group(chat_id=uid, media=[*media_])
+            )
+
+        self._log.info('Sending album of %d alert snapshots', len(events))
+        deliveries = await self._fan_out.send(
+            chat_ids=self._bot.alert_users,
+            media=media,
+            send_func=send_media_group,
+            get_reusable_media=partial(self._make_reusable_album, media),
+        )
+        self._check_deliveries(deliveries, *events)
+
+    @staticmethod
+    def _make_reusable_album(
+        media: list[InputMediaPhoto | InputMediaDocument], messages: list[Message]
+    ) -> list[InputMediaPhoto | InputMediaDocument] | None:
+        """Replace uploaded album items with file ids of sent messages."""
+        reusable_media: list[InputMediaPhoto | InputMediaDocument] = []
+        for item, message in zip(media, messages, strict=False):
+            uploaded = message.photo or message.document
+            if not uploaded:
+                return None
+            item_copy = copy(item)
+            item_copy.media = uploaded.file_id
+            reusable_media.append(item_copy)
+        return reusable_media if len(reusable_media) == len(media) else None
+
+    @staticmethod
+    def _format_alert_line(event: AlertSnapshotOutboundEvent) -> str:
+        return event.cam.captions.alert_snapshot_line(
+            detection_type=event.detection_type,
+            date=format_ts(event.ts),
+            alert_count=event.alert_count,
+        )
 
 
 class ResultStreamConfHandler(AbstractResultEventHandler):
@@ -202,7 +377,7 @@ class ResultStreamConfHandler(AbstractResultEventHandler):
         text: str = event.text or '{} stream successfully {}'.format(
             stream_type.value.capitalize(), 'enabled' if state else 'disabled'
         )
-        await send_text(text=bold(text), message=message, quote=True)
+        await self._reply_text(message, bold(text))
         self._log.info(text)
 
 
@@ -212,9 +387,7 @@ class ResultSendTextHandler(AbstractResultEventHandler):
         parse_mode = event.parse_mode
         message = event.message
         if message:
-            await send_text(
-                text=text, message=message, quote=True, parse_mode=parse_mode
-            )
+            await self._reply_text(message, text, parse_mode=parse_mode)
         else:
             await self._bot.send_alert_message(text, parse_mode=parse_mode)
 
@@ -228,7 +401,7 @@ class ResultAlarmConfHandler(AbstractResultEventHandler):
         text: str = event.text or '{} successfully {}'.format(
             service_name.value, 'enabled' if state else 'disabled'
         )
-        await send_text(text=bold(text), message=message, quote=True)
+        await self._reply_text(message, bold(text))
         self._log.info(text)
 
 
@@ -241,7 +414,7 @@ class ResultDetectionConfHandler(AbstractResultEventHandler):
         text: str = event.text or '{} successfully {}'.format(
             name, 'enabled' if state else 'disabled'
         )
-        await send_text(text=bold(text), message=message, quote=True)
+        await self._reply_text(message, bold(text))
 
 
 class ResultTakeSnapshotHandler(AbstractResultEventHandler):
@@ -254,13 +427,10 @@ class ResultTakeSnapshotHandler(AbstractResultEventHandler):
     async def _send_resized_photo(self, event: SnapshotOutboundEvent) -> None:
         cam = event.cam
         message = event.message
-        caption = (
-            f'📷 {bold("Camera:")} [{cam.id}] {cam.description}\n'
-            f'🗓️ {bold("Date:")} {format_ts(event.create_ts)}\n'
-            f'#️⃣ {bold("Hashtag:")} {cam.hashtag}\n'
-            f'🔢 {bold("Count:")} {event.taken_count}\n'
-            f'📏 {bold("Size:")} {event.file_size_human()}\n'
-            f'🤖 {bold("Commands:")} /cmds_{cam.id}, /list_cams'
+        caption = cam.captions.snapshot(
+            date=format_ts(event.create_ts),
+            count=event.taken_count,
+            size=event.file_size_human(),
         )
 
         self._log.info('[%s] Sending resized cam snapshot', cam.id)
@@ -268,7 +438,14 @@ class ResultTakeSnapshotHandler(AbstractResultEventHandler):
             chat_id=message.chat.id,
             action=ChatAction.UPLOAD_PHOTO,
         )
-        await message.reply_photo(event.img, caption=caption, quote=True)
+        await self._send_media(
+            message.chat.id,
+            event.img,
+            TelegramMediaType.PHOTO,
+            message.reply_photo,
+            caption=caption,
+            quote=True,
+        )
         self._log.info('[%s] Resized snapshot sent', cam.id)
 
     async def _send_full_photo(self, event: SnapshotOutboundEvent) -> None:
@@ -277,21 +454,19 @@ class ResultTakeSnapshotHandler(AbstractResultEventHandler):
 
         datetime_str = format_ts(event.create_ts)
         filename = f'Full snapshot {datetime_str}.jpg'
-        caption = (
-            f'📷 {bold("Camera:")} [{cam.id}] {cam.description}\n'
-            f'🗓️ {bold("Date:")} {datetime_str}\n'
-            f'#️⃣ {bold("Hashtag:")} {cam.hashtag}\n'
-            f'🔢 {bold("Count:")} {event.taken_count}\n'
-            f'📏 {bold("Size:")} {event.file_size_human()}\n'
-            f'🤖 {bold("Commands:")} /cmds_{cam.id}, /list_cams'
+        caption = cam.captions.snapshot(
+            date=datetime_str, count=event.taken_count, size=event.file_size_human()
         )
 
         self._log.info('[%s] Sending full cam snapshot', cam.id)
         await self._bot.send_chat_action(
             chat_id=message.chat.id, action=ChatAction.UPLOAD_PHOTO
         )
-        await message.reply_document(
-            document=event.img,
+        await self._send_media(
+            message.chat.id,
+            event.img,
+            TelegramMediaType.DOCUMENT,
+            message.reply_document,
             caption=caption,
             quote=True,
             file_name=filename,
@@ -303,39 +478,28 @@ class ResultTimelapseHandler(AbstractResultEventHandler):
     """Timelapse video upload handler."""
 
     async def _handle(self, event: VideoOutboundEvent) -> None:
-        try:
-            await self._upload_video(event)
-        finally:
-            event.video_path.unlink()
-            if event.thumb_path:
-                event.thumb_path.unlink()
-
-    @retry(wait=wait_fixed(0.5), stop=stop_after_attempt(10))
+        await self._upload_video(event)
+        event.delete_files()
+
     async def _upload_video(self, event: VideoOutboundEvent) -> None:
-        try:
-            cam = event.cam
-            message = event.message
-            caption = (
-                f'📷 {bold("Camera:")} [{cam.id}] {cam.description}\n'
-                f'🗓️ {bold("Date:")} {format_ts(event.create_ts)}\n'
-                f'#️⃣ {bold("Hashtag:")} {cam.hashtag}\n'
-                f'📏 {bold("Size:")} {event.file_size_human()}\n'
-                f'🤖 {bold("Commands:")} /cmds_{cam.id}, /list_cams'
-            )
-            await self._bot.send_chat_action(
-                message.chat.id, action=ChatAction.UPLOAD_VIDEO
-            )
-            await self._bot.send_video(
-                message.chat.id,
-                caption=caption,
-                video=str(event.video_path),
-                duration=event.video_duration,
-                height=event.video_height,
-                width=event.video_width,
-                thumb=event.thumb_path,
-                supports_streaming=True,
-                reply_to_message_id=message.id,
-            )
-        except Exception:
-            self._log.exception('Failed to upload video. Retrying')
-            raise
+        cam = event.cam
+        message = event.message
+        caption = cam.captions.video(
+            date=format_ts(event.create_ts), size=event.file_size_human()
+        )
+        chat_id = message.chat.id
+        await self._bot.send_chat_action(chat_id, action=ChatAction.UPLOAD_VIDEO)
+        await self._send_media(
+            chat_id,
+            event.video_path,
+            TelegramMediaType.VIDEO,
+            self._bot.send_video,
+            chat_id=chat_id,
+            caption=caption,
+            duration=event.video_duration,
+            height=event.video_height,
+            width=event.video_width,
+            thumb=event.thumb_path,
+            supports_streaming=True,
+            reply_to_message_id=message.id,
+        )
@@ -1,10 +1,275 @@
-from asyncio import Queue
+"""Outbound event queue with per-destination delivery lanes."""
 
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from itertools import count
+from typing import ClassVar, TypeGuard
+
+from hikcamerabot.config.config import main_conf
+from hikcamerabot.enums import EventType, OutboundLaneKind, OutboundShedReason
 from hikcamerabot.event_engine.events.abstract import BaseOutboundEvent
-from hikcamerabot.event_engine.events.outbound import SendTextOutboundEvent
+from hikcamerabot.event_engine.events.outbound import (
+    AlertAlbumOutboundEvent,
+    SendTextOutboundEvent,
+    VideoOutboundEvent,
+)
+from hikcamerabot.utils.shared import Singleton
+
+type OutboundEvent = BaseOutboundEvent | SendTextOutboundEvent
+# Chat id of the message being replied to or `None` for alert broadcasts.
+type LaneKey = tuple[int | None, OutboundLaneKind]
+
+
+@dataclass(slots=True, eq=False)
+class _QueuedEvent:
+    seq: int
+    lane_key: LaneKey
+    event: OutboundEvent
+    size: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class OutboundEventQueue(metaclass=Singleton):
+    """Bounded outbound events queue split into ordered lanes.
+
+    Events are grouped into lanes by destination chat and kind. Events of one
+    lane are delivered strictly in order one at a time, while different lanes
+    are delivered concurrently within per-kind limits. That way slow video
+    uploads don't hold up text replies and snapshots, and one chat flood
+    doesn't delay the others.
+
+    The queue is limited by number of events and size of in-memory payloads,
+    events older than max age of their kind are dropped. When the queue is
+    full, alert snapshots are shed first: older snapshots of a camera are
+    replaced by the newest one, then the oldest are dropped. Other producers
+    wait for free space.
+    """
+
+    _EVENT_LANE_KIND_MAP: ClassVar[dict[EventType, OutboundLaneKind]] = {
+        EventType.ALERT_VIDEO: OutboundLaneKind.VIDEO,
+        EventType.RECORD_VIDEOGIF: OutboundLaneKind.VIDEO,
+        EventType.DVR_CLIP: OutboundLaneKind.VIDEO,
+        EventType.SEND_TIMELAPSE: OutboundLaneKind.VIDEO,
+        EventType.ALERT_SNAPSHOT: OutboundLaneKind.PHOTO,
+        EventType.ALERT_ALBUM: OutboundLaneKind.PHOTO,
+        EventType.TAKE_SNAPSHOT: OutboundLaneKind.PHOTO,
+    }
+    # Lanes of lower value kind are delivered first.
+    _LANE_KIND_PRIORITY: ClassVar[dict[OutboundLaneKind, int]] = {
+        OutboundLaneKind.TEXT: 0,
+        OutboundLaneKind.PHOTO: 1,
+        OutboundLaneKind.VIDEO: 2,
+    }
+    _SHEDDABLE_EVENT_TYPE: ClassVar[EventType] = EventType.ALERT_SNAPSHOT
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._conf = main_conf.outbound
+        self._lanes: dict[LaneKey, deque[_QueuedEvent]] = {}
+        self._busy_lanes: set[LaneKey] = set()
+        self._active_by_kind: dict[OutboundLaneKind, int] = dict.fromkeys(
+            OutboundLaneKind, 0
+        )
+        self._in_progress: dict[int, LaneKey] = {}
+        self._seq = count()
+        self._size = 0
+        self._bytes = 0
+        self._unfinished = 0
+        self._shed_counter: Counter[tuple[EventType, OutboundShedReason]] = Counter()
+        self._cond = asyncio.Condition()
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    async def put(self, event: OutboundEvent) -> None:
+        """Put event to its lane, wait for free space when the queue is full."""
+        size = self._get_event_size(event)
+        async with self._cond:
+            self._drop_expired()
+            if self._is_full(size):
+                self._shed_alert_snapshots(event, size)
+            while self._is_full(size):
+                if self._is_sheddable(event):
+                    self._count_shed(event, OutboundShedReason.OVERFLOW)
+                    return
+                await self._cond.wait()
+                self._drop_expired()
+            self._put(event, size)
+            self._cond.notify_all()
+
+    async def get(self) -> OutboundEvent:
+        """Wait for the oldest event of the highest priority free lane."""
+        async with self._cond:
+            self._drop_expired()
+            while (lane_key := self._find_ready_lane()) is None:
+                await self._cond.wait()
+                self._drop_expired()
+            queued = self._remove(self._lanes[lane_key][0])
+            self._busy_lanes.add(lane_key)
+            self._active_by_kind[lane_key[1]] += 1
+            self._in_progress[id(queued.event)] = lane_key
+            # Wake up producers waiting for free space.
+            self._cond.notify_all()
+            return queued.event
+
+    async def task_done(self, event: OutboundEvent) -> None:
+        """Release the event lane so the next event of the lane can be taken."""
+        async with self._cond:
+            try:
+                lane_key = self._in_progress.pop(id(event))
+            except KeyError:
+                raise ValueError(f'Event {event} was not taken from queue') from None
+            self._busy_lanes.discard(lane_key)
+            self._active_by_kind[lane_key[1]] -= 1
+            self._mark_finished()
+            self._cond.notify_all()
+
+    async def join(self) -> None:
+        await self._finished.wait()
+
+    def qsize(self) -> int:
+        return self._size
+
+    def qbytes(self) -> int:
+        return self._bytes
+
+    def empty(self) -> bool:
+        return not self._size
+
+    def lanes_qsize(self) -> dict[LaneKey, int]:
+        return {key: len(lane) for key, lane in self._lanes.items()}
+
+    def get_shed_stats(self) -> dict[tuple[EventType, OutboundShedReason], int]:
+        return dict(self._shed_counter)
+
+    def _put(self, event: OutboundEvent, size: int) -> None:
+        lane_key = self._get_lane_key(event)
+        self._lanes.setdefault(lane_key, deque()).append(
+            _QueuedEvent(seq=next(self._seq), lane_key=lane_key, event=event, size=size)
+        )
+        self._size += 1
+        self._bytes += size
+        self._unfinished += 1
+        self._finished.clear()
+
+    def _remove(self, queued: _QueuedEvent) -> _QueuedEvent:
+        lane = self._lanes[queued.lane_key]
+        if lane[0] is queued:
+            lane.popleft()
+        else:
+            lane.remove(queued)
+        if not lane:
+            del self._lanes[queued.lane_key]
+        self._size -= 1
+        self._bytes -= queued.size
+        return queued
+
+    def _mark_finished(self) -> None:
+        self._unfinished -= 1
+        if not self._unfinished:
+            self._finished.set()
+
+    def _is_full(self, size: int) -> bool:
+        if not self._size:
+            # Always accept at least one event, even an oversized one.
+            return False
+        return (
+            self._size >= self._conf.queue.max_events
+            or self._bytes + size > self._conf.queue.max_bytes
+        )
+
+    def _drop_expired(self) -> None:
+        now = time.monotonic()
+        for lane_key, lane in list(self._lanes.items()):
+            max_age = self._conf.queue.max_age.get_by_kind(lane_key[1])
+            # Lane events are ordered by enqueue time.
+            while lane and now - lane[0].enqueued_at > max_age:
+                self._shed(lane[0], OutboundShedReason.EXPIRED)
+
+    def _shed_alert_snapshots(self, event: OutboundEvent, size: int) -> None:
+        """Coalesce queued alert snapshots per camera, then drop the oldest ones."""
+        snapshots = sorted(
+            (
+                (queued, queued.event)
+                for lane in self._lanes.values()
+                for queued in lane
+                if self._is_sheddable(queued.event)
+            ),
+            key=lambda item: item[0].seq,
+            reverse=True,
+        )
+        # Ids of cameras which have a newer alert snapshot queued or incoming.
+        newer_cam_ids: set[str] = set()
+        if self._is_sheddable(event):
+            newer_cam_ids.add(event.cam.id)
+        latest_snapshots: list[_QueuedEvent] = []
+        for queued, snapshot in snapshots:
+            if snapshot.cam.id in newer_cam_ids:
+                self._shed(queued, OutboundShedReason.COALESCED)
+            else:
+                newer_cam_ids.add(snapshot.cam.id)
+                latest_snapshots.append(queued)
+
+        for queued in reversed(latest_snapshots):
+            if not self._is_full(size):
+                break
+            self._shed(queued, OutboundShedReason.OVERFLOW)
+
+    @classmethod
+    def _is_sheddable(cls, event: OutboundEvent) -> TypeGuard[BaseOutboundEvent]:
+        return (
+            isinstance(event, BaseOutboundEvent)
+            and event.event is cls._SHEDDABLE_EVENT_TYPE
+        )
+
+    def _shed(self, queued: _QueuedEvent, reason: OutboundShedReason) -> None:
+        self._remove(queued)
+        self._mark_finished()
+        self._count_shed(queued.event, reason)
+        if isinstance(queued.event, VideoOutboundEvent):
+            queued.event.video_path.unlink(missing_ok=True)
+            if queued.event.thumb_path:
+                queued.event.thumb_path.unlink(missing_ok=True)
+
+    def _count_shed(self, event: OutboundEvent, reason: OutboundShedReason) -> None:
+        self._shed_counter[event.event, reason] += 1
+        self._log.warning(
+            'Shed outbound "%s" event, reason: %s. Queue size: %d events, %d bytes',
+            event.event.value,
+            reason.value,
+            self._size,
+            self._bytes,
+        )
+
+    def _find_ready_lane(self) -> LaneKey | None:
+        ready_key: LaneKey | None = None
+        ready_order: tuple[int, int] | None = None
+        for lane_key, lane in self._lanes.items():
+            if lane_key in self._busy_lanes or self._is_kind_saturated(lane_key[1]):
+                continue
+            order = (self._LANE_KIND_PRIORITY[lane_key[1]], lane[0].seq)
+            if ready_order is None or order < ready_order:
+                ready_key, ready_order = lane_key, order
+        return ready_key
+
+    def _is_kind_saturated(self, kind: OutboundLaneKind) -> bool:
+        return self._active_by_kind[kind] >= self._conf.lanes.get_by_kind(kind)
+
+    def _get_lane_key(self, event: OutboundEvent) -> LaneKey:
+        chat_id = event.message.chat.id if event.message else None
+        kind = self._EVENT_LANE_KIND_MAP.get(event.event, OutboundLaneKind.TEXT)
+        return chat_id, kind
 
-_RESULT_QUEUE = Queue()
+    @classmethod
+    def _get_event_size(cls, event: OutboundEvent) -> int:
+        """Return size of in-memory event payload like snapshot image."""
+        if isinstance(event, AlertAlbumOutboundEvent):
+            return sum(cls._get_event_size(snapshot) for snapshot in event.snapshots)
+        img = getattr(event, 'img', None)
+        return img.getbuffer().nbytes if img is not None else 0
 
 
-def get_result_queue() -> Queue[BaseOutboundEvent | SendTextOutboundEvent]:
-    return _RESULT_QUEUE
+def get_result_queue() -> OutboundEventQueue:
+    return OutboundEventQueue()
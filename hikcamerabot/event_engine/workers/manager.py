@@ -1,40 +1,86 @@
+import asyncio
 import logging
 from typing import TYPE_CHECKING
 
-from hikcamerabot.event_engine.workers.tasks import ResultWorkerTask
+from hikcamerabot.config.config import main_conf
+from hikcamerabot.event_engine.queue import get_result_queue
+from hikcamerabot.event_engine.workers.tasks import (
+    DeadLetterRetryTask,
+    ResultWorkerStats,
+    ResultWorkerTask,
+)
 from hikcamerabot.utils.task import create_task
 
 if TYPE_CHECKING:
     from hikcamerabot.event_engine.dispatchers.outbound import OutboundEventDispatcher
+    from hikcamerabot.registry import CameraRegistry
 
 
 class ResultWorkerManager:
-    _DEFAULT_WORKER_NUM = 4
-
     def __init__(
         self,
         dispatcher: 'OutboundEventDispatcher',
-        worker_num: int = _DEFAULT_WORKER_NUM,
+        cam_registry: 'CameraRegistry',
+        worker_num: int | None = None,
     ) -> None:
         self._log = logging.getLogger(self.__class__.__name__)
         self._outbound_dispatcher = dispatcher
-        self._workers = []
-
-        if worker_num <= 0:
-            self._worker_num = self._DEFAULT_WORKER_NUM
-        else:
-            self._worker_num = worker_num
+        self._cam_registry = cam_registry
+        self._conf = main_conf.outbound
+        self._worker_num = worker_num or self._conf.worker_num
+        self._workers: list[ResultWorkerTask] = []
+        self._worker_tasks: list[asyncio.Task] = []
 
     def start_worker_tasks(self) -> None:
         for idx in range(1, self._worker_num + 1):
             task_name = f'ResultWorkerTask_{idx}'
             self._log.debug('Starting %s', task_name)
-            self._workers.append(
+            worker = ResultWorkerTask(self._outbound_dispatcher, idx)
+            self._workers.append(worker)
+            self._worker_tasks.append(
                 create_task(
-                    ResultWorkerTask(self._outbound_dispatcher, idx).run(),
+                    worker.run(),
                     task_name=task_name,
                     logger=self._log,
                     exception_message='Task "%s" raised an exception',
                     exception_message_args=(task_name,),
                 )
             )
+        self._worker_tasks.append(
+            create_task(
+                DeadLetterRetryTask(
+                    self._outbound_dispatcher, self._cam_registry
+                ).run(),
+                task_name=DeadLetterRetryTask.__name__,
+                logger=self._log,
+                exception_message='Task "%s" raised an exception',
+                exception_message_args=(DeadLetterRetryTask.__name__,),
+            )
+        )
+
+    async def stop_worker_tasks(self) -> None:
+        """Let workers drain queued events within shutdown timeout, then cancel them."""
+        res_queue = get_result_queue()
+        self._log.info(
+            'Stopping result workers, %d queued events left', res_queue.qsize()
+        )
+        try:
+            await asyncio.wait_for(self._drain(), timeout=self._conf.shutdown_timeout)
+        except TimeoutError:
+            self._log.warning(
+                'Result workers did not process %d queued events in %ds',
+                res_queue.qsize(),
+                self._conf.shutdown_timeout,
+            )
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks.clear()
+
+    async def _drain(self) -> None:
+        # Pending alert albums are put to the queue on dispatcher close.
+        await self._outbound_dispatcher.close()
+        await get_result_queue().join()
+
+    def get_stats(self) -> list[ResultWorkerStats]:
+        return [worker.stats for worker in self._workers]
@@ -1,11 +1,34 @@
+import asyncio
 import logging
+import time
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
-from hikcamerabot.event_engine.queue import get_result_queue
-from hikcamerabot.utils.shared import shallow_sleep_async
+from hikcamerabot.event_engine.dead_letter import get_dead_letter_queue
+from hikcamerabot.event_engine.queue import OutboundEvent, get_result_queue
 
 if TYPE_CHECKING:
     from hikcamerabot.event_engine.dispatchers.outbound import OutboundEventDispatcher
+    from hikcamerabot.event_engine.events.abstract import BaseOutboundEvent
+    from hikcamerabot.event_engine.events.outbound import SendTextOutboundEvent
+    from hikcamerabot.registry import CameraRegistry
+
+
+@dataclass
+class ResultWorkerStats:
+    """Result worker counters, time values are in seconds."""
+
+    worker_id: int
+    started_at: float = field(default_factory=time.monotonic)
+    processed: int = 0
+    failed: int = 0
+    busy_time: float = 0.0
+
+    @property
+    def utilisation(self) -> float:
+        """Share of worker lifetime spent on dispatching events."""
+        uptime = time.monotonic() - self.started_at
+        return self.busy_time / uptime if uptime else 0.0
 
 
 class ResultWorkerTask:
@@ -16,17 +39,77 @@ class ResultWorkerTask:
         self._outbound_dispatcher = outbound_dispatcher
         self._worker_id = worker_id
         self._res_queue = get_result_queue()
+        self._dead_letters = get_dead_letter_queue()
+        self.stats = ResultWorkerStats(worker_id=worker_id)
 
     async def run(self) -> None:
-        while True:
-            while not self._res_queue.empty():
+        try:
+            while True:
                 event = await self._res_queue.get()
                 try:
-                    await self._outbound_dispatcher.dispatch(event)
-                except Exception:
-                    self._log.exception(
-                        'Unhandled exception in result worker %s. Event context: %s',
-                        self._worker_id,
-                        event,
-                    )
-            await shallow_sleep_async(0.2)
+                    await self._dispatch(event)
+                finally:
+                    await self._res_queue.task_done(event)
+        except asyncio.CancelledError:
+            self._log.debug(
+                'Result worker %s stopped. Processed: %d, failed: %d, '
+                'utilisation: %.1f%%',
+                self._worker_id,
+                self.stats.processed,
+                self.stats.failed,
+                self.stats.utilisation * 100,
+            )
+            raise
+
+    async def _dispatch(
+        self, event: 'BaseOutboundEvent | SendTextOutboundEvent'
+    ) -> None:
+        started_at = time.monotonic()
+        try:
+            await self._outbound_dispatcher.dispatch(event)
+        except Exception as err:
+            self.stats.failed += 1
+            self._log.exception(
+                'Unhandled exception in result worker %s. Event context: %s',
+                self._worker_id,
+                event,
+            )
+            await self._add_dead_letter(event, err)
+        finally:
+            self.stats.processed += 1
+            self.stats.busy_time += time.monotonic() - started_at
+
+    async def _add_dead_letter(self, event: OutboundEvent, err: Exception) -> None:
+        try:
+            await self._dead_letters.add_event(
+                event, err, self._outbound_dispatcher.dispatch
+            )
+        except Exception:
+            self._log.exception('Failed to add dead letter for event %s', event)
+
+
+class DeadLetterRetryTask:
+    """Retry failed outbound deliveries when their backoff delay passes.
+
+    Letters are retried one at a time outside result workers, so slow retries
+    don't take worker slots from fresh events.
+    """
+
+    def __init__(
+        self,
+        outbound_dispatcher: 'OutboundEventDispatcher',
+        cam_registry: 'CameraRegistry',
+    ) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._outbound_dispatcher = outbound_dispatcher
+        self._cam_registry = cam_registry
+        self._dead_letters = get_dead_letter_queue()
+
+    async def run(self) -> None:
+        await self._dead_letters.restore_events(
+            get_cam=self._cam_registry.get_instance,
+            dispatch_func=self._outbound_dispatcher.dispatch,
+        )
+        while True:
+            for letter in await self._dead_letters.wait_due():
+                await self._dead_letters.retry(letter)
@@ -5,6 +5,14 @@ class CameraBotError(Exception):
     pass
 
 
+class ProcessSupervisorError(CameraBotError):
+    pass
+
+
+class OutboundDeliveryError(CameraBotError):
+    pass
+
+
 class ConfigError(Exception):
     pass
 
@@ -47,3 +55,15 @@ class AlarmEventChunkDetectorError(CameraBotError):
 
 class ChunkLoopError(ServiceError):
     pass
+
+
+class Mp4ParseError(Exception):
+    pass
+
+
+class S3ClientError(Exception):
+    pass
+
+
+class S3RequestError(S3ClientError):
+    pass
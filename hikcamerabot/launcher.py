@@ -36,4 +36,8 @@ class BotLauncher:
         await self._bot.send_startup_message()
 
         self._log.info('Telegram bot "%s" has started', bot_name)
-        await self._bot.run_forever()
+        try:
+            await self._bot.run_forever()
+        finally:
+            if self._bot:
+                await self._bot.stop_tasks()
@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING
 
 from hikcamerabot.enums import DetectionType
 from hikcamerabot.services.alarm.camera.tasks.notifications import (
+    AlarmDvrTagTask,
     AlarmPicNotificationTask,
     AlarmTextMessageNotificationTask,
     AlarmVideoGifNotificationTask,
@@ -15,6 +16,7 @@ if TYPE_CHECKING:
 
 class AlarmNotifier:
     ALARM_NOTIFICATION_TASKS = (
+        AlarmDvrTagTask,
         AlarmTextMessageNotificationTask,
         AlarmVideoGifNotificationTask,
         AlarmPicNotificationTask,
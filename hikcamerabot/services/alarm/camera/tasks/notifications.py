@@ -1,11 +1,10 @@
 import logging
+import time
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
-from emoji import emojize
 from pyrogram.enums import ParseMode
 
-from hikcamerabot.constants import DETECTION_SWITCH_MAP
 from hikcamerabot.enums import DetectionType, EventType, VideoGifType
 from hikcamerabot.event_engine.events.outbound import (
     AlertSnapshotOutboundEvent,
@@ -44,15 +43,10 @@ class AlarmTextMessageNotificationTask(AbstractAlertNotificationTask):
             await self._send_alert_text()
 
     async def _send_alert_text(self) -> None:
-        detection_name = DETECTION_SWITCH_MAP[self._detection_type]['name']
         await self._result_queue.put(
             SendTextOutboundEvent(
                 event=EventType.SEND_TEXT,
-                text=emojize(
-                    f':rotating_light: <b>Alert on "{self._cam.id} - '
-                    f'{self._cam.description}": {detection_name}</b>',
-                    language='alias',
-                ),
+                text=self._cam.captions.alert_text[self._detection_type],
                 parse_mode=ParseMode.HTML,
             )
         )
@@ -100,3 +94,13 @@ class AlarmPicNotificationTask(AbstractAlertNotificationTask):
                 file_size=photo.getbuffer().nbytes,
             )
         )
+
+
+class AlarmDvrTagTask(AbstractAlertNotificationTask):
+    """Record alert time to DVR catalog to tag recorded segments."""
+
+    async def _run(self) -> None:
+        if self._cam.conf.livestream.dvr.enabled:
+            await self._cam.services.dvr_stream.add_alert(
+                ts=time.time(), detection_type=self._detection_type
+            )
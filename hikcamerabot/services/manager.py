@@ -52,7 +52,7 @@ class ServiceManager:
                     self._log.warning(
                         '[%s] Warning while stopping service "%s": %s',
                         service.cam.id,
-                        service.NAME.value,
+                        service,
                         err,
                     )
 
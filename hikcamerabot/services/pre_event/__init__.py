@@ -0,0 +1,5 @@
+from hikcamerabot.services.pre_event.service import PreEventRecorderService
+
+__all__ = [
+    'PreEventRecorderService',
+]
@@ -0,0 +1,271 @@
+import asyncio
+import signal
+import time
+from itertools import count, pairwise
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from hikcamerabot.common.process import get_process_supervisor
+from hikcamerabot.common.video.ffmpeg import (
+    build_concat_clip_cmd,
+    build_segment_recorder_cmd,
+)
+from hikcamerabot.config.schemas.main_config import VideoGifOnAlertSchema
+from hikcamerabot.constants import FFMPEG_CAM_VIDEO_SRC
+from hikcamerabot.enums import ProcessKind, ServiceType
+from hikcamerabot.exceptions import ServiceRuntimeError
+from hikcamerabot.services.abstract import AbstractService
+from hikcamerabot.utils.process import kill_proc
+from hikcamerabot.utils.shared import shallow_sleep_async
+from hikcamerabot.utils.task import create_task
+
+if TYPE_CHECKING:
+    from hikcamerabot.camera import HikvisionCam
+
+
+class PreEventRecorderService(AbstractService):
+    """Always-on recorder keeping a rolling buffer of stream-copied segments.
+
+    Alert videos are stitched from already buffered segments, so they include
+    footage from before the event and don't open a new RTSP session.
+    """
+
+    TYPE = ServiceType.RECORDER
+
+    _SEGMENT_EXT: str = '.ts'
+    _SEGMENT_FILENAME_TPL: str = '{storage_path}/%s.ts'
+    _CONCAT_LIST_FILENAME_TPL: str = 'clip_{clip_id}.txt'
+    _RESTART_PAUSE: int = 5
+    _SEGMENT_POLL_INTERVAL: float = 0.5
+    # How many segment periods to wait for the last clip segment to be closed.
+    _CLIP_WAIT_SEGMENTS: int = 3
+    _CLIP_PROCESS_TIMEOUT: int = 30
+
+    def __init__(self, conf: VideoGifOnAlertSchema, cam: 'HikvisionCam') -> None:
+        super().__init__(cam)
+        self._conf = conf
+        self._buffer_conf = conf.pre_event_buffer
+        self._storage_path: Path = self._buffer_conf.storage / self.cam.id
+
+        self._proc: asyncio.subprocess.Process | None = None
+        self._started = asyncio.Event()
+
+        # Clip id as key and start timestamp of its window, such segments are
+        # kept until the clip is made.
+        self._pinned_windows: dict[int, float] = {}
+        self._clip_ids = count(1)
+
+    async def start(self) -> None:
+        if self.started:
+            raise ServiceRuntimeError('Pre-event recorder service already started')
+        await asyncio.to_thread(self._prepare_storage)
+        self._started.set()
+        task_name = f'{self._cls_name}_{self.cam.id}'
+        create_task(
+            self._run(),
+            task_name=task_name,
+            logger=self._log,
+            exception_message='Task "%s" raised an exception',
+            exception_message_args=(task_name,),
+        )
+
+    async def stop(self) -> None:
+        if not self.started:
+            raise ServiceRuntimeError('Pre-event recorder service already stopped')
+        self._started.clear()
+        await self._kill_ffmpeg_process()
+
+    @property
+    def enabled_in_conf(self) -> bool:
+        return self._buffer_conf.enabled
+
+    @property
+    def started(self) -> bool:
+        return self._started.is_set()
+
+    async def make_clip(
+        self, event_ts: float, pre_time: int, post_time: int, filepath: Path
+    ) -> bool:
+        """Stitch buffered segments around `event_ts` into `filepath` clip."""
+        window_start = event_ts - pre_time
+        window_end = event_ts + post_time
+        clip_id = next(self._clip_ids)
+        self._pinned_windows[clip_id] = window_start
+        concat_list_path = self._storage_path / self._CONCAT_LIST_FILENAME_TPL.format(
+            clip_id=clip_id
+        )
+        try:
+            if not await self._wait_for_segment_after(window_end):
+                self._log.error(
+                    '[%s] No buffered segments after %s, recorder is stuck',
+                    self.cam.id,
+                    window_end,
+                )
+                return False
+
+            segments = self._select_segments(window_start, window_end)
+            if not segments:
+                self._log.error(
+                    '[%s] No buffered segments for clip %s-%s',
+                    self.cam.id,
+                    window_start,
+                    window_end,
+                )
+                return False
+            await asyncio.to_thread(self._write_concat_list, concat_list_path, segments)
+            return await self._stitch_clip(
+                concat_list_path=concat_list_path,
+                start_offset=max(window_start - segments[0][0], 0),
+                duration=window_end - window_start,
+                filepath=filepath,
+            )
+        finally:
+            self._pinned_windows.pop(clip_id, None)
+            concat_list_path.unlink(missing_ok=True)
+
+    async def _run(self) -> None:
+        while self.started:
+            if self._proc is None or self._proc.returncode is not None:
+                if self._proc is not None:
+                    self._log.warning(
+                        '[%s] Pre-event recorder exited with code %s, restarting '
+                        'in %ss',
+                        self.cam.id,
+                        self._proc.returncode,
+                        self._RESTART_PAUSE,
+                    )
+                    await shallow_sleep_async(self._RESTART_PAUSE)
+                    if not self.started:
+                        break
+                await self._start_ffmpeg_process()
+            await asyncio.to_thread(self._prune_segments)
+            await shallow_sleep_async(self._buffer_conf.segment_time)
+        self._log.info('[%s] Exiting pre-event recorder task', self.cam.id)
+
+    async def _start_ffmpeg_process(self) -> None:
+        cmd = build_segment_recorder_cmd(
+            loglevel=self._conf.loglevel,
+            rtsp_transport=self._conf.rtsp_transport_type,
+            video_source=FFMPEG_CAM_VIDEO_SRC.format(
+                user=self.cam.conf.api.auth.user,
+                pw=self.cam.conf.api.auth.password,
+                host=urlsplit(self.cam.host).netloc,
+                rtsp_port=self.cam.conf.rtsp_port,
+                channel=self._conf.channel,
+            ),
+            segment_time=self._buffer_conf.segment_time,
+            output=self._SEGMENT_FILENAME_TPL.format(storage_path=self._storage_path),
+        )
+        self._log.info('[%s] Starting pre-event recorder', self.cam.id)
+        self._proc = await get_process_supervisor().spawn(
+            kind=ProcessKind.STREAM, cmd=cmd, stdout=None, stderr=None
+        )
+
+    async def _kill_ffmpeg_process(self) -> None:
+        if self._proc is None or self._proc.returncode is not None:
+            return
+        self._log.info('[%s] Stopping pre-event recorder', self.cam.id)
+        await kill_proc(process=self._proc, signal_=signal.SIGINT, reraise=False)
+
+    async def _stitch_clip(
+        self,
+        concat_list_path: Path,
+        start_offset: float,
+        duration: float,
+        filepath: Path,
+    ) -> bool:
+        cmd = build_concat_clip_cmd(
+            loglevel=self._conf.loglevel,
+            concat_list_path=concat_list_path,
+            start_offset=start_offset,
+            duration=duration,
+            filepath=filepath,
+        )
+        timeout = duration + self._CLIP_PROCESS_TIMEOUT
+        try:
+            async with asyncio.timeout(timeout):
+                result = await get_process_supervisor().run(
+                    kind=ProcessKind.RECORD, cmd=cmd
+                )
+        except TimeoutError:
+            self._log.error(
+                '[%s] Stitching clip "%s" ran longer than expected (%ss) and '
+                'was killed',
+                self.cam.id,
+                filepath,
+                timeout,
+            )
+            return False
+        if not result:
+            return False
+        if result.returncode:
+            self._log.error(
+                '[%s] Failed to stitch clip "%s": %s',
+                self.cam.id,
+                filepath,
+                result.stderr,
+            )
+            return False
+        return True
+
+    async def _wait_for_segment_after(self, timestamp: float) -> bool:
+        """Wait until a segment starting after `timestamp` appears.
+
+        It means the segment covering `timestamp` is closed by ffmpeg.
+        """
+        deadline = timestamp + self._CLIP_WAIT_SEGMENTS * self._buffer_conf.segment_time
+        while time.time() < deadline:
+            segments = await asyncio.to_thread(self._list_segments)
+            if segments and segments[-1][0] >= timestamp:
+                return True
+            await shallow_sleep_async(self._SEGMENT_POLL_INTERVAL)
+        return False
+
+    def _select_segments(
+        self, window_start: float, window_end: float
+    ) -> list[tuple[int, Path]]:
+        """Return closed segments overlapping with the clip window."""
+        segments = self._list_segments()
+        selected: list[tuple[int, Path]] = []
+        for (start, path), (next_start, _) in pairwise(segments):
+            if next_start > window_start and start < window_end:
+                selected.append((start, path))
+        return selected
+
+    def _list_segments(self) -> list[tuple[int, Path]]:
+        """Return segment start timestamps with their paths, sorted by time."""
+        segments: list[tuple[int, Path]] = []
+        for path in self._storage_path.iterdir():
+            if path.suffix == self._SEGMENT_EXT and path.stem.isdigit():
+                segments.append((int(path.stem), path))
+        segments.sort()
+        return segments
+
+    def _prune_segments(self) -> None:
+        """Delete segments which ended before the buffer or pinned clip windows."""
+        threshold = min(
+            (
+                time.time() - self._buffer_conf.buffer_time,
+                *self._pinned_windows.values(),
+            )
+        )
+        segments = self._list_segments()
+        for (_, path), (next_start, _) in pairwise(segments):
+            if next_start > threshold:
+                break
+            path.unlink(missing_ok=True)
+
+    def _prepare_storage(self) -> None:
+        self._storage_path.mkdir(parents=True, exist_ok=True)
+        for path in self._storage_path.iterdir():
+            if path.is_file():
+                path.unlink()
+
+    @staticmethod
+    def _write_concat_list(
+        concat_list_path: Path, segments: list[tuple[int, Path]]
+    ) -> None:
+        concat_list_path.write_text(
+            ''.join(f"file '{path.as_posix()}'\n" for _, path in segments)
+        )
@@ -1,25 +1,34 @@
 import asyncio
-import os
+import shlex
 import signal
 import time
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, Literal
 from urllib.parse import urlsplit
 
+from hikcamerabot.common.process import get_process_supervisor
+from hikcamerabot.common.video.ffmpeg import (
+    build_audio_args,
+    build_livestream_cmd,
+    build_null_audio_args,
+    build_scale_filter_args,
+    build_transcode_general_args,
+    build_vp9_args,
+    build_x264_args,
+)
 from hikcamerabot.config.config import encoding_conf, livestream_conf
 from hikcamerabot.config.schemas.main_config import LivestreamConfSchema
 from hikcamerabot.constants import (
     FFMPEG_CAM_VIDEO_SRC,
-    FFMPEG_CMD_LIVESTREAM,
-    FFMPEG_CMD_NULL_AUDIO,
-    FFMPEG_CMD_SCALE_FILTER,
-    FFMPEG_CMD_TRANSCODE,
-    FFMPEG_CMD_TRANSCODE_GENERAL,
     FFMPEG_SRS_RTMP_VIDEO_SRC,
-    RTSP_TRANSPORT_TPL,
     SRS_LIVESTREAM_NAME_TPL,
 )
-from hikcamerabot.enums import ServiceType, StreamType, VideoEncoderType
+from hikcamerabot.enums import (
+    ProcessKind,
+    ServiceType,
+    StreamType,
+    VideoEncoderType,
+)
 from hikcamerabot.exceptions import ServiceConfigError, ServiceRuntimeError
 from hikcamerabot.services.abstract import AbstractService
 from hikcamerabot.services.tasks.livestream import (
@@ -42,9 +51,10 @@ class AbstractStreamService(AbstractService, ABC):
     NAME: StreamType | None = None
     TYPE: Literal[ServiceType.STREAM] = ServiceType.STREAM
 
-    _FFMPEG_CMD_TPL: str | None = None
     _IGNORE_RESTART_CHECK: int = -1
 
+    _cmd: list[str]
+
     def __init__(
         self,
         conf: LivestreamConfSchema,
@@ -55,7 +65,7 @@ class AbstractStreamService(AbstractService, ABC):
     ) -> None:
         super().__init__(cam)
 
-        self._cmd_gen_dispatcher: dict[VideoEncoderType, Callable[[], str]] = {
+        self._cmd_gen_dispatcher: dict[VideoEncoderType, Callable[[], list[str]]] = {
             VideoEncoderType.X264: self._generate_x264_cmd,
             VideoEncoderType.VP9: self._generate_vp9_cmd,
         }
@@ -72,7 +82,6 @@ class AbstractStreamService(AbstractService, ABC):
         self._stream_conf: None = None
         self._enc_conf: None = None
 
-        self._cmd: str | None = None
         self._generate_cmd()
 
         self._started = asyncio.Event()
@@ -135,13 +144,15 @@ class AbstractStreamService(AbstractService, ABC):
         )
 
     async def _start_ffmpeg_process(self) -> None:
-        self._log.debug('%s ffmpeg command: "%s"', self._cls_name, self._cmd)
+        self._log.debug(
+            '%s ffmpeg command: "%s"', self._cls_name, shlex.join(self._cmd)
+        )
         try:
-            self._proc = await asyncio.create_subprocess_shell(
-                self._cmd,
+            self._proc = await get_process_supervisor().spawn(
+                kind=ProcessKind.STREAM,
+                cmd=self._cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.STDOUT,
-                preexec_fn=os.setsid,
             )
         except Exception as err:
             err_msg = f'{self._cls_name} failed to start'
@@ -157,7 +168,7 @@ class AbstractStreamService(AbstractService, ABC):
             self._log.warning(warn_msg)
             raise ServiceRuntimeError(warn_msg)
         try:
-            self._log.info('Killing proc "%s"', self._cmd)
+            self._log.info('Killing proc "%s"', shlex.join(self._cmd))
             await kill_proc(process=self._proc, signal_=signal.SIGINT, reraise=True)
         except ProcessLookupError as err:
             self._log.error('Failed to kill process: %s', err)
@@ -218,11 +229,9 @@ class AbstractStreamService(AbstractService, ABC):
             tpl_name_enc
         ]
 
-        cmd_tpl = self._format_ffmpeg_cmd_tpl()
-
-        cmd_transcode = ''
-        if enc_codec_name in FFMPEG_CMD_TRANSCODE:
-            cmd_transcode = FFMPEG_CMD_TRANSCODE_GENERAL.format(
+        cmd_transcode: list[str] = []
+        if enc_codec_name in self._cmd_gen_dispatcher:
+            cmd_transcode = build_transcode_general_args(
                 average_bitrate=self._enc_conf.average_bitrate,
                 bufsize=self._enc_conf.bufsize,
                 framerate=self._enc_conf.framerate,
@@ -233,68 +242,66 @@ class AbstractStreamService(AbstractService, ABC):
             )
 
         self._generate_transcode_cmd(
-            cmd_tpl=cmd_tpl,
             cmd_transcode=cmd_transcode,
             enc_codec_name=VideoEncoderType(enc_codec_name),
         )
 
     @abstractmethod
-    def _format_ffmpeg_cmd_tpl(self) -> str:
-        pass
-
-    def _generate_scale_cmd(self) -> str:
-        return (
-            FFMPEG_CMD_SCALE_FILTER.format(
-                width=self._enc_conf.scale.width,
-                height=self._enc_conf.scale.height,
-                format=self._enc_conf.scale.format,
-            )
-            if self._enc_conf.scale.enabled
-            else ''
+    def _build_cmd(self, *, inner_args: list[str], output: str) -> list[str]:
+        """Build ffmpeg command of the stream with transcode args and output."""
+
+    def _generate_scale_cmd(self) -> list[str]:
+        if not self._enc_conf.scale.enabled:
+            return []
+        return build_scale_filter_args(
+            width=self._enc_conf.scale.width,
+            height=self._enc_conf.scale.height,
+            format_=self._enc_conf.scale.format,
         )
 
-    def _generate_x264_cmd(self) -> str:
-        return FFMPEG_CMD_TRANSCODE[VideoEncoderType.X264].format(
-            preset=self._enc_conf.preset, tune=self._enc_conf.tune
-        )
+    def _generate_x264_cmd(self) -> list[str]:
+        return build_x264_args(preset=self._enc_conf.preset, tune=self._enc_conf.tune)
 
-    def _generate_vp9_cmd(self) -> str:
-        return FFMPEG_CMD_TRANSCODE[VideoEncoderType.VP9].format(
+    def _generate_vp9_cmd(self) -> list[str]:
+        return build_vp9_args(
             deadline=self._enc_conf.deadline, speed=self._enc_conf.speed
         )
 
+    def _generate_inner_args(
+        self, cmd_transcode: list[str], enc_codec_name: VideoEncoderType
+    ) -> list[str]:
+        """Return general transcode arguments followed by codec ones."""
+        try:
+            codec_args = self._cmd_gen_dispatcher[enc_codec_name]()
+        except KeyError:
+            codec_args = []
+        return [*cmd_transcode, *codec_args]
+
     @abstractmethod
     def _generate_transcode_cmd(
-        self, cmd_tpl: str, cmd_transcode: str, enc_codec_name: VideoEncoderType
-    ) -> str:
-        # Example: self._cmd = cmd_tpl.format(...)
+        self, cmd_transcode: list[str], enc_codec_name: VideoEncoderType
+    ) -> None:
+        # Example: self._cmd = self._build_cmd(inner_args=..., output=...)
         pass
 
 
 class AbstractExternalLivestreamService(AbstractStreamService, ABC):
-    _FFMPEG_CMD_TPL: str = FFMPEG_CMD_LIVESTREAM
-
-    def _format_ffmpeg_cmd_tpl(self) -> str:
-        null_audio = (
-            FFMPEG_CMD_NULL_AUDIO
-            if self._enc_conf.null_audio
-            else dict.fromkeys(FFMPEG_CMD_NULL_AUDIO, '')
-        )
-        return self._FFMPEG_CMD_TPL.format(
-            abitrate=null_audio['bitrate'],
-            asample_rate=f'-ar {self._enc_conf.asample_rate}'
-            if self._enc_conf.asample_rate != -1
-            else '',
-            acodec=self._enc_conf.acodec,
-            rtsp_transport=RTSP_TRANSPORT_TPL.format(
-                rtsp_transport_type=self._enc_conf.rtsp_transport_type
-            )
+    def _build_cmd(self, *, inner_args: list[str], output: str) -> list[str]:
+        null_audio = build_null_audio_args(self._enc_conf.null_audio)
+        return build_livestream_cmd(
+            loglevel=self._enc_conf.loglevel,
+            null_audio=null_audio,
+            rtsp_transport=self._enc_conf.rtsp_transport_type
             if not self._srs_enabled
-            else '',
+            else None,
             video_source=self._generate_video_source(),
-            filter=null_audio['filter'],
-            format=self._enc_conf.format,
-            loglevel=self._enc_conf.loglevel,
-            map=null_audio['map'],
             vcodec=self._enc_conf.vcodec,
+            audio_args=build_audio_args(
+                acodec=self._enc_conf.acodec,
+                null_audio=null_audio,
+                asample_rate=self._enc_conf.asample_rate,
+            ),
+            inner_args=inner_args,
+            format_=self._enc_conf.format,
+            output=output,
         )
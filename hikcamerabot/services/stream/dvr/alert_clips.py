@@ -0,0 +1,107 @@
+"""Alert-centred clips cut from DVR segments."""
+
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from hikcamerabot.services.stream.dvr.clip import DvrClipCutter, DvrClipTask
+from hikcamerabot.utils.shared import format_ts
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from hikcamerabot.camera import HikvisionCam
+    from hikcamerabot.config.schemas.main_config import DvrAlertWindowSchema
+
+
+@dataclass
+class AlertClipWindow:
+    start_ts: float
+    end_ts: float
+    alerts: list[float] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class AlertClip:
+    """Cut clip with alert offsets from its start."""
+
+    path: 'Path'
+    duration: float
+    alert_offsets: list[float]
+
+
+class DvrAlertClips:
+    """Cut clips around alerts once segments covering them are recorded.
+
+    Windows of close alerts are merged into a single clip up to clip maximum
+    duration. Pending windows are kept in memory only, segments themselves stay
+    in DVR storage until retention deletes them.
+    """
+
+    MAX_DURATION: int = DvrClipTask.MAX_DURATION
+    _FILENAME_TPL: str = '{cam_id}_alert_{start}.mp4'
+    _FILENAME_TIME_FORMAT: str = '%Y-%m-%d_%H-%M-%S'
+
+    def __init__(
+        self, cam: 'HikvisionCam', conf: 'DvrAlertWindowSchema', storage: 'Path'
+    ) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._cam = cam
+        self._conf = conf
+        self._storage = storage
+        self._cutter = DvrClipCutter(
+            cam=cam, loglevel=cam.conf.video_gif.on_alert.loglevel
+        )
+        self._windows: list[AlertClipWindow] = []
+
+    def add_alert(self, ts: float) -> None:
+        start_ts = ts - self._conf.before
+        end_ts = ts + self._conf.after
+        if self._windows:
+            window = self._windows[-1]
+            if (
+                start_ts <= window.end_ts
+                and end_ts - window.start_ts <= self.MAX_DURATION
+            ):
+                window.end_ts = max(window.end_ts, end_ts)
+                window.alerts.append(ts)
+                return
+        self._windows.append(AlertClipWindow(start_ts, end_ts, [ts]))
+
+    async def cut_recorded(self, recorded_until: float) -> list[AlertClip]:
+        """Cut clips of windows ended before the end of recorded segments."""
+        clips: list[AlertClip] = []
+        while self._windows and self._windows[0].end_ts <= recorded_until:
+            window = self._windows.pop(0)
+            clip = await self._cut(window)
+            if clip:
+                clips.append(clip)
+        return clips
+
+    async def _cut(self, window: AlertClipWindow) -> AlertClip | None:
+        segments = await self._cutter.find_segments(window.start_ts, window.end_ts)
+        if not segments:
+            self._log.warning(
+                '[%s] No DVR segments for alert clip %s - %s',
+                self._cam.id,
+                format_ts(window.start_ts),
+                format_ts(window.end_ts),
+            )
+            return None
+
+        clip_start = max(window.start_ts, segments[0].start_ts)
+        clip_end = min(window.end_ts, segments[-1].end_ts)
+        path = self._storage / self._FILENAME_TPL.format(
+            cam_id=self._cam.id,
+            start=format_ts(clip_start, time_format=self._FILENAME_TIME_FORMAT),
+        )
+        if not await self._cutter.cut(segments, clip_start, clip_end, path):
+            path.unlink(missing_ok=True)
+            return None
+        return AlertClip(
+            path=path,
+            duration=clip_end - clip_start,
+            alert_offsets=[
+                ts - clip_start for ts in window.alerts if clip_start <= ts < clip_end
+            ],
+        )
@@ -0,0 +1,411 @@
+"""Persistent catalog of recorded DVR segments."""
+
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import batched
+from pathlib import Path
+from typing import Final
+
+from hikcamerabot.config.config import main_conf
+from hikcamerabot.utils.shared import Singleton
+
+# Mirrors `DvrStreamService._DVR_FILENAME_TPL`.
+_SEGMENT_FILENAME_REGEX: Final[re.Pattern] = re.compile(
+    r'^(?P<cam_id>.+)_(?P<channel>\d+)_(?P<segment_time>\d+)_'
+    r'(?P<start>\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.mp4$'
+)
+_SEGMENT_START_FORMAT: Final[str] = '%Y-%m-%d_%H-%M-%S'
+
+
+@dataclass(frozen=True)
+class SegmentFilenameInfo:
+    cam_id: str
+    channel: int
+    segment_time: int
+    start_ts: float
+
+
+def parse_segment_filename(filename: str) -> SegmentFilenameInfo | None:
+    """Parse DVR segment filename with start time in local timezone."""
+    match = _SEGMENT_FILENAME_REGEX.match(filename)
+    if not match:
+        return None
+    try:
+        start = datetime.strptime(match['start'], _SEGMENT_START_FORMAT)  # noqa: DTZ007
+    except ValueError:
+        return None
+    return SegmentFilenameInfo(
+        cam_id=match['cam_id'],
+        channel=int(match['channel']),
+        segment_time=int(match['segment_time']),
+        start_ts=start.timestamp(),
+    )
+
+
+@dataclass(frozen=True)
+class DvrSegmentRecord:
+    cam_id: str
+    channel: int
+    filename: str
+    path: Path
+    start_ts: float
+    end_ts: float
+    size: int
+    duration: int | None = None
+    width: int | None = None
+    height: int | None = None
+    deleted_at: float | None = None
+    activity: float | None = None
+
+
+class DvrCatalog(metaclass=Singleton):
+    """sqlite catalog with one row per DVR segment.
+
+    Keeps segment times, media info, upload status per storage and deletion
+    state, so recordings can be looked up by time and uploads are resumed
+    after restart. Alert times are kept per camera, segments are tagged with
+    alerts by their time range. Activity score is kept once it's known.
+    """
+
+    _SEGMENTS_SCHEMA: Final[str] = (
+        'CREATE TABLE IF NOT EXISTS segments ('
+        'cam_id TEXT NOT NULL, '
+        'channel INTEGER NOT NULL, '
+        'filename TEXT NOT NULL, '
+        'path TEXT NOT NULL, '
+        'start_ts REAL NOT NULL, '
+        'end_ts REAL NOT NULL, '
+        'size INTEGER NOT NULL, '
+        'duration INTEGER, '
+        'width INTEGER, '
+        'height INTEGER, '
+        'deleted_at REAL, '
+        'activity REAL, '
+        'PRIMARY KEY (cam_id, filename))'
+    )
+    _SEGMENTS_START_INDEX: Final[str] = (
+        'CREATE INDEX IF NOT EXISTS segments_cam_start ON segments (cam_id, start_ts)'
+    )
+    _UPLOADS_SCHEMA: Final[str] = (
+        'CREATE TABLE IF NOT EXISTS segment_uploads ('
+        'cam_id TEXT NOT NULL, '
+        'filename TEXT NOT NULL, '
+        'storage TEXT NOT NULL, '
+        'uploaded_at REAL NOT NULL, '
+        'PRIMARY KEY (cam_id, filename, storage))'
+    )
+    _ALERTS_SCHEMA: Final[str] = (
+        'CREATE TABLE IF NOT EXISTS alerts ('
+        'cam_id TEXT NOT NULL, '
+        'ts REAL NOT NULL, '
+        'detection_type TEXT NOT NULL, '
+        'PRIMARY KEY (cam_id, ts))'
+    )
+    _QUERY_CHUNK_SIZE: Final[int] = 500
+    _COLUMNS: Final[str] = (
+        'cam_id, channel, filename, path, start_ts, end_ts, size, '
+        'duration, width, height, deleted_at, activity'
+    )
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._conf = main_conf.dvr.catalog
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+
+    async def add_segments(self, records: list[DvrSegmentRecord]) -> None:
+        """Add segments or update already known ones."""
+        if records:
+            await asyncio.to_thread(self._add_segments, records)
+
+    async def get_uploaded_storages(
+        self, cam_id: str, filenames: list[str]
+    ) -> dict[str, set[str]]:
+        """Get storages where known segments were uploaded to."""
+        return await asyncio.to_thread(self._get_uploaded_storages, cam_id, filenames)
+
+    async def set_uploaded(self, cam_id: str, filename: str, storage: str) -> None:
+        await asyncio.to_thread(self._set_uploaded, cam_id, filename, storage)
+
+    async def set_deleted(self, cam_id: str, filenames: list[str]) -> None:
+        await asyncio.to_thread(self._set_deleted, cam_id, filenames)
+
+    async def find_segments(
+        self, cam_id: str, start_ts: float, end_ts: float
+    ) -> list[DvrSegmentRecord]:
+        """Find not deleted segments overlapping the time range."""
+        return await asyncio.to_thread(self._find_segments, cam_id, start_ts, end_ts)
+
+    async def list_oldest_segments(
+        self,
+        cam_ids: list[str],
+        end_before: float | None = None,
+        after: DvrSegmentRecord | None = None,
+        limit: int = 100,
+    ) -> list[DvrSegmentRecord]:
+        """List not deleted segments, the oldest first, page after `after`."""
+        return await asyncio.to_thread(
+            self._list_oldest_segments, cam_ids, end_before, after, limit
+        )
+
+    async def get_total_size(self, cam_ids: list[str]) -> int:
+        """Get total size of not deleted segments."""
+        return await asyncio.to_thread(self._get_total_size, cam_ids)
+
+    async def add_alert(self, cam_id: str, ts: float, detection_type: str) -> None:
+        await asyncio.to_thread(self._add_alert, cam_id, ts, detection_type)
+
+    async def find_alerts(
+        self, cam_id: str, start_ts: float, end_ts: float
+    ) -> list[float]:
+        """Find alert times within the time range, end excluded."""
+        return await asyncio.to_thread(self._find_alerts, cam_id, start_ts, end_ts)
+
+    async def filter_alert_segments(
+        self, cam_id: str, filenames: list[str], before: float, after: float
+    ) -> set[str]:
+        """Filter segments overlapping `before`/`after` windows around alerts."""
+        return await asyncio.to_thread(
+            self._filter_alert_segments, cam_id, filenames, before, after
+        )
+
+    async def set_activity(self, cam_id: str, scores: dict[str, float]) -> None:
+        await asyncio.to_thread(self._set_activity, cam_id, scores)
+
+    async def filter_static_segments(
+        self, cam_id: str, filenames: list[str], min_score: float
+    ) -> set[str]:
+        """Filter segments scored below `min_score` and having no alerts."""
+        return await asyncio.to_thread(
+            self._filter_static_segments, cam_id, filenames, min_score
+        )
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db:
+                self._db.close()
+                self._db = None
+
+    def _add_segments(self, records: list[DvrSegmentRecord]) -> None:
+        with self._db_lock:
+            db = self._get_db()
+            db.executemany(
+                f'INSERT INTO segments ({self._COLUMNS}) '  # noqa: S608
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (cam_id, filename) DO UPDATE SET '
+                'end_ts = excluded.end_ts, size = excluded.size, '
+                'duration = excluded.duration, width = excluded.width, '
+                'height = excluded.height, deleted_at = NULL',
+                [self._to_row(record) for record in records],
+            )
+            db.commit()
+
+    def _get_uploaded_storages(
+        self, cam_id: str, filenames: list[str]
+    ) -> dict[str, set[str]]:
+        uploaded: dict[str, set[str]] = {}
+        with self._db_lock:
+            db = self._get_db()
+            # Stay within sqlite host parameters limit.
+            for chunk in batched(filenames, self._QUERY_CHUNK_SIZE):  # noqa: B911
+                placeholders = ', '.join('?' * len(chunk))
+                rows = db.execute(
+                    'SELECT s.filename, u.storage FROM segments s '  # noqa: S608
+                    'LEFT JOIN segment_uploads u '
+                    'ON u.cam_id = s.cam_id AND u.filename = s.filename '
+                    f'WHERE s.cam_id = ? AND s.filename IN ({placeholders})',
+                    (cam_id, *chunk),
+                ).fetchall()
+                for filename, storage in rows:
+                    storages = uploaded.setdefault(filename, set())
+                    if storage:
+                        storages.add(storage)
+        return uploaded
+
+    def _set_uploaded(self, cam_id: str, filename: str, storage: str) -> None:
+        with self._db_lock:
+            db = self._get_db()
+            db.execute(
+                'INSERT OR REPLACE INTO segment_uploads '
+                '(cam_id, filename, storage, uploaded_at) VALUES (?, ?, ?, ?)',
+                (cam_id, filename, storage, time.time()),
+            )
+            db.commit()
+
+    def _set_deleted(self, cam_id: str, filenames: list[str]) -> None:
+        deleted_at = time.time()
+        with self._db_lock:
+            db = self._get_db()
+            db.executemany(
+                'UPDATE segments SET deleted_at = ? '
+                'WHERE cam_id = ? AND filename = ? AND deleted_at IS NULL',
+                [(deleted_at, cam_id, filename) for filename in filenames],
+            )
+            db.commit()
+
+    def _find_segments(
+        self, cam_id: str, start_ts: float, end_ts: float
+    ) -> list[DvrSegmentRecord]:
+        with self._db_lock:
+            rows = (
+                self._get_db()
+                .execute(
+                    f'SELECT {self._COLUMNS} FROM segments '  # noqa: S608
+                    'WHERE cam_id = ? AND start_ts < ? AND end_ts > ? '
+                    'AND deleted_at IS NULL ORDER BY start_ts',
+                    (cam_id, end_ts, start_ts),
+                )
+                .fetchall()
+            )
+        return [self._from_row(row) for row in rows]
+
+    def _list_oldest_segments(
+        self,
+        cam_ids: list[str],
+        end_before: float | None,
+        after: DvrSegmentRecord | None,
+        limit: int,
+    ) -> list[DvrSegmentRecord]:
+        placeholders = ', '.join('?' * len(cam_ids))
+        query = (
+            f'SELECT {self._COLUMNS} FROM segments '  # noqa: S608
+            f'WHERE cam_id IN ({placeholders}) AND deleted_at IS NULL'
+        )
+        params: list[object] = [*cam_ids]
+        if end_before is not None:
+            query += ' AND end_ts < ?'
+            params.append(end_before)
+        if after:
+            query += ' AND (start_ts, cam_id, filename) > (?, ?, ?)'
+            params.extend((after.start_ts, after.cam_id, after.filename))
+        query += ' ORDER BY start_ts, cam_id, filename LIMIT ?'
+        params.append(limit)
+        with self._db_lock:
+            rows = self._get_db().execute(query, params).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def _get_total_size(self, cam_ids: list[str]) -> int:
+        placeholders = ', '.join('?' * len(cam_ids))
+        with self._db_lock:
+            row = (
+                self._get_db()
+                .execute(
+                    'SELECT COALESCE(SUM(size), 0) FROM segments '  # noqa: S608
+                    f'WHERE cam_id IN ({placeholders}) AND deleted_at IS NULL',
+                    cam_ids,
+                )
+                .fetchone()
+            )
+        return row[0]
+
+    def _add_alert(self, cam_id: str, ts: float, detection_type: str) -> None:
+        with self._db_lock:
+            db = self._get_db()
+            db.execute(
+                'INSERT OR IGNORE INTO alerts (cam_id, ts, detection_type) '
+                'VALUES (?, ?, ?)',
+                (cam_id, ts, detection_type),
+            )
+            db.commit()
+
+    def _find_alerts(self, cam_id: str, start_ts: float, end_ts: float) -> list[float]:
+        with self._db_lock:
+            rows = (
+                self._get_db()
+                .execute(
+                    'SELECT ts FROM alerts WHERE cam_id = ? AND ts >= ? AND ts < ? '
+                    'ORDER BY ts',
+                    (cam_id, start_ts, end_ts),
+                )
+                .fetchall()
+            )
+        return [ts for (ts,) in rows]
+
+    def _filter_alert_segments(
+        self, cam_id: str, filenames: list[str], before: float, after: float
+    ) -> set[str]:
+        alert_filenames: set[str] = set()
+        with self._db_lock:
+            db = self._get_db()
+            for chunk in batched(filenames, self._QUERY_CHUNK_SIZE):  # noqa: B911
+                placeholders = ', '.join('?' * len(chunk))
+                rows = db.execute(
+                    'SELECT s.filename FROM segments s '  # noqa: S608
+                    f'WHERE s.cam_id = ? AND s.filename IN ({placeholders}) '
+                    'AND EXISTS (SELECT 1 FROM alerts a WHERE a.cam_id = s.cam_id '
+                    'AND a.ts >= s.start_ts - ? AND a.ts < s.end_ts + ?)',
+                    (cam_id, *chunk, after, before),
+                ).fetchall()
+                alert_filenames.update(filename for (filename,) in rows)
+        return alert_filenames
+
+    def _set_activity(self, cam_id: str, scores: dict[str, float]) -> None:
+        with self._db_lock:
+            db = self._get_db()
+            db.executemany(
+                'UPDATE segments SET activity = ? WHERE cam_id = ? AND filename = ?',
+                [(score, cam_id, filename) for filename, score in scores.items()],
+            )
+            db.commit()
+
+    def _filter_static_segments(
+        self, cam_id: str, filenames: list[str], min_score: float
+    ) -> set[str]:
+        static_filenames: set[str] = set()
+        with self._db_lock:
+            db = self._get_db()
+            for chunk in batched(filenames, self._QUERY_CHUNK_SIZE):  # noqa: B911
+                placeholders = ', '.join('?' * len(chunk))
+                rows = db.execute(
+                    'SELECT s.filename FROM segments s '  # noqa: S608
+                    f'WHERE s.cam_id = ? AND s.filename IN ({placeholders}) '
+                    'AND s.activity < ? '
+                    'AND NOT EXISTS (SELECT 1 FROM alerts a WHERE a.cam_id = s.cam_id '
+                    'AND a.ts >= s.start_ts AND a.ts < s.end_ts)',
+                    (cam_id, *chunk, min_score),
+                ).fetchall()
+                static_filenames.update(filename for (filename,) in rows)
+        return static_filenames
+
+    def _get_db(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._conf.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self._conf.path, check_same_thread=False)
+            self._db.execute(self._SEGMENTS_SCHEMA)
+            self._db.execute(self._SEGMENTS_START_INDEX)
+            self._db.execute(self._UPLOADS_SCHEMA)
+            self._db.execute(self._ALERTS_SCHEMA)
+            self._db.commit()
+        return self._db
+
+    @staticmethod
+    def _to_row(record: DvrSegmentRecord) -> tuple:
+        return (
+            record.cam_id,
+            record.channel,
+            record.filename,
+            record.path.as_posix(),
+            record.start_ts,
+            record.end_ts,
+            record.size,
+            record.duration,
+            record.width,
+            record.height,
+            record.deleted_at,
+            record.activity,
+        )
+
+    @staticmethod
+    def _from_row(row: tuple) -> DvrSegmentRecord:
+        cam_id, channel, filename, path, *rest = row
+        return DvrSegmentRecord(cam_id, channel, filename, Path(path), *rest)
+
+
+def get_dvr_catalog() -> DvrCatalog:
+    return DvrCatalog()
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Final
+
+from pyrogram.types import Message
+
+from hikcamerabot.common.process import get_process_supervisor
+from hikcamerabot.common.video.ffmpeg import build_concat_clip_cmd
+from hikcamerabot.common.video.tasks.media_inspect import MediaInspectTask
+from hikcamerabot.enums import EventType, ProcessKind
+from hikcamerabot.event_engine.events.outbound import (
+    SendTextOutboundEvent,
+    VideoOutboundEvent,
+)
+from hikcamerabot.event_engine.queue import get_result_queue
+from hikcamerabot.services.stream.dvr.catalog import DvrSegmentRecord, get_dvr_catalog
+from hikcamerabot.utils.file import file_size
+from hikcamerabot.utils.shared import bold, format_ts, gen_random_str
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from hikcamerabot.camera import HikvisionCam
+
+_CLIP_TIME_FORMAT: Final[str] = '%Y-%m-%d %H:%M:%S'
+
+
+class DvrClipCutter:
+    """Cut clips of a time range from recorded DVR segments.
+
+    Segments covering the range are looked up in DVR catalog and stitched with
+    concat demuxer. Streams are copied without re-encoding, and the clip starts
+    at the keyframe right before the requested time.
+    """
+
+    _PROCESS_TIMEOUT: int = 300
+
+    def __init__(self, cam: 'HikvisionCam', loglevel: str) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._cam = cam
+        self._loglevel = loglevel
+
+    async def find_segments(
+        self, start_ts: float, end_ts: float
+    ) -> list[DvrSegmentRecord]:
+        segments = await get_dvr_catalog().find_segments(self._cam.id, start_ts, end_ts)
+        return [
+            segment
+            for segment in segments
+            if await asyncio.to_thread(segment.path.is_file)
+        ]
+
+    async def cut(
+        self,
+        segments: list[DvrSegmentRecord],
+        start_ts: float,
+        end_ts: float,
+        file_path: 'Path',
+    ) -> bool:
+        """Cut clip of the range within found segments to the file path."""
+        concat_list_path = file_path.with_name(f'{file_path.name}.txt')
+        try:
+            await asyncio.to_thread(self._write_concat_list, concat_list_path, segments)
+            return await self._cut_clip(
+                concat_list_path=concat_list_path,
+                start_offset=start_ts - segments[0].start_ts,
+                duration=end_ts - start_ts,
+                file_path=file_path,
+            )
+        finally:
+            concat_list_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _write_concat_list(
+        concat_list_path: 'Path', segments: list[DvrSegmentRecord]
+    ) -> None:
+        concat_list_path.write_text(
+            ''.join(f"file '{segment.path.as_posix()}'\n" for segment in segments)
+        )
+
+    async def _cut_clip(
+        self,
+        concat_list_path: 'Path',
+        start_offset: float,
+        duration: float,
+        file_path: 'Path',
+    ) -> bool:
+        cmd = build_concat_clip_cmd(
+            loglevel=self._loglevel,
+            concat_list_path=concat_list_path,
+            start_offset=start_offset,
+            duration=duration,
+            filepath=file_path,
+            acodec='copy',
+        )
+        try:
+            async with asyncio.timeout(self._PROCESS_TIMEOUT):
+                result = await get_process_supervisor().run(
+                    kind=ProcessKind.RECORD, cmd=cmd
+                )
+        except TimeoutError:
+            self._log.error(
+                '[%s] Cutting DVR clip "%s" ran longer than expected (%ss) and '
+                'was killed',
+                self._cam.id,
+                file_path,
+                self._PROCESS_TIMEOUT,
+            )
+            return False
+        if not result:
+            return False
+        if result.returncode:
+            self._log.error(
+                '[%s] Failed to cut DVR clip "%s": %s',
+                self._cam.id,
+                file_path,
+                result.stderr,
+            )
+            return False
+        return file_path.is_file() and file_path.stat().st_size > 0
+
+
+class DvrClipTask:
+    """Cut clip of a time range from DVR recordings and send it to the user."""
+
+    MAX_DURATION: int = 3600
+    _FILENAME_TPL: str = 'dvr-clip-{cam_id}-{start}-{rand}.mp4'
+
+    FILENAME_TIME_FORMAT: str = '%Y-%b-%d--%H-%M-%S'
+
+    def __init__(
+        self,
+        cam: 'HikvisionCam',
+        start_ts: float,
+        end_ts: float,
+        message: Message,
+    ) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._cam = cam
+        self._start_ts = start_ts
+        self._end_ts = end_ts
+        self._message = message
+        self._conf = self._cam.conf.video_gif.on_demand
+        self._result_queue = get_result_queue()
+        self._cutter = DvrClipCutter(cam=self._cam, loglevel=self._conf.loglevel)
+
+        filename = self._FILENAME_TPL.format(
+            cam_id=self._cam.id,
+            start=format_ts(start_ts, time_format=self.FILENAME_TIME_FORMAT),
+            rand=gen_random_str(),
+        )
+        self._file_path: Path = self._conf.tmp_storage / filename
+        self._thumb_path: Path = self._conf.tmp_storage / f'{filename}-thumb.jpg'
+
+    async def run(self) -> None:
+        requested = self._format_range(self._start_ts, self._end_ts)
+        if self._end_ts - self._start_ts > self.MAX_DURATION:
+            await self._send_text(
+                f'🛑 DVR clip {requested} is longer than {self.MAX_DURATION} seconds'
+            )
+            return
+
+        segments = await self._cutter.find_segments(self._start_ts, self._end_ts)
+        if not segments:
+            await self._send_text(
+                f'🛑 No finished DVR recordings of {self._cam.description} '
+                f'for {requested}'
+            )
+            return
+
+        clip_start = max(self._start_ts, segments[0].start_ts)
+        clip_end = min(self._end_ts, segments[-1].end_ts)
+        await self._send_text(
+            f'✂️ Cutting DVR clip {self._format_range(clip_start, clip_end)}'
+        )
+        is_created = await self._cutter.cut(
+            segments, clip_start, clip_end, self._file_path
+        )
+        if not is_created:
+            self._cleanup()
+            await self._send_text(
+                f'🛑 Failed to cut DVR clip {requested} on {self._cam.description}'
+            )
+            return
+        await self._send_result(create_ts=clip_start)
+
+    async def _send_result(self, create_ts: float) -> None:
+        media_info = await MediaInspectTask(
+            thumbnail_path=self._thumb_path, file_path=self._file_path
+        ).run()
+        await self._result_queue.put(
+            VideoOutboundEvent(
+                event=EventType.DVR_CLIP,
+                video_path=self._file_path,
+                video_duration=media_info.duration or 0,
+                video_height=media_info.height or 0,
+                video_width=media_info.width or 0,
+                thumb_path=self._thumb_path if media_info.thumbnail_created else None,
+                cam=self._cam,
+                message=self._message,
+                file_size=file_size(filepath=self._file_path),
+                create_ts=int(create_ts),
+            )
+        )
+
+    async def _send_text(self, text: str) -> None:
+        await self._result_queue.put(
+            SendTextOutboundEvent(
+                event=EventType.SEND_TEXT, message=self._message, text=bold(text)
+            )
+        )
+
+    def _cleanup(self) -> None:
+        for file_path in (self._file_path, self._thumb_path):
+            file_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _format_range(start_ts: float, end_ts: float) -> str:
+        return (
+            f'{format_ts(start_ts, time_format=_CLIP_TIME_FORMAT)} - '
+            f'{format_ts(end_ts, time_format=_CLIP_TIME_FORMAT)}'
+        )
@@ -1,10 +1,10 @@
-import asyncio
 import logging
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-from hikcamerabot.common.video.tasks.ffprobe_context import GetFfprobeContextTask
-from hikcamerabot.common.video.tasks.thumbnail import MakeThumbnailTask
+from hikcamerabot.common.video.tasks.activity import ActivityScoreTask
+from hikcamerabot.common.video.tasks.contact_sheet import MakeContactSheetTask
+from hikcamerabot.common.video.tasks.media_inspect import MediaInspectTask
 
 if TYPE_CHECKING:
     from hikcamerabot.camera import HikvisionCam
@@ -13,7 +13,17 @@ if TYPE_CHECKING:
 class DvrFile:
     """Recorded DVR File Wrapper Class."""
 
-    def __init__(self, filename: str, lock_count: int, cam: 'HikvisionCam') -> None:
+    def __init__(
+        self,
+        filename: str,
+        lock_count: int,
+        cam: 'HikvisionCam',
+        *,
+        duration: int | None = None,
+        alert_offsets: list[float] | None = None,
+        storage_path: Path | None = None,
+        is_segment: bool = True,
+    ) -> None:
         if lock_count <= 0:
             raise RuntimeError('Lock count cannot be lower or equal 0')
 
@@ -22,14 +32,22 @@ class DvrFile:
         self._lock_count = lock_count
         self._cam = cam
 
-        self._storage_path = Path(self._cam.conf.livestream.dvr.local_storage_path)
+        self._storage_path = storage_path or Path(
+            self._cam.conf.livestream.dvr.local_storage_path
+        )
         self._full_path = self._storage_path / self._filename
         self._thumbnail = self._storage_path / f'{self.name}-thumb.jpg'
-
-        self._duration: int | None = None
+        self._contact_sheet = self._storage_path / f'{self.name}-sheet.jpg'
+
+        # Known from ffmpeg segment list for freshly closed files.
+        self._duration = duration
+        # Alert times from the file start.
+        self._alert_offsets = alert_offsets or []
+        # Alert clips are not DVR segments and are not kept in DVR catalog.
+        self._is_segment = is_segment
         self._width: int | None = None
         self._height: int | None = None
-        self._probe_ctx: dict | None = None
+        self._activity: float | None = None
 
         self._is_broken: bool = False
 
@@ -46,32 +64,36 @@ class DvrFile:
         self._log.warning('Marking file "%s" as broken', self._full_path)
         self._is_broken = True
 
-    async def _get_probe_ctx(self) -> None:
-        self._probe_ctx = await GetFfprobeContextTask(self.full_path).run()
-        if not self._probe_ctx:
+    async def make_context(self) -> None:
+        media_info = await MediaInspectTask(self._thumbnail, self.full_path).run()
+        if not media_info.thumbnail_created:
+            self._log.error('Error during making thumbnail for %s', self.full_path)
+        if not media_info.has_video_info:
+            self._log.error('Failed to gather video metadata for %s', self.full_path)
             self._mark_as_broken()
             return
-        video_streams = [
-            stream
-            for stream in self._probe_ctx['streams']
-            if stream['codec_type'] == 'video'
-        ]
-        try:
-            self._duration = int(float(self._probe_ctx['format']['duration']))
-            self._height = video_streams[0]['height']
-            self._width = video_streams[0]['width']
-        except KeyError:
-            self._log.exception(
-                'Failed to gather video stream metadata: %s', self._probe_ctx
-            )
-            self._mark_as_broken()
-
-    async def _make_thumbnail_frame(self) -> None:
-        if not await MakeThumbnailTask(self._thumbnail, self.full_path).run():
-            self._log.error('Error during making thumbnail for %s', self.full_path)
-
-    async def make_context(self) -> None:
-        await asyncio.gather(self._get_probe_ctx(), self._make_thumbnail_frame())
+        if self._duration is None:
+            self._duration = media_info.duration
+        self._height = media_info.height
+        self._width = media_info.width
+        await self._make_contact_sheet()
+        if self._is_segment and self._cam.conf.livestream.dvr.activity.enabled:
+            self._activity = await ActivityScoreTask(self.full_path).run()
+
+    async def _make_contact_sheet(self) -> None:
+        conf = self._cam.conf.livestream.dvr.contact_sheet
+        if not conf.enabled or not self._duration:
+            return
+        is_created = await MakeContactSheetTask(
+            self._contact_sheet,
+            self.full_path,
+            duration=self._duration,
+            interval=conf.interval,
+            columns=conf.columns,
+            tile_width=conf.tile_width,
+        ).run()
+        if not is_created:
+            self._log.error('Error during making contact sheet for %s', self.full_path)
 
     def decrement_lock_count(self) -> None:
         if self._lock_count > 0:
@@ -81,14 +103,30 @@ class DvrFile:
     def is_broken(self) -> bool:
         return self._is_broken
 
+    @property
+    def is_segment(self) -> bool:
+        return self._is_segment
+
+    @property
+    def alert_offsets(self) -> list[float]:
+        return self._alert_offsets
+
     @property
     def is_empty(self) -> bool:
-        return self.full_path.stat().st_size == 0
+        return self.size == 0
+
+    @property
+    def size(self) -> int:
+        return self.full_path.stat().st_size
 
     @property
     def exists(self) -> bool:
         return self.full_path.is_file()
 
+    @property
+    def cam_id(self) -> str:
+        return self._cam.id
+
     @property
     def name(self) -> str:
         return self._filename
@@ -97,6 +135,14 @@ class DvrFile:
     def thumbnail(self) -> Path | None:
         return self._thumbnail if self._thumbnail.is_file() else None
 
+    @property
+    def activity(self) -> float | None:
+        return self._activity
+
+    @property
+    def contact_sheet(self) -> Path | None:
+        return self._contact_sheet if self._contact_sheet.is_file() else None
+
     @property
     def height(self) -> int | None:
         return self._height
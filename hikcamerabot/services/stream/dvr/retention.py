@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import shutil
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from hikcamerabot.config.config import main_conf
+from hikcamerabot.enums import DvrUploadMode
+from hikcamerabot.services.stream.dvr.catalog import DvrSegmentRecord, get_dvr_catalog
+from hikcamerabot.utils.shared import shallow_sleep_async
+
+if TYPE_CHECKING:
+    from hikcamerabot.camera import HikvisionCam
+
+
+class DvrRetentionManager:
+    """Keep DVR storage within size, age and free space quotas.
+
+    Runs on schedule and evicts the oldest segments first, looking them up in
+    DVR catalog instead of scanning the storage. Segments not uploaded to all
+    enabled storages are kept, unless free disk space is below the minimum,
+    since full disk crashes ffmpeg.
+    """
+
+    _PAGE_SIZE: int = 100
+
+    def __init__(self, cams: list['HikvisionCam']) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._conf = main_conf.dvr.retention
+        self._catalog = get_dvr_catalog()
+        self._cams = {cam.id: cam for cam in cams}
+
+    async def run(self) -> None:
+        self._log.info('Running DVR retention for cameras: %s', ', '.join(self._cams))
+        while True:
+            try:
+                await self._enforce()
+            except Exception:
+                self._log.exception('Failed to enforce DVR retention')
+            await shallow_sleep_async(self._conf.check_interval)
+
+    async def _enforce(self) -> None:
+        now = time.time()
+        for cam_id, cam in self._cams.items():
+            cam_conf = cam.conf.livestream.dvr.retention
+            if max_age := min(
+                (age for age in (cam_conf.max_age, self._conf.max_age) if age),
+                default=0,
+            ):
+                await self._evict(
+                    [cam_id], reason=f'older than {max_age}s', end_before=now - max_age
+                )
+            if cam_conf.max_size:
+                await self._evict_over_size([cam_id], cam_conf.max_size)
+
+        if self._conf.max_size:
+            await self._evict_over_size(list(self._cams), self._conf.max_size)
+        if self._conf.min_free_space:
+            await self._evict_for_free_space()
+
+    async def _evict_over_size(self, cam_ids: list[str], max_size: int) -> None:
+        total_size = await self._catalog.get_total_size(cam_ids)
+        if total_size > max_size:
+            await self._evict(
+                cam_ids,
+                reason=f'over {max_size} bytes quota',
+                need_bytes=total_size - max_size,
+            )
+
+    async def _evict_for_free_space(self) -> None:
+        for storage_path, cam_ids in self._group_by_storage().items():
+            disk_usage = await asyncio.to_thread(shutil.disk_usage, storage_path)
+            need_bytes = self._conf.min_free_space - disk_usage.free
+            if need_bytes <= 0:
+                continue
+            reason = f'{disk_usage.free} bytes free in {storage_path}'
+            need_bytes -= await self._evict(
+                cam_ids, reason=reason, need_bytes=need_bytes
+            )
+            if need_bytes > 0:
+                self._log.warning(
+                    'Not enough free space in %s, evicting not uploaded DVR segments',
+                    storage_path,
+                )
+                need_bytes -= await self._evict(
+                    cam_ids, reason=reason, need_bytes=need_bytes, evict_pending=True
+                )
+            if need_bytes > 0:
+                self._log.error(
+                    'No DVR segments left to free %d bytes in %s',
+                    need_bytes,
+                    storage_path,
+                )
+
+    async def _evict(
+        self,
+        cam_ids: list[str],
+        reason: str,
+        *,
+        end_before: float | None = None,
+        need_bytes: int | None = None,
+        evict_pending: bool = False,
+    ) -> int:
+        """Evict the oldest segments and return freed bytes.
+
+        Without `need_bytes` all segments matching `end_before` are evicted.
+        """
+        freed_bytes = 0
+        after: DvrSegmentRecord | None = None
+        while need_bytes is None or freed_bytes < need_bytes:
+            segments = await self._catalog.list_oldest_segments(
+                cam_ids, end_before=end_before, after=after, limit=self._PAGE_SIZE
+            )
+            if not segments:
+                break
+            after = segments[-1]
+            pending = set() if evict_pending else await self._get_pending(segments)
+
+            evicted: list[DvrSegmentRecord] = []
+            evicted_bytes = 0
+            for segment in segments:
+                if need_bytes is not None and freed_bytes + evicted_bytes >= need_bytes:
+                    break
+                if (segment.cam_id, segment.filename) not in pending:
+                    evicted.append(segment)
+                    evicted_bytes += segment.size
+            if evicted:
+                deleted = await self._delete(evicted, reason)
+                freed_bytes += sum(segment.size for segment in deleted)
+        return freed_bytes
+
+    async def _get_pending(
+        self, segments: list[DvrSegmentRecord]
+    ) -> set[tuple[str, str]]:
+        """Get segments to upload, which are not uploaded to all enabled storages."""
+        pending: set[tuple[str, str]] = set()
+        for cam_id, cam_filenames in self._group_by_cam(segments).items():
+            upload_conf = self._cams[cam_id].conf.livestream.dvr.upload
+            storages = {
+                name
+                for name, settings in upload_conf.storage.get_storage_items()
+                if settings.enabled
+            }
+            filenames = await self._filter_to_upload(cam_id, cam_filenames)
+            if not storages or not filenames:
+                continue
+            uploaded = await self._catalog.get_uploaded_storages(cam_id, filenames)
+            pending.update(
+                (cam_id, filename)
+                for filename in filenames
+                if not storages <= uploaded.get(filename, set())
+            )
+        return pending
+
+    async def _filter_to_upload(self, cam_id: str, filenames: list[str]) -> list[str]:
+        """Filter segments uploaded in camera upload mode, except static ones."""
+        dvr_conf = self._cams[cam_id].conf.livestream.dvr
+        filenames = await self._filter_by_mode(cam_id, filenames)
+        if not dvr_conf.activity.enabled or not filenames:
+            return filenames
+        static_filenames = await self._catalog.filter_static_segments(
+            cam_id, filenames, dvr_conf.activity.min_score
+        )
+        return [filename for filename in filenames if filename not in static_filenames]
+
+    async def _filter_by_mode(self, cam_id: str, filenames: list[str]) -> list[str]:
+        upload_conf = self._cams[cam_id].conf.livestream.dvr.upload
+        if upload_conf.mode is DvrUploadMode.ALL:
+            return filenames
+        if upload_conf.mode is DvrUploadMode.ALERT_CLIPS:
+            return []
+        alert_filenames = await self._catalog.filter_alert_segments(
+            cam_id,
+            filenames,
+            before=upload_conf.alert_window.before,
+            after=upload_conf.alert_window.after,
+        )
+        return [filename for filename in filenames if filename in alert_filenames]
+
+    async def _delete(
+        self, segments: list[DvrSegmentRecord], reason: str
+    ) -> list[DvrSegmentRecord]:
+        deleted = await asyncio.to_thread(self._delete_files, segments)
+        for cam_id, filenames in self._group_by_cam(deleted).items():
+            await self._catalog.set_deleted(cam_id, filenames)
+            self._log.info(
+                '[%s] Evicted %d DVR segments (%s), the newest is %s',
+                cam_id,
+                len(filenames),
+                reason,
+                filenames[-1],
+            )
+        return deleted
+
+    def _delete_files(self, segments: list[DvrSegmentRecord]) -> list[DvrSegmentRecord]:
+        deleted: list[DvrSegmentRecord] = []
+        for segment in segments:
+            thumbnail = segment.path.with_name(f'{segment.filename}-thumb.jpg')
+            contact_sheet = segment.path.with_name(f'{segment.filename}-sheet.jpg')
+            try:
+                segment.path.unlink(missing_ok=True)
+                thumbnail.unlink(missing_ok=True)
+                contact_sheet.unlink(missing_ok=True)
+            except OSError:
+                self._log.exception('Failed to delete DVR file %s', segment.path)
+            else:
+                deleted.append(segment)
+        return deleted
+
+    def _group_by_storage(self) -> dict[Path, list[str]]:
+        storages: dict[Path, list[str]] = defaultdict(list)
+        for cam_id, cam in self._cams.items():
+            storages[cam.conf.livestream.dvr.local_storage_path].append(cam_id)
+        return storages
+
+    @staticmethod
+    def _group_by_cam(segments: list[DvrSegmentRecord]) -> dict[str, list[str]]:
+        cam_segments: dict[str, list[str]] = defaultdict(list)
+        for segment in segments:
+            cam_segments[segment.cam_id].append(segment.filename)
+        return cam_segments
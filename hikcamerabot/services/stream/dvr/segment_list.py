@@ -0,0 +1,76 @@
+"""ffmpeg segment list of completed DVR segments."""
+
+import asyncio
+import csv
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final
+
+_SEGMENT_LIST_NAME_TPL: Final[str] = '.{cam_id}_segments.csv'
+
+
+@dataclass(frozen=True)
+class DvrSegment:
+    """Completed segment with times relative to ffmpeg process start."""
+
+    filename: str
+    start_time: float
+    end_time: float
+
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+
+def get_segment_list_path(storage_path: Path, cam_id: str) -> Path:
+    return storage_path / _SEGMENT_LIST_NAME_TPL.format(cam_id=cam_id)
+
+
+class DvrSegmentList:
+    """Reader of CSV segment list written by ffmpeg segment muxer.
+
+    With `-segment_list_size` ffmpeg rewrites the list with the last segments
+    every time a segment is closed, replacing the list file atomically. Only
+    segments which appeared since the previous read are returned.
+    """
+
+    # Segments kept in the list, enough to not miss any between reads.
+    LIST_SIZE: Final[int] = 10
+
+    def __init__(self, path: Path) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._path = path
+        self._seen: set[str] = set()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    async def read_new(self) -> list[DvrSegment]:
+        segments = await asyncio.to_thread(self._read)
+        # Segments leave the list in order they are written, compare with the
+        # previous read only, so the seen names don't grow forever.
+        new_segments = [s for s in segments if s.filename not in self._seen]
+        self._seen = {s.filename for s in segments}
+        return new_segments
+
+    def _read(self) -> list[DvrSegment]:
+        try:
+            text = self._path.read_text()
+        except FileNotFoundError:
+            return []
+        segments: list[DvrSegment] = []
+        for row in csv.reader(text.splitlines()):
+            try:
+                filename, start_time, end_time = row
+                segments.append(
+                    DvrSegment(
+                        filename=Path(filename).name,
+                        start_time=float(start_time),
+                        end_time=float(end_time),
+                    )
+                )
+            except ValueError:
+                self._log.warning('Malformed line in %s: %s', self._path, row)
+        return segments
@@ -1,14 +1,18 @@
 import asyncio
 from typing import Literal
 
-from hikcamerabot.config.schemas.main_config import DvrLivestreamConfSchema
-from hikcamerabot.constants import (
-    FFMPEG_CMD_DVR,
-    FFMPEG_CMD_NULL_AUDIO,
-    RTSP_TRANSPORT_TPL,
+from hikcamerabot.common.video.ffmpeg import (
+    build_audio_args,
+    build_dvr_cmd,
+    build_null_audio_args,
 )
-from hikcamerabot.enums import StreamType, VideoEncoderType
+from hikcamerabot.config.schemas.main_config import DvrLivestreamConfSchema
+from hikcamerabot.enums import DetectionType, StreamType, VideoEncoderType
 from hikcamerabot.services.stream.abstract import AbstractStreamService
+from hikcamerabot.services.stream.dvr.segment_list import (
+    DvrSegmentList,
+    get_segment_list_path,
+)
 from hikcamerabot.services.stream.dvr.upload.engine import DvrUploadEngine
 from hikcamerabot.services.tasks.livestream import ServiceStreamerTask
 from hikcamerabot.utils.task import create_task
@@ -16,7 +20,6 @@ from hikcamerabot.utils.task import create_task
 
 class DvrStreamService(AbstractStreamService):
     NAME: Literal[StreamType.DVR] = StreamType.DVR
-    _FFMPEG_CMD_TPL = FFMPEG_CMD_DVR
     _DVR_FILENAME_TPL: str = (
         '{storage_path}/{cam_id}_{channel}_{segment_time}_%Y-%m-%d_%H-%M-%S.mp4'
     )
@@ -29,29 +32,28 @@ class DvrStreamService(AbstractStreamService):
         )
         self._upload_engine_started = False
 
-    def _format_ffmpeg_cmd_tpl(self) -> str:
-        null_audio = (
-            FFMPEG_CMD_NULL_AUDIO
-            if self._enc_conf.null_audio
-            else dict.fromkeys(FFMPEG_CMD_NULL_AUDIO, '')
-        )
-        return self._FFMPEG_CMD_TPL.format(
-            abitrate=null_audio['bitrate'],
-            asample_rate=f'-ar {self._enc_conf.asample_rate}'
-            if self._enc_conf.asample_rate != -1
-            else '',
-            acodec=self._enc_conf.acodec,
-            rtsp_transport=RTSP_TRANSPORT_TPL.format(
-                rtsp_transport_type=self._enc_conf.rtsp_transport_type
-            )
+    def _build_cmd(self, *, inner_args: list[str], output: str) -> list[str]:
+        null_audio = build_null_audio_args(self._enc_conf.null_audio)
+        return build_dvr_cmd(
+            loglevel=self._enc_conf.loglevel,
+            null_audio=null_audio,
+            rtsp_transport=self._enc_conf.rtsp_transport_type
             if not self._srs_enabled
-            else '',
+            else None,
             video_source=self._generate_video_source(),
-            filter=null_audio['filter'],
-            loglevel=self._enc_conf.loglevel,
-            map=null_audio['map'],
             vcodec=self._enc_conf.vcodec,
+            audio_args=build_audio_args(
+                acodec=self._enc_conf.acodec,
+                null_audio=null_audio,
+                asample_rate=self._enc_conf.asample_rate,
+            ),
+            inner_args=inner_args,
             segment_time=self._stream_conf.segment_time,
+            segment_list=get_segment_list_path(
+                self._conf.local_storage_path, self.cam.id
+            ).as_posix(),
+            segment_list_size=DvrSegmentList.LIST_SIZE,
+            output=output,
         )
 
     async def start(self, *args, **kwargs) -> None:
@@ -62,22 +64,18 @@ class DvrStreamService(AbstractStreamService):
 
         await asyncio.gather(*coros)
 
+    async def add_alert(self, ts: float, detection_type: DetectionType) -> None:
+        await self._upload_engine.add_alert(ts, detection_type)
+
     async def _start_upload_engine(self) -> None:
-        """Start Upload Engine only if at least one storage is enabled."""
-        # TODO: Right now upload engine will start only if DVR records are set
-        # TODO: to be deleted since there is no tracking for uploaded files.
-        if (
-            self._conf.upload.storage.is_any_upload_storage_enabled()
-            and self.cam.conf.livestream.dvr.upload.delete_after_upload
-        ):
-            self._log.info(
-                '[%s] Starting DVR Upload Engine for "%s"',
-                self.cam.id,
-                self.cam.description,
-            )
-            await self._upload_engine.start()
-            return
-        self._log.info('[%s] DVR Upload Engine not started', self.cam.id)
+        """Start Upload Engine to catalog DVR files and upload them if enabled."""
+        self._log.info(
+            '[%s] Starting DVR Upload Engine for "%s", uploads enabled: %s',
+            self.cam.id,
+            self.cam.description,
+            self._conf.upload.storage.is_any_upload_storage_enabled(),
+        )
+        await self._upload_engine.start()
 
     def _start_stream_task(self) -> None:
         create_task(
@@ -89,15 +87,11 @@ class DvrStreamService(AbstractStreamService):
         )
 
     def _generate_transcode_cmd(
-        self, cmd_tpl: str, cmd_transcode: str, enc_codec_name: VideoEncoderType
+        self, cmd_transcode: list[str], enc_codec_name: VideoEncoderType
     ) -> None:
-        try:
-            inner_args = self._cmd_gen_dispatcher[enc_codec_name]()
-        except KeyError:
-            inner_args = ''
-        inner_args = cmd_transcode.format(inner_args=inner_args)
-        self._cmd = cmd_tpl.format(
-            output=self._generate_output(), inner_args=inner_args
+        self._cmd = self._build_cmd(
+            inner_args=self._generate_inner_args(cmd_transcode, enc_codec_name),
+            output=self._generate_output(),
         )
 
     def _generate_output(self) -> str:
@@ -2,6 +2,7 @@ import asyncio
 import logging
 from typing import TYPE_CHECKING
 
+from hikcamerabot.services.stream.dvr.catalog import get_dvr_catalog
 from hikcamerabot.utils.shared import shallow_sleep_async
 
 if TYPE_CHECKING:
@@ -34,12 +35,14 @@ class DvrFileDeleteTask:
                     locked_files.append(file_)
                 else:
                     self._perform_file_cleanup(file_)
+                    await get_dvr_catalog().set_deleted(file_.cam_id, [file_.name])
             for file_ in locked_files:
                 await self._queue.put(file_)
             await shallow_sleep_async(self._QUEUE_SLEEP)
 
     def _perform_file_cleanup(self, file_: 'DvrFile') -> None:
         self._delete_thumbnail(file_)
+        self._delete_contact_sheet(file_)
         self._delete_file(file_)
 
     def _delete_file(self, file_: 'DvrFile') -> None:
@@ -60,3 +63,14 @@ class DvrFileDeleteTask:
             thumb.unlink()
         except Exception:
             self._log.exception('Failed to delete thumbnail %s', thumb)
+
+    def _delete_contact_sheet(self, file_: 'DvrFile') -> None:
+        sheet = file_.contact_sheet
+        if not sheet:
+            return
+
+        self._log.debug('Deleting DVR file contact sheet %s', sheet)
+        try:
+            sheet.unlink()
+        except Exception:
+            self._log.exception('Failed to delete contact sheet %s', sheet)
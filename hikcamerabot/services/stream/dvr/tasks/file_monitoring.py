@@ -1,17 +1,24 @@
 import logging
-import os
 from typing import TYPE_CHECKING
 
+from hikcamerabot.common.fs import PollingDirectoryWatcher, create_directory_watcher
 from hikcamerabot.config.schemas.main_config import CameraConfigSchema
-from hikcamerabot.services.stream.dvr.tasks.file_lock_check import FileLockCheckTask
-from hikcamerabot.utils.shared import shallow_sleep_async
+from hikcamerabot.services.stream.dvr.segment_list import (
+    DvrSegmentList,
+    get_segment_list_path,
+)
 
 if TYPE_CHECKING:
     from hikcamerabot.services.stream.dvr.upload.engine import DvrUploadEngine
 
 
 class DvrFileMonitoringTask:
-    _TASK_SLEEP: int = 30
+    """Pass DVR segments to upload engine as soon as ffmpeg closes them.
+
+    Closed segments are taken from ffmpeg segment list, which is watched for
+    updates. Segments completed while the bot was not running are found by
+    directory scan on start.
+    """
 
     def __init__(
         self, engine: 'DvrUploadEngine', conf: CameraConfigSchema, cam_id: str
@@ -21,45 +28,54 @@ class DvrFileMonitoringTask:
         self._conf = conf
         self._storage_path = self._conf.livestream.dvr.local_storage_path
         self._cam_id = cam_id
+        self._segment_list = DvrSegmentList(
+            get_segment_list_path(self._storage_path, self._cam_id)
+        )
 
     async def run(self) -> None:
+        await self._upload_previous_files()
         await self._monitor_dvr_files()
 
-    async def _monitor_dvr_files(self) -> None:
-        while True:
-            self._log.debug(
-                '[%s] Running %s task', self._cam_id, self.__class__.__name__
-            )
-            try:
-                await self._engine.upload_files(await self._get_unlocked_files())
-            except Exception:
-                self._log.exception(
-                    '[%s] %s encountered an exception',
-                    self._cam_id,
-                    self.__class__.__name__,
-                )
-            await shallow_sleep_async(self._TASK_SLEEP)
-
-    async def _get_unlocked_files(self) -> list[str]:
-        files = [
-            f
-            for f in os.listdir(self._storage_path)
-            if f.startswith(f'{self._cam_id}_') and f.endswith('.mp4')
-        ]
-        if not files:
-            self._log.debug(
-                '[%s] No DVR files in storage %s', self._cam_id, self._storage_path
-            )
-            return []
-
+    async def _upload_previous_files(self) -> None:
+        files = await PollingDirectoryWatcher(
+            self._storage_path, self._is_cam_segment
+        ).scan()
         self._log.debug(
-            '[%s] Found %d files in %s: %s',
+            '[%s] DVR files completed before start in %s: %s',
             self._cam_id,
-            len(files),
             self._storage_path,
             files,
         )
-        unlocked_files = await FileLockCheckTask(files).run()
-        if not unlocked_files:
-            self._log.debug('[%s] No unlocked files to process', self._cam_id)
-        return unlocked_files
+        await self._engine.upload_files(files)
+
+    async def _monitor_dvr_files(self) -> None:
+        self._log.debug('[%s] Running %s task', self._cam_id, self.__class__.__name__)
+        watcher = create_directory_watcher(
+            self._storage_path, self._is_segment_list, sequential=False
+        )
+        try:
+            while True:
+                await watcher.get()
+                try:
+                    segments = await self._segment_list.read_new()
+                    self._log.debug(
+                        '[%s] Completed DVR segments in %s: %s',
+                        self._cam_id,
+                        self._storage_path,
+                        segments,
+                    )
+                    await self._engine.upload_segments(segments)
+                except Exception:
+                    self._log.exception(
+                        '[%s] %s encountered an exception',
+                        self._cam_id,
+                        self.__class__.__name__,
+                    )
+        finally:
+            watcher.close()
+
+    def _is_cam_segment(self, filename: str) -> bool:
+        return filename.startswith(f'{self._cam_id}_') and filename.endswith('.mp4')
+
+    def _is_segment_list(self, filename: str) -> bool:
+        return filename == self._segment_list.path.name
@@ -2,14 +2,26 @@ import asyncio
 import logging
 from typing import TYPE_CHECKING, ClassVar
 
+from hikcamerabot.common.video.mp4 import read_mp4_info
 from hikcamerabot.config.schemas.main_config import (
     DvrLivestreamConfSchema,
 )
-from hikcamerabot.enums import DvrUploadType
+from hikcamerabot.enums import DetectionType, DvrUploadMode, DvrUploadType
+from hikcamerabot.exceptions import Mp4ParseError
+from hikcamerabot.services.stream.dvr.alert_clips import DvrAlertClips
+from hikcamerabot.services.stream.dvr.catalog import (
+    DvrSegmentRecord,
+    get_dvr_catalog,
+    parse_segment_filename,
+)
 from hikcamerabot.services.stream.dvr.file_wrapper import DvrFile
+from hikcamerabot.services.stream.dvr.segment_list import DvrSegment
 from hikcamerabot.services.stream.dvr.tasks.file_delete import DvrFileDeleteTask
 from hikcamerabot.services.stream.dvr.tasks.file_monitoring import DvrFileMonitoringTask
+from hikcamerabot.services.stream.dvr.upload.pool import get_dvr_upload_pool
 from hikcamerabot.services.stream.dvr.upload.tasks.abstract import AbstractDvrUploadTask
+from hikcamerabot.services.stream.dvr.upload.tasks.local import LocalDvrUploadTask
+from hikcamerabot.services.stream.dvr.upload.tasks.s3 import S3DvrUploadTask
 from hikcamerabot.services.stream.dvr.upload.tasks.telegram import TelegramDvrUploadTask
 from hikcamerabot.utils.task import create_task
 
@@ -18,8 +30,10 @@ if TYPE_CHECKING:
 
 
 class DvrUploadEngine:
-    _UPLOAD_TASKS: ClassVar[dict[DvrUploadType, AbstractDvrUploadTask]] = {
+    _UPLOAD_TASKS: ClassVar[dict[DvrUploadType, type[AbstractDvrUploadTask]]] = {
         DvrUploadType.TELEGRAM: TelegramDvrUploadTask,
+        DvrUploadType.LOCAL: LocalDvrUploadTask,
+        DvrUploadType.S3: S3DvrUploadTask,
     }
 
     _FILE_DELETE_TASK_CLS = DvrFileDeleteTask
@@ -28,38 +42,283 @@ class DvrUploadEngine:
         self._log = logging.getLogger(self.__class__.__name__)
         self._conf = conf
         self._cam = cam
-        self._storage_queues = self._create_storage_queues()
-        self._delete_after_upload = self._conf.upload.delete_after_upload
+        self._upload_tasks = self._create_upload_tasks()
+        # Nothing holds files without uploads, they would be deleted right away.
+        self._delete_after_upload = self._conf.upload.delete_after_upload and bool(
+            self._upload_tasks
+        )
         self._delete_candidates_queue: asyncio.Queue[DvrFile] = asyncio.Queue()
-        self._upload_cache: set[str] = set()
+        self._catalog = get_dvr_catalog()
+        # Files queued for upload, kept until uploaded to all storages.
+        self._pending_files: dict[str, DvrFile] = {}
+        self._process_lock = asyncio.Lock()
+        self._alert_window = self._conf.upload.alert_window
+        self._alert_clips: DvrAlertClips | None = None
+        if self._conf.upload.mode is DvrUploadMode.ALERT_CLIPS and self._upload_tasks:
+            self._alert_clips = DvrAlertClips(
+                cam=self._cam,
+                conf=self._alert_window,
+                storage=self._cam.conf.video_gif.on_alert.tmp_storage,
+            )
 
-    def _create_storage_queues(self) -> dict[str, asyncio.Queue]:
-        storage_queues: dict[str, asyncio.Queue] = {}
+    def _create_upload_tasks(self) -> dict[DvrUploadType, AbstractDvrUploadTask]:
+        upload_tasks: dict[DvrUploadType, AbstractDvrUploadTask] = {}
 
         for storage_name, settings in self._conf.upload.storage.get_storage_items():
             if settings.enabled:
-                storage_queues[storage_name] = asyncio.Queue()
+                storage = DvrUploadType(storage_name)
+                upload_tasks[storage] = self._UPLOAD_TASKS[storage](
+                    cam=self._cam, conf=settings
+                )
 
-        self._log.debug('[%s] Created storage queues: %s', self._cam.id, storage_queues)
-        return storage_queues
+        self._log.debug('[%s] Created upload tasks: %s', self._cam.id, upload_tasks)
+        return upload_tasks
 
     async def upload_files(self, files: list[str]) -> None:
-        files = [f for f in files if f not in self._upload_cache]
+        await self._process_files(dict.fromkeys(files))
+
+    async def upload_segments(self, segments: list[DvrSegment]) -> None:
+        """Upload segments from ffmpeg segment list with their exact durations."""
+        await self._process_files({segment.filename: segment for segment in segments})
+
+    async def add_alert(self, ts: float, detection_type: DetectionType) -> None:
+        """Record alert time to tag segments, upload segments or clip around it."""
+        await self._catalog.add_alert(self._cam.id, ts, detection_type.value)
+        if self._alert_clips:
+            self._alert_clips.add_alert(ts)
+        elif self._conf.upload.mode is DvrUploadMode.ALERTS and self._upload_tasks:
+            # Segments closed before the alert were skipped, upload the ones
+            # within alert window now.
+            segments = await self._catalog.find_segments(
+                self._cam.id,
+                ts - self._alert_window.before,
+                ts + self._alert_window.after,
+            )
+            await self._process_files(
+                {
+                    segment.filename: DvrSegment(
+                        segment.filename, 0, segment.end_ts - segment.start_ts
+                    )
+                    for segment in segments
+                }
+            )
+
+    async def _process_files(self, files: dict[str, DvrSegment | None]) -> None:
+        async with self._process_lock:
+            recorded_until = await self._process_segments(files)
+        if self._alert_clips and recorded_until:
+            await self._upload_alert_clips(self._alert_clips, recorded_until)
+
+    async def _process_segments(
+        self, files: dict[str, DvrSegment | None]
+    ) -> float | None:
+        """Catalog new files and queue uploads to storages still missing them.
+
+        Return end time of the newest new segment.
+        """
+        self._pending_files = {
+            name: file_
+            for name, file_ in self._pending_files.items()
+            if file_.is_locked
+        }
+        files = {
+            name: segment
+            for name, segment in files.items()
+            if name not in self._pending_files
+        }
         if not files:
-            return
+            return None
+
+        uploaded = await self._catalog.get_uploaded_storages(self._cam.id, list(files))
+        new_records = await asyncio.to_thread(
+            self._make_records,
+            {name: segment for name, segment in files.items() if name not in uploaded},
+        )
+        await self._catalog.add_segments(new_records)
+        files = await self._filter_static(await self._filter_by_mode(files))
 
-        for file_ in await self._wrap_as_dvr_files(files):
+        uploads: dict[str, tuple[DvrSegment | None, list[DvrUploadType]]] = {}
+        for name, segment in files.items():
+            storages = [
+                storage
+                for storage in self._upload_tasks
+                if storage.value not in uploaded.get(name, set())
+            ]
+            if storages:
+                uploads[name] = (segment, storages)
+
+        dvr_files = await self._score_activity(await self._wrap_as_dvr_files(uploads))
+        for file_, storages in dvr_files:
+            self._pending_files[file_.name] = file_
             if self._delete_after_upload:
                 await self._delete_candidates_queue.put(file_)
-            for queue in self._storage_queues.values():
-                await queue.put(file_)
-            self._upload_cache.add(file_.name)
+            for storage in storages:
+                get_dvr_upload_pool(storage).put(file_, self._upload_tasks[storage])
+        return max((record.end_ts for record in new_records), default=None)
+
+    async def _filter_by_mode(
+        self, files: dict[str, DvrSegment | None]
+    ) -> dict[str, DvrSegment | None]:
+        """Filter segments to upload by upload mode."""
+        if self._conf.upload.mode is DvrUploadMode.ALL:
+            return files
+        if self._conf.upload.mode is DvrUploadMode.ALERT_CLIPS:
+            return {}
+        alert_files = await self._catalog.filter_alert_segments(
+            self._cam.id,
+            list(files),
+            before=self._alert_window.before,
+            after=self._alert_window.after,
+        )
+        return {name: segment for name, segment in files.items() if name in alert_files}
+
+    async def _filter_static(
+        self, files: dict[str, DvrSegment | None]
+    ) -> dict[str, DvrSegment | None]:
+        """Filter out segments already scored as static."""
+        if not self._conf.activity.enabled or not files:
+            return files
+        static_files = await self._catalog.filter_static_segments(
+            self._cam.id, list(files), self._conf.activity.min_score
+        )
+        return {
+            name: segment for name, segment in files.items() if name not in static_files
+        }
 
-    async def _wrap_as_dvr_files(self, files: list[str]) -> list[DvrFile]:
-        lock_count = len(self._storage_queues)
-        files = [DvrFile(f, lock_count, self._cam) for f in files]
-        await asyncio.gather(*[f.make_context() for f in files])
-        return files
+    async def _score_activity(
+        self, dvr_files: list[tuple[DvrFile, list[DvrUploadType]]]
+    ) -> list[tuple[DvrFile, list[DvrUploadType]]]:
+        """Keep activity scores of new files and skip static ones without alerts."""
+        scores = {
+            file_.name: file_.activity
+            for file_, _ in dvr_files
+            if file_.activity is not None
+        }
+        if not scores:
+            return dvr_files
+        await self._catalog.set_activity(self._cam.id, scores)
+
+        active_files: list[tuple[DvrFile, list[DvrUploadType]]] = []
+        for file_, storages in dvr_files:
+            if (
+                file_.activity is not None
+                and file_.activity < self._conf.activity.min_score
+                and not file_.alert_offsets
+            ):
+                self._log.info(
+                    '[%s] Skipping static DVR file %s with activity score %.3f',
+                    self._cam.id,
+                    file_.name,
+                    file_.activity,
+                )
+                if self._delete_after_upload:
+                    # Nothing to upload, delete it as if uploaded to all storages.
+                    for _ in storages:
+                        file_.decrement_lock_count()
+                    await self._delete_candidates_queue.put(file_)
+            else:
+                active_files.append((file_, storages))
+        return active_files
+
+    async def _upload_alert_clips(
+        self, alert_clips: DvrAlertClips, recorded_until: float
+    ) -> None:
+        for clip in await alert_clips.cut_recorded(recorded_until):
+            file_ = DvrFile(
+                clip.path.name,
+                len(self._upload_tasks),
+                self._cam,
+                duration=round(clip.duration),
+                alert_offsets=clip.alert_offsets,
+                storage_path=clip.path.parent,
+                is_segment=False,
+            )
+            await file_.make_context()
+            # Clips are cut again from segments when needed, don't keep them.
+            await self._delete_candidates_queue.put(file_)
+            for storage, task in self._upload_tasks.items():
+                get_dvr_upload_pool(storage).put(file_, task)
+
+    async def _wrap_as_dvr_files(
+        self, uploads: dict[str, tuple[DvrSegment | None, list[DvrUploadType]]]
+    ) -> list[tuple[DvrFile, list[DvrUploadType]]]:
+        dvr_files = [
+            (
+                DvrFile(
+                    name,
+                    len(storages),
+                    self._cam,
+                    duration=round(segment.duration) if segment else None,
+                    alert_offsets=await self._get_alert_offsets(name, segment),
+                ),
+                storages,
+            )
+            for name, (segment, storages) in uploads.items()
+        ]
+        await asyncio.gather(*[file_.make_context() for file_, _ in dvr_files])
+        return dvr_files
+
+    async def _get_alert_offsets(
+        self, name: str, segment: DvrSegment | None
+    ) -> list[float]:
+        filename_info = parse_segment_filename(name)
+        if not filename_info:
+            return []
+        start_ts = filename_info.start_ts
+        duration = segment.duration if segment else filename_info.segment_time
+        alerts = await self._catalog.find_alerts(
+            self._cam.id, start_ts, start_ts + duration
+        )
+        return [ts - start_ts for ts in alerts]
+
+    def _make_records(
+        self, files: dict[str, DvrSegment | None]
+    ) -> list[DvrSegmentRecord]:
+        records: list[DvrSegmentRecord] = []
+        for name, segment in files.items():
+            filename_info = parse_segment_filename(name)
+            if not filename_info:
+                self._log.warning(
+                    '[%s] Unknown DVR filename format, not cataloged: %s',
+                    self._cam.id,
+                    name,
+                )
+                continue
+            path = self._conf.local_storage_path / name
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                self._log.warning('[%s] DVR file %s is gone', self._cam.id, path)
+                continue
+            try:
+                mp4_info = read_mp4_info(path)
+            except Mp4ParseError as err:
+                self._log.warning('[%s] %s', self._cam.id, err)
+                mp4_info = None
+
+            duration: float | None = None
+            if segment:
+                duration = segment.duration
+            elif mp4_info:
+                duration = mp4_info.duration
+            records.append(
+                DvrSegmentRecord(
+                    cam_id=self._cam.id,
+                    channel=filename_info.channel,
+                    filename=name,
+                    path=path,
+                    start_ts=filename_info.start_ts,
+                    end_ts=filename_info.start_ts
+                    + (
+                        duration if duration is not None else filename_info.segment_time
+                    ),
+                    size=size,
+                    duration=round(duration) if duration is not None else None,
+                    width=mp4_info.width if mp4_info else None,
+                    height=mp4_info.height if mp4_info else None,
+                )
+            )
+        return records
 
     async def start(self) -> None:
         await self._start_tasks()
@@ -77,24 +336,8 @@ class DvrUploadEngine:
         )
 
     async def _start_storage_tasks(self) -> None:
-        for storage, queue in self._storage_queues.items():
-            self._log.debug(
-                '[%s] Starting upload task for "%s" storage', self._cam.id, storage
-            )
-            task = self._UPLOAD_TASKS[DvrUploadType(storage)]
-            create_task(
-                task(
-                    cam=self._cam,
-                    conf=self._conf.upload.storage.get_storage_conf_by_type(
-                        type_=storage
-                    ),
-                    queue=queue,
-                ).run(),
-                task_name=task.__name__,
-                logger=self._log,
-                exception_message='Task "%s" raised an exception',
-                exception_message_args=(task.__name__,),
-            )
+        for storage in self._upload_tasks:
+            get_dvr_upload_pool(storage).start()
 
     async def _start_file_monitoring_task(self) -> None:
         self._log.debug(
@@ -113,7 +356,7 @@ class DvrUploadEngine:
         )
 
     async def _start_file_deletion_task(self) -> None:
-        if self._conf.upload.delete_after_upload:
+        if self._delete_after_upload or self._alert_clips:
             self._log.debug(
                 '[%s] Starting DVR file deletion task for "%s"',
                 self._cam.id,
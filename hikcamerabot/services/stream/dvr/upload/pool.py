@@ -0,0 +1,227 @@
+"""Worker pools uploading DVR files of all cameras to storages."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Coroutine
+from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING
+
+from hikcamerabot.config.config import main_conf
+from hikcamerabot.enums import DvrUploadType
+from hikcamerabot.event_engine.dead_letter import get_dead_letter_queue
+from hikcamerabot.utils.shared import Singleton, shallow_sleep_async
+from hikcamerabot.utils.task import create_task
+
+if TYPE_CHECKING:
+    from hikcamerabot.services.stream.dvr.file_wrapper import DvrFile
+    from hikcamerabot.services.stream.dvr.upload.tasks.abstract import (
+        AbstractDvrUploadTask,
+    )
+
+_MB: int = 1024 * 1024
+
+
+@dataclass
+class DvrUploadJob:
+    file_: 'DvrFile'
+    task: 'AbstractDvrUploadTask'
+    attempts: int = 0
+
+
+@dataclass
+class DvrUploadStats:
+    """Upload counters since the last report, time values are in seconds."""
+
+    started_at: float = field(default_factory=time.monotonic)
+    uploaded: int = 0
+    failed: int = 0
+    uploaded_bytes: int = 0
+    busy_time: float = 0.0
+
+
+@dataclass(frozen=True)
+class DvrUploadRetryPolicy:
+    max_attempts: int
+    backoff_base: int
+    backoff_max: int
+
+    def get_delay(self, attempts: int) -> int | None:
+        """Get delay before the next attempt, `None` when attempts are exhausted."""
+        if attempts >= self.max_attempts:
+            return None
+        return min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+
+
+class DvrUploadPool:
+    """Workers uploading DVR files of all cameras to one storage.
+
+    Failed uploads wait for their retry delay outside the queue, so they don't
+    take worker slots from other files. Uploads failed after all attempts are
+    passed to the dead letter queue.
+    """
+
+    def __init__(
+        self,
+        storage: DvrUploadType,
+        worker_num: int,
+        retry_policy: DvrUploadRetryPolicy,
+        stats_interval: int,
+    ) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._storage = storage
+        self._worker_num = worker_num
+        self._retry_policy = retry_policy
+        self._stats_interval = stats_interval
+        self._queue: asyncio.Queue[DvrUploadJob] = asyncio.Queue()
+        self._retrying = 0
+        self._stats = DvrUploadStats()
+        self._tasks: list[asyncio.Task] = []
+
+    def put(self, file_: 'DvrFile', task: 'AbstractDvrUploadTask') -> None:
+        self._queue.put_nowait(DvrUploadJob(file_=file_, task=task))
+
+    def start(self) -> None:
+        """Start workers, once for all cameras."""
+        if self._tasks:
+            return
+        self._log.info(
+            'Starting %d DVR upload workers for "%s" storage',
+            self._worker_num,
+            self._storage.value,
+        )
+        for idx in range(1, self._worker_num + 1):
+            self._start_task(
+                self._run_worker(), f'DvrUploadWorker_{self._storage}_{idx}'
+            )
+        if self._stats_interval:
+            self._start_task(self._report_stats(), f'DvrUploadStats_{self._storage}')
+
+    def _start_task(
+        self, coroutine: Coroutine[None, None, None], task_name: str
+    ) -> None:
+        self._tasks.append(
+            create_task(
+                coroutine,
+                task_name=task_name,
+                logger=self._log,
+                exception_message='Task "%s" raised an exception',
+                exception_message_args=(task_name,),
+            )
+        )
+
+    async def _run_worker(self) -> None:
+        while True:
+            await self._upload(await self._queue.get())
+
+    async def _upload(self, job: DvrUploadJob) -> None:
+        job.attempts += 1
+        started_at = time.monotonic()
+        try:
+            file_size = job.file_.size if job.file_.exists else 0
+            is_uploaded = await job.task.upload(job.file_)
+        except Exception as err:
+            self._stats.failed += 1
+            self._retry(job, err)
+        else:
+            if is_uploaded:
+                self._stats.uploaded += 1
+                self._stats.uploaded_bytes += file_size
+        finally:
+            self._stats.busy_time += time.monotonic() - started_at
+
+    def _retry(self, job: DvrUploadJob, err: Exception) -> None:
+        delay = self._retry_policy.get_delay(job.attempts)
+        if delay is None:
+            self._log.error(
+                'Failed to upload DVR file %s to "%s" storage after %d attempts',
+                job.file_.full_path,
+                self._storage.value,
+                job.attempts,
+                exc_info=err,
+            )
+            # File stays locked from deletion until it's uploaded or the
+            # dead letter is discarded.
+            get_dead_letter_queue().add(
+                description=(
+                    f'[{job.file_.cam_id}] DVR video {job.file_.name} '
+                    f'to {self._storage.value}'
+                ),
+                retry_func=partial(job.task.upload, job.file_),
+                error=repr(err),
+                discard_func=job.file_.decrement_lock_count,
+                attempts=job.attempts,
+            )
+            return
+
+        self._log.warning(
+            'Failed to upload DVR file %s to "%s" storage, attempt %d, '
+            'retrying in %ds: %r',
+            job.file_.full_path,
+            self._storage.value,
+            job.attempts,
+            delay,
+            err,
+        )
+        self._retrying += 1
+        asyncio.get_running_loop().call_later(delay, self._requeue, job)
+
+    def _requeue(self, job: DvrUploadJob) -> None:
+        self._retrying -= 1
+        self._queue.put_nowait(job)
+
+    async def _report_stats(self) -> None:
+        while True:
+            await shallow_sleep_async(self._stats_interval)
+            stats, self._stats = self._stats, DvrUploadStats()
+            if not (
+                stats.uploaded or stats.failed or self._queue.qsize() or self._retrying
+            ):
+                continue
+            elapsed = time.monotonic() - stats.started_at
+            self._log.info(
+                '"%s" storage DVR uploads in the last %ds: %d uploaded, %d failed, '
+                '%.1f MB, %.2f MB/s overall, %.2f MB/s per worker, '
+                '%.0f%% workers utilisation, %d queued, %d waiting for retry',
+                self._storage.value,
+                elapsed,
+                stats.uploaded,
+                stats.failed,
+                stats.uploaded_bytes / _MB,
+                stats.uploaded_bytes / _MB / elapsed,
+                (
+                    stats.uploaded_bytes / _MB / stats.busy_time
+                    if stats.busy_time
+                    else 0.0
+                ),
+                stats.busy_time / (elapsed * self._worker_num) * 100,
+                self._queue.qsize(),
+                self._retrying,
+            )
+
+
+class DvrUploadPools(metaclass=Singleton):
+    """Upload pools per storage type, shared by all cameras."""
+
+    def __init__(self) -> None:
+        self._conf = main_conf.dvr.upload
+        self._pools: dict[DvrUploadType, DvrUploadPool] = {}
+
+    def get(self, storage: DvrUploadType) -> DvrUploadPool:
+        if storage not in self._pools:
+            self._pools[storage] = DvrUploadPool(
+                storage=storage,
+                worker_num=self._conf.workers.get_by_type(storage.value),
+                retry_policy=DvrUploadRetryPolicy(
+                    max_attempts=self._conf.retry.max_attempts,
+                    backoff_base=self._conf.retry.backoff_base,
+                    backoff_max=self._conf.retry.backoff_max,
+                ),
+                stats_interval=self._conf.stats_interval,
+            )
+        return self._pools[storage]
+
+
+def get_dvr_upload_pool(storage: DvrUploadType) -> DvrUploadPool:
+    return DvrUploadPools().get(storage)
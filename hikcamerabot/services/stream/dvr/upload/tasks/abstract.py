@@ -1,33 +1,75 @@
-import asyncio
 import logging
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Final
+from typing import TYPE_CHECKING, ClassVar
 
 from hikcamerabot.config.schemas.main_config import BaseDVRStorageUploadConfSchema
 from hikcamerabot.enums import DvrUploadType
+from hikcamerabot.services.stream.dvr.catalog import get_dvr_catalog
 
 if TYPE_CHECKING:
+    from pathlib import Path
+
     from hikcamerabot.camera import HikvisionCam
     from hikcamerabot.services.stream.dvr.file_wrapper import DvrFile
 
-_UPLOAD_RETRY_WAIT: Final[int] = 5
 
+class AbstractDvrUploadTask[ConfT: BaseDVRStorageUploadConfSchema](ABC):
+    """Upload of camera DVR files to one storage, run by storage upload pool."""
 
-class AbstractDvrUploadTask(ABC):
-    UPLOAD_TYPE: DvrUploadType | None = None
+    UPLOAD_TYPE: ClassVar[DvrUploadType]
 
-    def __init__(
-        self,
-        cam: 'HikvisionCam',
-        conf: BaseDVRStorageUploadConfSchema,
-        queue: asyncio.Queue['DvrFile'],
-    ) -> None:
+    def __init__(self, cam: 'HikvisionCam', conf: ConfT) -> None:
         self._log = logging.getLogger(self.__class__.__name__)
         self._cam = cam
         self._bot = cam.bot
         self._conf = conf
-        self._queue = queue
+
+    async def upload(self, file_: 'DvrFile') -> bool:
+        """Upload file and release its lock, return whether it was uploaded.
+
+        Files which can't be uploaded are skipped. On upload error the file stays
+        locked, so it's not deleted before retry.
+        """
+        if not self._validate_file(file_):
+            file_.decrement_lock_count()
+            return False
+        await self._upload(file_)
+        if contact_sheet := file_.contact_sheet:
+            await self._try_upload_contact_sheet(file_, contact_sheet)
+        if file_.is_segment:
+            await get_dvr_catalog().set_uploaded(
+                self._cam.id, file_.name, self.UPLOAD_TYPE.value
+            )
+        file_.decrement_lock_count()
+        return True
 
     @abstractmethod
-    async def run(self) -> None:
+    async def _upload(self, file_: 'DvrFile') -> None:
         pass
+
+    async def _try_upload_contact_sheet(
+        self, file_: 'DvrFile', contact_sheet: 'Path'
+    ) -> None:
+        """Upload contact sheet after the video, failure doesn't retry the video."""
+        try:
+            await self._upload_contact_sheet(file_, contact_sheet)
+        except Exception:
+            self._log.exception('Failed to upload contact sheet %s', contact_sheet)
+
+    @abstractmethod
+    async def _upload_contact_sheet(
+        self, file_: 'DvrFile', contact_sheet: 'Path'
+    ) -> None:
+        pass
+
+    def _validate_file(self, file_: 'DvrFile') -> bool:
+        if not file_.exists:
+            self._log.error('File %s does not exist, cannot upload', file_.full_path)
+            return False
+        if file_.is_broken:
+            self._log.error('File %s is broken, cannot upload', file_.full_path)
+            return False
+        if file_.is_empty:
+            self._log.error('File %s empty, cannot upload', file_.full_path)
+            return False
+        return True
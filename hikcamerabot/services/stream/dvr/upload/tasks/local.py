@@ -0,0 +1,42 @@
+import asyncio
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from hikcamerabot.config.schemas.main_config import LocalDvrUploadConfSchema
+from hikcamerabot.enums import DvrUploadType
+from hikcamerabot.services.stream.dvr.upload.tasks.abstract import (
+    AbstractDvrUploadTask,
+)
+
+if TYPE_CHECKING:
+    from hikcamerabot.services.stream.dvr.file_wrapper import DvrFile
+
+
+class LocalDvrUploadTask(AbstractDvrUploadTask[LocalDvrUploadConfSchema]):
+    """Mirror DVR files to another directory, e.g., mounted NFS share."""
+
+    UPLOAD_TYPE = DvrUploadType.LOCAL
+
+    async def _upload(self, file_: 'DvrFile') -> None:
+        self._log.debug('Copying DVR video %s to %s', file_.full_path, self._conf.path)
+        await asyncio.to_thread(self._copy_file, file_)
+        self._log.debug('Finished copying DVR video %s', file_.full_path)
+
+    async def _upload_contact_sheet(
+        self,
+        file_: 'DvrFile',  # noqa: ARG002
+        contact_sheet: Path,
+    ) -> None:
+        await asyncio.to_thread(self._copy_file_path, contact_sheet)
+
+    def _copy_file(self, file_: 'DvrFile') -> None:
+        self._copy_file_path(file_.full_path)
+
+    def _copy_file_path(self, file_path: Path) -> None:
+        target_dir = self._conf.path / self._cam.id
+        target_dir.mkdir(parents=True, exist_ok=True)
+        # Copy under temporary name, so the mirror never has partial files.
+        tmp_path = target_dir / f'.{file_path.name}.part'
+        shutil.copyfile(file_path, tmp_path)
+        tmp_path.replace(target_dir / file_path.name)
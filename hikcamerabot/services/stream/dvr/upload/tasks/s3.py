@@ -0,0 +1,71 @@
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from hikcamerabot.clients.s3 import S3Client
+from hikcamerabot.config.schemas.main_config import S3DvrUploadConfSchema
+from hikcamerabot.enums import DvrUploadType
+from hikcamerabot.services.stream.dvr.upload.tasks.abstract import (
+    AbstractDvrUploadTask,
+)
+
+if TYPE_CHECKING:
+    from hikcamerabot.camera import HikvisionCam
+    from hikcamerabot.services.stream.dvr.file_wrapper import DvrFile
+
+
+class S3DvrUploadTask(AbstractDvrUploadTask[S3DvrUploadConfSchema]):
+    """Upload DVR files to S3-compatible object storage."""
+
+    UPLOAD_TYPE = DvrUploadType.S3
+
+    _CONTENT_TYPE: str = 'video/mp4'
+    _CONTACT_SHEET_CONTENT_TYPE: str = 'image/jpeg'
+
+    def __init__(self, cam: 'HikvisionCam', conf: S3DvrUploadConfSchema) -> None:
+        super().__init__(cam=cam, conf=conf)
+        self._client = S3Client(
+            endpoint_url=conf.endpoint_url,
+            region=conf.region,
+            access_key=conf.access_key,
+            secret_key=conf.secret_key,
+            verify_ssl=conf.verify_ssl,
+        )
+
+    async def _upload(self, file_: 'DvrFile') -> None:
+        key = self._get_key(file_.name)
+        self._log.debug(
+            'Uploading DVR video %s to s3://%s/%s',
+            file_.full_path,
+            self._conf.bucket,
+            key,
+        )
+        await self._client.upload_file(
+            self._conf.bucket,
+            key,
+            file_.full_path,
+            part_size=self._conf.part_size,
+            max_concurrency=self._conf.max_concurrency,
+            content_type=self._CONTENT_TYPE,
+        )
+        self._log.debug('Finished uploading DVR video %s', file_.full_path)
+
+    async def _upload_contact_sheet(
+        self,
+        file_: 'DvrFile',  # noqa: ARG002
+        contact_sheet: Path,
+    ) -> None:
+        await self._client.upload_file(
+            self._conf.bucket,
+            self._get_key(contact_sheet.name),
+            contact_sheet,
+            part_size=self._conf.part_size,
+            max_concurrency=self._conf.max_concurrency,
+            content_type=self._CONTACT_SHEET_CONTENT_TYPE,
+        )
+
+    def _get_key(self, filename: str) -> str:
+        return '/'.join(
+            part
+            for part in (self._conf.prefix.strip('/'), self._cam.id, filename)
+            if part
+        )
@@ -1,69 +1,49 @@
-from typing import TYPE_CHECKING, Final
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 from pyrogram.enums import ChatAction
-from tenacity import retry, stop_after_attempt, wait_fixed
+from pyrogram.types import Message
 
-from hikcamerabot.enums import DvrUploadType
+from hikcamerabot.common.telegram import (
+    CacheableMedia,
+    get_file_id_cache,
+    get_telegram_sender,
+    get_upload_service,
+)
+from hikcamerabot.config.schemas.main_config import TelegramDvrUploadConfSchema
+from hikcamerabot.enums import DvrUploadType, TelegramMediaType
 from hikcamerabot.services.stream.dvr.upload.tasks.abstract import (
     AbstractDvrUploadTask,
 )
 
 if TYPE_CHECKING:
+    from hikcamerabot.camera import HikvisionCam
     from hikcamerabot.services.stream.dvr.file_wrapper import DvrFile
 
-_UPLOAD_RETRY_WAIT: Final[int] = 5
-_UPLOAD_RETRY_STOP_AFTER: Final[int] = 5
-
 
-class TelegramDvrUploadTask(AbstractDvrUploadTask):
+class TelegramDvrUploadTask(AbstractDvrUploadTask[TelegramDvrUploadConfSchema]):
     UPLOAD_TYPE = DvrUploadType.TELEGRAM
 
-    async def run(self) -> None:
-        self._log.debug('Running %s task', self.__class__.__name__)
-        await self._process_queue()
-
-    async def _process_queue(self) -> None:
-        while True:
-            file_ = await self._queue.get()
-            await self._upload_video(file_)
-            file_.decrement_lock_count()
-
-    @retry(
-        wait=wait_fixed(_UPLOAD_RETRY_WAIT),
-        stop=stop_after_attempt(_UPLOAD_RETRY_STOP_AFTER),
-    )
-    async def _upload_video(self, file_: 'DvrFile') -> None:
-        try:
-            await self.__upload(file_)
-        except Exception:
-            self._log.exception('Failed to upload video %s. Retrying', file_.full_path)
-            raise
-
-    def _validate_file(self, file_: 'DvrFile') -> bool:
-        if not file_.exists:
-            self._log.error('File %s does not exist, cannot upload', file_.full_path)
-            return False
-        if file_.is_broken:
-            self._log.error('File %s is broken, cannot upload', file_.full_path)
-            return False
-        if file_.is_empty:
-            self._log.error('File %s empty, cannot upload', file_.full_path)
-            return False
-        return True
-
-    async def __upload(self, file_: 'DvrFile') -> None:
-        if not self._validate_file(file_):
-            return
+    def __init__(self, cam: 'HikvisionCam', conf: TelegramDvrUploadConfSchema) -> None:
+        super().__init__(cam=cam, conf=conf)
+        if conf.group_id is None:
+            raise RuntimeError('Telegram DVR upload group ID is not set')
+        self._group_id: int = conf.group_id
 
+    async def _upload(self, file_: 'DvrFile') -> None:
         self._log.debug('Uploading DVR video %s', file_.full_path)
-        caption = f'Video from {self._cam.description} {self._cam.hashtag}'
-        await self._bot.send_chat_action(
-            self._conf.group_id, action=ChatAction.UPLOAD_VIDEO
+        caption = (
+            self._cam.captions.dvr_alert_video(file_.alert_offsets)
+            if file_.alert_offsets
+            else self._cam.captions.dvr_video
         )
-        await self._bot.send_video(
-            self._conf.group_id,
+        await self._bot.send_chat_action(self._group_id, action=ChatAction.UPLOAD_VIDEO)
+
+        send_method = partial(
+            self._bot.send_video,
+            self._group_id,
             caption=caption,
-            video=file_.full_path.as_posix(),
             file_name=file_.name,
             duration=file_.duration or 0,
             height=file_.height or 0,
@@ -71,4 +51,31 @@ class TelegramDvrUploadTask(AbstractDvrUploadTask):
             thumb=file_.thumbnail,
             supports_streaming=True,
         )
+
+        async def send_video(video: CacheableMedia) -> Message | None:
+            if isinstance(video, Path):
+                async with get_upload_service().upload(self._bot, video):
+                    return await get_telegram_sender().send(
+                        self._group_id, partial(send_method, video=video.as_posix())
+                    )
+            return await get_telegram_sender().send(
+                self._group_id, partial(send_method, video=video)
+            )
+
+        await get_file_id_cache().send(
+            file_.full_path, TelegramMediaType.VIDEO, send_video
+        )
         self._log.debug('Finished uploading DVR video %s', file_.full_path)
+
+    async def _upload_contact_sheet(
+        self, file_: 'DvrFile', contact_sheet: Path
+    ) -> None:
+        await get_telegram_sender().send(
+            self._group_id,
+            partial(
+                self._bot.send_photo,
+                self._group_id,
+                photo=contact_sheet.as_posix(),
+                caption=self._cam.captions.dvr_contact_sheet(file_.name),
+            ),
+        )
@@ -2,7 +2,7 @@
 
 from typing import Literal
 
-from hikcamerabot.constants import FFMPEG_CMD_TRANSCODE_ICECAST
+from hikcamerabot.common.video.ffmpeg import build_icecast_args
 from hikcamerabot.enums import StreamType, VideoEncoderType
 from hikcamerabot.exceptions import ServiceConfigError
 from hikcamerabot.services.stream.abstract import (
@@ -16,7 +16,7 @@ class IcecastStreamService(AbstractExternalLivestreamService):
     NAME: Literal[StreamType.ICECAST] = StreamType.ICECAST
 
     def _generate_transcode_cmd(
-        self, cmd_tpl: str, cmd_transcode: str, enc_codec_name: VideoEncoderType
+        self, cmd_transcode: list[str], enc_codec_name: VideoEncoderType
     ) -> None:
         try:
             inner_args = self._cmd_gen_dispatcher[enc_codec_name]()
@@ -25,7 +25,7 @@ class IcecastStreamService(AbstractExternalLivestreamService):
                 f'{self._cls_name} does not support {enc_codec_name} streaming,'
                 f' change template type'
             ) from err
-        icecast_args = FFMPEG_CMD_TRANSCODE_ICECAST.format(
+        icecast_args = build_icecast_args(
             ice_genre=self._stream_conf.ice_stream.ice_genre,
             ice_name=self._stream_conf.ice_stream.ice_name,
             ice_description=self._stream_conf.ice_stream.ice_description,
@@ -33,9 +33,7 @@ class IcecastStreamService(AbstractExternalLivestreamService):
             content_type=self._stream_conf.ice_stream.content_type,
             password=self._stream_conf.ice_stream.password,
         )
-        self._cmd = cmd_tpl.format(
+        self._cmd = self._build_cmd(
+            inner_args=[*cmd_transcode, *inner_args, *icecast_args],
             output=self._stream_conf.ice_stream.url,
-            inner_args=' '.join(
-                [cmd_transcode.format(inner_args=inner_args), icecast_args]
-            ),
         )
@@ -1,9 +1,13 @@
 from typing import Literal
 from urllib.parse import urlsplit
 
+from hikcamerabot.common.video.ffmpeg import (
+    build_audio_args,
+    build_null_audio_args,
+    build_srs_cmd,
+)
 from hikcamerabot.constants import (
-    FFMPEG_CMD_NULL_AUDIO,
-    FFMPEG_CMD_SRS,
+    FFMPEG_CAM_VIDEO_SRC,
     SRS_DOCKER_CONTAINER_NAME,
     SRS_LIVESTREAM_NAME_TPL,
 )
@@ -16,31 +20,29 @@ from hikcamerabot.utils.task import create_task
 
 class SrsStreamService(AbstractStreamService):
     NAME: Literal[StreamType.SRS] = StreamType.SRS
-    _FFMPEG_CMD_TPL: str = FFMPEG_CMD_SRS
 
-    def _format_ffmpeg_cmd_tpl(self) -> str:
-        null_audio = (
-            FFMPEG_CMD_NULL_AUDIO
-            if self._enc_conf.null_audio
-            else dict.fromkeys(FFMPEG_CMD_NULL_AUDIO, '')
-        )
-        return self._FFMPEG_CMD_TPL.format(
-            abitrate=null_audio['bitrate'],
-            asample_rate=f'-ar {self._enc_conf.asample_rate}'
-            if self._enc_conf.asample_rate != -1
-            else '',
-            acodec=self._enc_conf.acodec,
-            channel=self._stream_conf.channel,
-            filter=null_audio['filter'],
-            format=self._enc_conf.format,
-            host=urlsplit(self._hik_host).netloc,
-            rtsp_port=self.cam.conf.rtsp_port,
+    def _build_cmd(self, *, inner_args: list[str], output: str) -> list[str]:
+        null_audio = build_null_audio_args(self._enc_conf.null_audio)
+        return build_srs_cmd(
             loglevel=self._enc_conf.loglevel,
-            map=null_audio['map'],
-            pw=self._hik_password,
+            null_audio=null_audio,
             rtsp_transport_type=self._enc_conf.rtsp_transport_type,
-            user=self._hik_user,
+            video_source=FFMPEG_CAM_VIDEO_SRC.format(
+                user=self._hik_user,
+                pw=self._hik_password,
+                host=urlsplit(self._hik_host).netloc,
+                rtsp_port=self.cam.conf.rtsp_port,
+                channel=self._stream_conf.channel,
+            ),
             vcodec=self._enc_conf.vcodec,
+            audio_args=build_audio_args(
+                acodec=self._enc_conf.acodec,
+                null_audio=null_audio,
+                asample_rate=self._enc_conf.asample_rate,
+            ),
+            inner_args=inner_args,
+            format_=self._enc_conf.format,
+            output=output,
         )
 
     def _start_stream_task(self) -> None:
@@ -53,15 +55,11 @@ class SrsStreamService(AbstractStreamService):
         )
 
     def _generate_transcode_cmd(
-        self, cmd_tpl: str, cmd_transcode: str, enc_codec_name: VideoEncoderType
+        self, cmd_transcode: list[str], enc_codec_name: VideoEncoderType
     ) -> None:
-        try:
-            inner_args = self._cmd_gen_dispatcher[enc_codec_name]()
-        except KeyError:
-            inner_args = ''
-        inner_args = cmd_transcode.format(inner_args=inner_args)
-        self._cmd = cmd_tpl.format(
-            output=self._generate_output(), inner_args=inner_args
+        self._cmd = self._build_cmd(
+            inner_args=self._generate_inner_args(cmd_transcode, enc_codec_name),
+            output=self._generate_output(),
         )
 
     def _generate_output(self) -> str:
@@ -14,15 +14,11 @@ class TelegramStreamService(AbstractExternalLivestreamService):
     NAME: Literal[StreamType.TELEGRAM] = StreamType.TELEGRAM
 
     def _generate_transcode_cmd(
-        self, cmd_tpl: str, cmd_transcode: str, enc_codec_name: VideoEncoderType
+        self, cmd_transcode: list[str], enc_codec_name: VideoEncoderType
     ) -> None:
-        try:
-            inner_args = self._cmd_gen_dispatcher[enc_codec_name]()
-        except KeyError:
-            inner_args = ''
-        inner_args = cmd_transcode.format(inner_args=inner_args)
-        self._cmd = cmd_tpl.format(
-            output=self._generate_output(), inner_args=inner_args
+        self._cmd = self._build_cmd(
+            inner_args=self._generate_inner_args(cmd_transcode, enc_codec_name),
+            output=self._generate_output(),
         )
 
     def _generate_output(self) -> str:
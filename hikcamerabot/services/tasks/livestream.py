@@ -1,5 +1,7 @@
 import asyncio
 import logging
+import shlex
+from collections.abc import Sequence
 from typing import Literal
 
 from tenacity import retry, retry_if_exception_type, wait_fixed
@@ -13,9 +15,9 @@ from hikcamerabot.utils.shared import shallow_sleep_async
 class FfmpegStdoutReaderTask:
     """Log async ffmpeg stdout."""
 
-    def __init__(self, proc: asyncio.subprocess.Process, cmd: str) -> None:
+    def __init__(self, proc: asyncio.subprocess.Process, cmd: Sequence[str]) -> None:
         self._log = logging.getLogger(self.__class__.__name__)
-        self._cmd = cmd
+        self._cmd = shlex.join(cmd)
         self._proc = proc
 
     async def run(self) -> None:
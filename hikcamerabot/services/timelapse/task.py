@@ -1,4 +1,5 @@
 import asyncio
+import shlex
 from datetime import datetime
 from pathlib import Path
 from tempfile import TemporaryDirectory
@@ -7,15 +8,15 @@ from zoneinfo import ZoneInfo
 
 from tenacity import retry, retry_if_exception_type, wait_fixed
 
+from hikcamerabot.common.video.ffmpeg import build_timelapse_cmd
 from hikcamerabot.common.video.tasks.abstract import AbstractFfBinaryTask
 from hikcamerabot.config.env_settings import settings
 from hikcamerabot.config.schemas.main_config import TimelapseSchema
-from hikcamerabot.constants import FFMPEG_BIN, TIMELAPSE_STILL_EXT
-from hikcamerabot.enums import ServiceType
+from hikcamerabot.constants import TIMELAPSE_STILL_EXT
+from hikcamerabot.enums import ProcessKind, ServiceType
 from hikcamerabot.exceptions import HikvisionCamError
 from hikcamerabot.services.abstract import AbstractServiceTask
 from hikcamerabot.utils.file import awaitable_shutil_copyfileobj, awaitable_shutil_move
-from hikcamerabot.utils.process import get_stdout_stderr
 from hikcamerabot.utils.shared import shallow_sleep_async
 from hikcamerabot.utils.task import create_task
 
@@ -23,19 +24,9 @@ if TYPE_CHECKING:
     from hikcamerabot.services.timelapse.timelapse import TimelapseService
 
 
-class MakeTimelapseVideoTask(AbstractFfBinaryTask):
-    _CMD = (
-        f'{FFMPEG_BIN} -loglevel {{loglevel}} '
-        f'-framerate {{img_num}}/{{video_length}} '
-        f'-i {{pattern_path}} '
-        f'-c:v {{video_codec}} '
-        f'-crf {{image_quality}} '
-        f'-pix_fmt {{pix_fmt}} '
-        f'-r {{framerate}} '
-        f'{{custom_ffmpeg_args}} '
-        f'"{{timelapse_video_path}}"'
-    )
+class MakeTimelapseVideoTask(AbstractFfBinaryTask[None]):
     _CMD_TIMEOUT: int = 600
+    _PROCESS_KIND = ProcessKind.ENCODE
     _TIMELAPSE_DIR: str = 'timelapse_stills'
 
     def __init__(
@@ -60,31 +51,31 @@ class MakeTimelapseVideoTask(AbstractFfBinaryTask):
 
     async def _make_timelapse(self) -> None:
         command = self._create_command()
-        proc = await self._run_proc(cmd=command)
-        if not proc:
+        result = await self._run_proc(cmd=command)
+        if not result:
             return
 
-        stdout, stderr = await get_stdout_stderr(proc)
         self._log.debug(
             'Process "%s" returncode: %d, stdout: %s, stderr: %s',
-            command,
-            proc.returncode,
-            stdout,
-            stderr,
+            shlex.join(command),
+            result.returncode,
+            result.stdout,
+            result.stderr,
         )
-        if proc.returncode:
+        if result.returncode:
             self._log.error('Failed to make timelapse for "%s"', self._file_path)
-            self._log.error(stderr)
-
-    def _create_command(self) -> str:
-        if self._conf.threads is None:
-            custom_ffmpeg_args = self._conf.custom_ffmpeg_args
-        else:
-            custom_ffmpeg_args = (
-                f'-threads {self._conf.threads} {self._conf.custom_ffmpeg_args}'
-            )
-
-        command = self._CMD.format(
+            self._log.error(result.stderr)
+
+    def _create_command(self) -> list[str]:
+        custom_ffmpeg_args = shlex.split(self._conf.custom_ffmpeg_args or '')
+        if self._conf.threads is not None:
+            custom_ffmpeg_args = [
+                '-threads',
+                str(self._conf.threads),
+                *custom_ffmpeg_args,
+            ]
+
+        command = build_timelapse_cmd(
             loglevel=self._conf.ffmpeg_log_level,
             img_num=self._img_num,
             video_length=self._conf.video_length,
@@ -93,12 +84,12 @@ class MakeTimelapseVideoTask(AbstractFfBinaryTask):
             image_quality=self._conf.image_quality,
             pix_fmt=self._conf.pix_fmt,
             framerate=self._conf.video_framerate,
-            custom_ffmpeg_args=custom_ffmpeg_args,
-            timelapse_video_path=self._file_path,
+            custom_args=custom_ffmpeg_args,
+            filepath=self._file_path,
         )
 
         if self._conf.nice_value is not None:
-            command = f'nice -n {self._conf.nice_value} {command}'
+            command = ['nice', '-n', str(self._conf.nice_value), *command]
         return command
 
     async def _post_process(self) -> None:
@@ -6,11 +6,6 @@ from signal import Signals
 from hikcamerabot.utils.file import awaitable_os_killpg
 
 
-async def get_stdout_stderr(proc: Process) -> tuple[str, str]:
-    stdout, stderr = await proc.stdout.read(), await proc.stderr.read()
-    return stdout.decode().strip(), stderr.decode().strip()
-
-
 async def kill_proc(
     process: Process, signal_: Signals = signal.SIGINT, reraise: bool = True
 ) -> None: